@@ -0,0 +1,39 @@
+# benchmarks/bench_k_routes.py
+# 用法（在项目根目录下）: python -m benchmarks.bench_k_routes
+
+import random
+import time
+
+from benchmarks.map_gen import grid
+from core.graph import dijkstra
+from core.ksp import k_shortest_paths
+
+
+def run(sides=(10, 30, 60), ks=(1, 2, 4, 8, 16), queries=5, seed=0):
+    rng = random.Random(seed)
+    print(f"{'节点数':>8} {'k':>4} {'平均耗时(ms)':>12} {'偏离搜索':>8} {'树复用':>8} {'扩展节点':>10} {'全量Dijkstra等价':>16}")
+    for side in sides:
+        g = grid(side * side, seed)
+        rg = g.reverse()
+        n = len(g)
+        pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(queries)]
+        full_stats = {}
+        dijkstra(g, 0, stats=full_stats)
+        for k in ks:
+            totals = {'expanded': 0, 'spur_searches': 0, 'tree_reuses': 0}
+            start = time.perf_counter()
+            for source, target in pairs:
+                stats = {}
+                k_shortest_paths(g, rg, source, target, k, stats)
+                for key in totals:
+                    totals[key] += stats[key]
+            elapsed = (time.perf_counter() - start) / queries * 1000
+            # 折算成"相当于多少次全图Dijkstra"（含一次反向树），朴素Yen算法约为偏离搜索次数
+            equivalent = (totals['expanded'] / queries + n) / full_stats['expanded']
+            print(f"{n:>8} {k:>4} {elapsed:>12.2f} {totals['spur_searches'] / queries:>8.1f} "
+                  f"{totals['tree_reuses'] / queries:>8.1f} {totals['expanded'] / queries:>10.0f} "
+                  f"{equivalent:>16.2f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,143 @@
+# benchmarks/map_gen.py
+# 用法（在项目根目录下）: python -m benchmarks.map_gen grid|geometric|scale_free 节点数 输出文件 [--seed N]
+
+import argparse
+import json
+import math
+import random
+import time
+from array import array
+
+from core.graph import CompiledGraph
+
+KINDS = ("grid", "geometric", "scale_free")
+
+
+def _compile(names, sources, targets, weights):
+    """把边列表按起点计数排序成CSR图，不经过字典邻接表，百万条边也只占几十MB。"""
+    n = len(names)
+    counts = [0] * (n + 1)
+    for u in sources:
+        counts[u + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    fill = counts[:n]
+    csr_targets = array('q', bytes(8 * len(sources)))
+    csr_weights = array('d', bytes(8 * len(sources)))
+    for u, v, w in zip(sources, targets, weights):
+        slot = fill[u]
+        csr_targets[slot] = v
+        csr_weights[slot] = w
+        fill[u] = slot + 1
+    return CompiledGraph(names, array('q', counts), csr_targets, csr_weights)
+
+
+def _add_road(edges, a, b, weight):
+    """双向道路：两个方向各一条边。"""
+    sources, targets, weights = edges
+    sources.extend((a, b))
+    targets.extend((b, a))
+    weights.extend((weight, weight))
+
+
+def _new_edges():
+    return array('q'), array('q'), array('d')
+
+
+def grid(nodes, seed=0):
+    """近似 nodes 个路口的方形网格，边长 10~100 米随机。"""
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(nodes))
+    names = [f"{r}-{c}" for r in range(side) for c in range(side)]
+    edges = _new_edges()
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c
+            if c + 1 < side:
+                _add_road(edges, u, u + 1, rng.randint(10, 100))
+            if r + 1 < side:
+                _add_road(edges, u, u + side, rng.randint(10, 100))
+    return _compile(names, *edges)
+
+
+def geometric(nodes, seed=0, degree=6, spacing=100.0):
+    """
+    随机几何图：路口均匀撒在正方形区域内，距离小于半径的两点之间有道路，
+    边长为实际距离（米）。用网格分桶找邻居，复杂度与边数成正比。
+    """
+    rng = random.Random(seed)
+    size = math.sqrt(nodes) * spacing                  # 区域边长，平均每个路口占 spacing²
+    radius = size * math.sqrt(degree / (math.pi * nodes))
+    points = [(rng.random() * size, rng.random() * size) for _ in range(nodes)]
+    cells = {}
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(i)
+    edges = _new_edges()
+    for (cx, cy), members in cells.items():
+        # 只看右侧和上方的相邻格子，每对点只处理一次
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cx + dx, cy + dy))
+            if not others:
+                continue
+            for i in members:
+                xi, yi = points[i]
+                for j in others:
+                    if (dx, dy) == (0, 0) and j <= i:
+                        continue
+                    d = math.hypot(points[j][0] - xi, points[j][1] - yi)
+                    if d < radius:
+                        _add_road(edges, i, j, max(1, round(d)))
+    return _compile([f"g{i}" for i in range(nodes)], *edges)
+
+
+def scale_free(nodes, seed=0, links=2):
+    """Barabási–Albert 无标度图：每个新路口按度数优先连接 links 个已有路口。"""
+    rng = random.Random(seed)
+    edges = _new_edges()
+    ends = []                   # 每条道路的两个端点各出现一次，按度数加权抽样
+    for u in range(1, min(links + 1, nodes)):
+        _add_road(edges, u - 1, u, rng.randint(10, 500))
+        ends += (u - 1, u)
+    for u in range(links + 1, nodes):
+        chosen = set()
+        while len(chosen) < links:
+            chosen.add(ends[rng.randrange(len(ends))])
+        for v in chosen:
+            _add_road(edges, u, v, rng.randint(10, 500))
+            ends += (u, v)
+    return _compile([f"s{i}" for i in range(nodes)], *edges)
+
+
+def generate(kind, nodes, seed=0):
+    if kind not in KINDS:
+        raise ValueError(f"未知的地图类型: {kind}")
+    return globals()[kind](nodes, seed)
+
+
+def write_map_json(g, path):
+    """按 map.json 的格式 {"locations": [...], "graph": {...}} 逐个节点流式写出。"""
+    names = g.names
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"locations": ')
+        f.write(json.dumps(names, ensure_ascii=False))
+        f.write(', "graph": {')
+        for u, name in enumerate(names):
+            start, end = g.offsets[u], g.offsets[u + 1]
+            edges = ", ".join(f"{json.dumps(names[v], ensure_ascii=False)}: {int(w)}"
+                              for v, w in zip(g.targets[start:end], g.weights[start:end]))
+            f.write(f'{"," if u else ""}\n{json.dumps(name, ensure_ascii=False)}: {{{edges}}}')
+        f.write('\n}}\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="生成合成路网地图 (map.json 格式)")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("nodes", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+    start = time.perf_counter()
+    g = generate(options.kind, options.nodes, options.seed)
+    write_map_json(g, options.output)
+    print(f"{options.kind}: {len(g)} 个节点, {g.edge_count} 条边, "
+          f"耗时 {time.perf_counter() - start:.1f} 秒 -> {options.output}")
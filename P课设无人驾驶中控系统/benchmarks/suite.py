@@ -0,0 +1,308 @@
+# benchmarks/suite.py
+# 用法（在项目根目录下）:
+#   python -m benchmarks.suite [--map grid|geometric|scale_free] [--nodes N] [--quick]
+#                              [--output results.json] [--compare 上次的results.json]
+#
+# 所有数据文件（合成地图、状态日志、地标表）都写在临时目录中，不会改动 data/。
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.map_gen import KINDS, generate, write_map_json
+from core import utils
+
+# 结果中以这些后缀结尾的指标参与 --compare 比较，值越小越好 / 越大越好
+LOWER_IS_BETTER = ("_ms", "_seconds")
+HIGHER_IS_BETTER = ("per_second",)
+REGRESSION_THRESHOLD = 0.10
+
+
+def _quiet():
+    """屏蔽子系统的提示输出，避免打印本身成为被测的主要开销。"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _summary(samples):
+    """把一组耗时（秒）汇总为毫秒统计。"""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p90_ms": round(ordered[min(len(ordered) - 1, len(ordered) * 9 // 10)] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def bench_map(kind, nodes, seed):
+    """生成合成地图，写成 map.json 并转换为二进制地图。"""
+    from core.map_format import convert_map
+
+    start = time.perf_counter()
+    g = generate(kind, nodes, seed)
+    generated = time.perf_counter() - start
+    start = time.perf_counter()
+    write_map_json(g, utils.data_path('map.json'))
+    written = time.perf_counter() - start
+    start = time.perf_counter()
+    convert_map()
+    converted = time.perf_counter() - start
+    return {
+        "kind": kind,
+        "nodes": len(g),
+        "edges": g.edge_count,
+        "json_bytes": os.path.getsize(utils.data_path('map.json')),
+        "generate_seconds": round(generated, 3),
+        "write_json_seconds": round(written, 3),
+        "convert_seconds": round(converted, 3),
+    }
+
+
+def bench_navigation_load():
+    """导航子系统加载地图：二进制地图mmap 与 回退解析 map.json 两条路径。"""
+    from core.subsystems.navigation import Navigation
+
+    results = {}
+    with _quiet():
+        start = time.perf_counter()
+        Navigation()
+        results["mmap_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        binary = utils.data_path('map.bin')
+        os.replace(binary, binary + '.bak')
+        try:
+            start = time.perf_counter()
+            Navigation()
+            results["json_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        finally:
+            os.replace(binary + '.bak', binary)
+    return results
+
+
+def bench_plan_route(queries, seed, modes):
+    """按各搜索模式规划同一组随机起终点；每对只查一次，不命中路线缓存。"""
+    from core.subsystems.navigation import Navigation
+
+    with _quiet():
+        nav = Navigation()
+    rng = random.Random(seed)
+    names = nav.compiled.names
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(queries)]
+    results = {}
+    for mode in modes:
+        with _quiet():
+            nav.set_search_mode(mode)
+            start = time.perf_counter()
+            if mode == "alt":
+                nav.landmarks()
+            elif mode == "table":
+                nav.route_table()
+            prepare = time.perf_counter() - start
+            nav.route_cache.clear()
+            samples, expanded, found = [], 0, 0
+            for source, target in pairs:
+                nav.set_points(source, target)
+                start = time.perf_counter()
+                ok = nav.plan_route()
+                samples.append(time.perf_counter() - start)
+                expanded += nav.last_expanded
+                found += bool(ok)
+        result = _summary(samples)
+        result.update(prepare_ms=round(prepare * 1000, 3),
+                      mean_expanded=round(expanded / queries, 1),
+                      reachable=found,
+                      queries_per_second=round(queries / sum(samples), 1))
+        results[mode] = result
+    return results
+
+
+def bench_commands(count, seed):
+    """单车命令吞吐：经 core.commands 分发的随机子系统命令混合。"""
+    from core.commands import execute
+    from core.subsystems.light import Light
+    from core.vehicle import Vehicle
+
+    with _quiet():
+        car = Vehicle(preload=True)
+    rng = random.Random(seed)
+    makers = [
+        lambda: ("ac.set_temperature", [rng.randint(16, 30)]),
+        lambda: ("ac.set_humidity", [rng.randint(30, 70)]),
+        lambda: ("light.set_interior_light_level", [rng.randint(0, Light.MAX_INTERIOR_LEVEL)]),
+        lambda: ("light.toggle_headlights", []),
+        lambda: ("door_window.set_window_level", [rng.choice(["front_left", "rear_right"]),
+                                                  rng.randint(0, 100)]),
+        lambda: ("door_window.toggle_door_locks", []),
+        lambda: ("set_driving_mode", [rng.randint(0, 2)]),
+        lambda: ("status", []),
+    ]
+    commands = [rng.choice(makers)() for _ in range(count)]
+    failed = 0
+    start = time.perf_counter()
+    for name, args in commands:
+        ok, _, _ = execute(car, name, args)
+        failed += not ok
+    elapsed = time.perf_counter() - start
+    car.events.flush()
+    return {"commands": count, "failed": failed, "seconds": round(elapsed, 3),
+            "ops_per_second": round(count / elapsed)}
+
+
+def bench_persistence(count):
+    """save_state 持久化：增量写日志的吞吐，以及最后一次刷盘 (fsync) 的耗时。"""
+    from core.vehicle import Vehicle
+
+    with _quiet():
+        car = Vehicle()
+        ac = car.ac
+    store = utils.state_store()
+    first = store.seq
+    start = time.perf_counter()
+    with _quiet():
+        for i in range(count):
+            ac.set_temperature(16 + i % 15)
+            car.events.flush()
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    utils.flush_data()
+    flushed = time.perf_counter() - start
+    return {"saves": count, "seconds": round(elapsed, 3),
+            "saves_per_second": round(count / elapsed),
+            "journal_records": store.seq - first,
+            "flush_ms": round(flushed * 1000, 3)}
+
+
+def bench_startup(repeat):
+    """车辆启动到首帧仪表盘：默认懒加载 与 线程池并行预加载。"""
+    from core.vehicle import Vehicle
+
+    results = {}
+    for label, preload in (("lazy", False), ("preload", True)):
+        samples, breakdown = [], {}
+        for _ in range(repeat):
+            with _quiet():
+                start = time.perf_counter()
+                car = Vehicle(preload=preload)
+                car.dashboard_lines()
+                samples.append(time.perf_counter() - start)
+            for name, seconds in car.startup_times.items():
+                breakdown.setdefault(name, []).append(seconds)
+        result = _summary(samples)
+        result["breakdown_ms"] = {name: round(statistics.fmean(values) * 1000, 4)
+                                  for name, values in breakdown.items()}
+        results[label] = result
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(kind="grid", nodes=100000, queries=200, commands=100000, saves=20000,
+        startups=20, seed=0):
+    """在临时数据目录中依次运行全部负载，返回结果字典。"""
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+        },
+    }
+    original = utils.DATA_DIR
+    with tempfile.TemporaryDirectory(prefix="car-bench-") as data_dir:
+        utils.DATA_DIR = data_dir
+        try:
+            steps = [
+                ("map", lambda: bench_map(kind, nodes, seed)),
+                ("navigation_load", bench_navigation_load),
+                # 全源查表的内存与节点数平方成正比，只在小地图上测
+                ("plan_route", lambda: bench_plan_route(
+                    queries, seed, ["dijkstra", "bidirectional", "alt", "incremental"]
+                    + (["table"] if nodes <= 2000 else []))),
+                ("startup", lambda: bench_startup(startups)),
+                ("commands", lambda: bench_commands(commands, seed)),
+                ("persistence", lambda: bench_persistence(saves)),
+            ]
+            for name, step in steps:
+                start = time.perf_counter()
+                results[name] = step()
+                print(f"  {name:<16} 完成，用时 {time.perf_counter() - start:.1f} 秒",
+                      file=sys.stderr)
+        finally:
+            utils.shutdown_data()
+            utils.DATA_DIR = original
+    return results
+
+
+def _flatten(data, prefix=""):
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(old, new):
+    """对比两次结果，返回报告行；变差超过 REGRESSION_THRESHOLD 的指标标记为回退。"""
+    previous = dict(_flatten(old))
+    lines = []
+    for name, value in _flatten(new):
+        if name.startswith("meta.") or name not in previous or not previous[name]:
+            continue
+        if name.endswith(LOWER_IS_BETTER):
+            change = value / previous[name] - 1
+        elif name.endswith(HIGHER_IS_BETTER):
+            change = previous[name] / value - 1 if value else float("inf")
+        else:
+            continue
+        flag = "  <-- 回退" if change > REGRESSION_THRESHOLD else ""
+        lines.append(f"{name:<48}{previous[name]:>14.3f}{value:>14.3f}{change:>+9.1%}{flag}")
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="无人驾驶中控系统基准测试")
+    parser.add_argument("--map", choices=KINDS, default="grid")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="小规模快速运行")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="FILE", help="与之前的结果对比")
+    options = parser.parse_args()
+
+    scale = dict(queries=50, commands=20000, saves=2000, startups=5) if options.quick else {}
+    nodes = min(options.nodes, 10000) if options.quick else options.nodes
+    print(f"运行基准测试: {options.map} 地图, {nodes} 个节点", file=sys.stderr)
+    results = run(options.map, nodes, seed=options.seed, **scale)
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"结果已写入 {options.output}", file=sys.stderr)
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        before, after = previous.get("map", {}), results["map"]
+        if (before.get("kind"), before.get("nodes")) != (after["kind"], after["nodes"]):
+            print(f"\n注意: 两次使用的地图不同 ({before.get('kind')}/{before.get('nodes')} "
+                  f"vs {after['kind']}/{after['nodes']})，路径规划指标不可直接比较")
+        # 变化为正表示变差（耗时增加或吞吐下降）
+        print(f"\n{'指标':<46}{'之前':>14}{'现在':>14}{'变化':>9}")
+        for line in compare(previous, results):
+            print(line)
@@ -0,0 +1,106 @@
+# core/batch.py
+
+import heapq
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.graph import extract_path, as_distance, INF
+
+RouteResult = namedtuple('RouteResult', ['start', 'end', 'route', 'distance'])
+
+# 工作进程中的只读编译图，由进程池的 initializer 设置一次。
+# 在 fork 启动方式下子进程直接继承父进程的CSR数组（写时复制），不会重新序列化。
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def shortest_paths_from(g, source, targets):
+    """
+    从 source 出发的一棵最短路树同时服务多个终点：
+    所有终点都出堆后提前结束。返回 [(终点, 距离, 节点编号路径)]。
+    """
+    n = len(g)
+    dist = array('d', [INF]) * n
+    prev = array('q', [-1]) * n
+    dist[source] = 0.0
+    remaining = set(targets)
+    offsets, tgt, weights = g.offsets, g.targets, g.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    heap = [(0.0, source)]
+
+    while heap and remaining:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        remaining.discard(u)
+        for e in range(offsets[u], offsets[u + 1]):
+            v = tgt[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                heappush(heap, (nd, v))
+
+    results = []
+    for target in targets:
+        if dist[target] == INF:
+            results.append((target, INF, None))
+        else:
+            results.append((target, dist[target], extract_path(prev, source, target)))
+    return source, results
+
+
+def _plan_in_worker(source, targets):
+    return shortest_paths_from(_worker_graph, source, targets)
+
+
+def group_by_source(g, pairs):
+    """
+    把 (起点名, 终点名) 查询按起点分组。
+    返回 ({起点编号: [终点编号, ...]}, [无效查询])，无效查询指地点不在地图上。
+    """
+    groups = {}
+    invalid = []
+    for start, end in pairs:
+        source = g.index.get(start)
+        target = g.index.get(end)
+        if source is None or target is None:
+            invalid.append((start, end))
+            continue
+        targets = groups.setdefault(source, [])
+        if target not in targets:
+            targets.append(target)
+    return groups, invalid
+
+
+def plan_batch(g, pairs, workers=None):
+    """
+    批量规划路线，以生成器形式逐个产出 RouteResult。
+    同一起点的查询共用一棵最短路树；workers 大于1时，不同起点分发到进程池并行计算，
+    结果按完成顺序流式返回。同一起点终点对重复出现时只产出一次。
+    """
+    groups, invalid = group_by_source(g, pairs)
+    for start, end in invalid:
+        yield RouteResult(start, end, None, INF)
+
+    def to_results(source, results):
+        for target, distance, path in results:
+            route = [g.names[node] for node in path] if path else None
+            yield RouteResult(g.names[source], g.names[target], route, as_distance(distance))
+
+    if not workers or workers <= 1 or len(groups) <= 1:
+        for source, targets in groups.items():
+            yield from to_results(*shortest_paths_from(g, source, targets))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(g,)) as pool:
+        futures = [pool.submit(_plan_in_worker, source, targets)
+                   for source, targets in groups.items()]
+        for future in as_completed(futures):
+            yield from to_results(*future.result())
@@ -0,0 +1,115 @@
+# core/charge_model.py
+
+import numpy as np
+
+
+class ChargeCurve:
+    """
+    恒流/恒压 (CC/CV) 两段式充电曲线模型，带温度降额，全部为闭式解。
+    所有方法都接受标量或NumPy数组并按广播规则逐元素计算，
+    可以一次调用算出成千上万块电池的充电时间和耗电量，不需要逐个百分比循环。
+
+    - CC段：电量从当前值线性上升到 cv_soc，速率由C倍率和充电桩功率中较小者决定；
+    - CV段：电流按指数衰减，电量 soc(t) = 100 - (100 - cv_soc) * exp(-t / tau)，
+      tau 的取值保证两段衔接处速率连续；电流降到 CC 电流的 cutoff 比例时判定充满；
+    - 温度降额：在 [optimal_low, optimal_high] 内不降额，低温和高温时线性降低充电速率。
+    """
+
+    def __init__(self, capacity_kwh=60.0, c_rate=1.0, charger_kw=50.0, cv_soc=80.0,
+                 cutoff=0.05, efficiency=0.92, optimal_low=15.0, optimal_high=35.0,
+                 cold_slope=0.04, hot_slope=0.08, min_derate=0.1):
+        self.capacity_kwh = capacity_kwh    # 电池包容量 (kWh)
+        self.c_rate = c_rate                # CC段允许的最大C倍率
+        self.charger_kw = charger_kw        # 充电桩最大输出功率 (kW)
+        self.cv_soc = cv_soc                # CC转CV的电量 (%)
+        self.cutoff = cutoff                # CV段截止电流占CC电流的比例
+        self.efficiency = efficiency        # 充电效率（电网侧能量 -> 电池）
+        self.optimal_low = optimal_low
+        self.optimal_high = optimal_high
+        self.cold_slope = cold_slope        # 低于最佳温度时每度降低的比例
+        self.hot_slope = hot_slope          # 高于最佳温度时每度降低的比例
+        self.min_derate = min_derate
+
+    @property
+    def full_soc(self):
+        """达到截止电流时的电量，视为"充满"。"""
+        return 100.0 - (100.0 - self.cv_soc) * self.cutoff
+
+    def derate(self, temperature):
+        """温度降额系数 (min_derate ~ 1)。"""
+        t = np.asarray(temperature, dtype=np.float64)
+        cold = self.cold_slope * np.maximum(self.optimal_low - t, 0.0)
+        hot = self.hot_slope * np.maximum(t - self.optimal_high, 0.0)
+        return np.clip(1.0 - cold - hot, self.min_derate, 1.0)
+
+    def cc_rate(self, temperature=25.0, charger_kw=None):
+        """CC段的充电速率 (%/秒)。"""
+        charger_kw = self.charger_kw if charger_kw is None else charger_kw
+        power = np.minimum(self.c_rate * self.capacity_kwh,
+                           np.asarray(charger_kw, dtype=np.float64) * self.efficiency)
+        return power / self.capacity_kwh * 100.0 / 3600.0 * self.derate(temperature)
+
+    def time_to_target(self, soc_start, soc_target, temperature=25.0, charger_kw=None):
+        """从 soc_start 充到 soc_target 所需的秒数；目标不高于当前电量时为0。"""
+        s0 = np.asarray(soc_start, dtype=np.float64)
+        s1 = np.minimum(np.asarray(soc_target, dtype=np.float64), self.full_soc)
+        s1 = np.maximum(s1, s0)
+        rate = self.cc_rate(temperature, charger_kw)
+        tau = (100.0 - self.cv_soc) / rate
+
+        t_cc = np.maximum(np.minimum(s1, self.cv_soc) - s0, 0.0) / rate
+        cv_start = np.maximum(s0, self.cv_soc)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_cv = np.where(s1 > cv_start,
+                            tau * np.log((100.0 - cv_start) / (100.0 - s1)), 0.0)
+        return t_cc + t_cv
+
+    def soc_after(self, soc_start, duration, temperature=25.0, charger_kw=None):
+        """充电 duration 秒后的电量。"""
+        s0 = np.asarray(soc_start, dtype=np.float64)
+        t = np.asarray(duration, dtype=np.float64)
+        rate = self.cc_rate(temperature, charger_kw)
+        tau = (100.0 - self.cv_soc) / rate
+
+        t_to_cv = np.maximum(self.cv_soc - s0, 0.0) / rate
+        in_cc = t <= t_to_cv
+        cc_soc = s0 + rate * t
+        cv_start = np.maximum(s0, self.cv_soc)
+        cv_soc = 100.0 - (100.0 - cv_start) * np.exp(-(t - t_to_cv) / tau)
+        soc = np.where(in_cc, cc_soc, cv_soc)
+        return np.minimum(np.maximum(soc, s0), np.maximum(self.full_soc, s0))
+
+    def energy_drawn(self, soc_start, soc_target):
+        """从电网取用的电能 (kWh)。"""
+        s0 = np.asarray(soc_start, dtype=np.float64)
+        s1 = np.maximum(np.minimum(np.asarray(soc_target, dtype=np.float64), self.full_soc), s0)
+        return (s1 - s0) / 100.0 * self.capacity_kwh / self.efficiency
+
+    def plan(self, soc_start, soc_target, temperature=25.0, charger_kw=None):
+        """一次调用同时返回 (充电秒数, 耗电kWh)。"""
+        return (self.time_to_target(soc_start, soc_target, temperature, charger_kw),
+                self.energy_drawn(soc_start, soc_target))
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import time
+
+    print("--- 开始充电曲线模块单元测试 ---")
+    curve = ChargeCurve()
+
+    print("\n>>> 单块电池: 20% -> 80% / 100%，不同温度")
+    for temp in (-10, 0, 25, 40):
+        t80 = float(curve.time_to_target(20, 80, temp))
+        t100 = float(curve.time_to_target(20, 100, temp))
+        print(f"  {temp:>4}°C: 到80% {t80 / 60:6.1f} 分钟, 到充满 {t100 / 60:6.1f} 分钟")
+
+    print("\n>>> 10万块电池一次性计算")
+    rng = np.random.default_rng(0)
+    socs = rng.uniform(5, 70, 100000)
+    temps = rng.uniform(-15, 45, 100000)
+    start = time.perf_counter()
+    seconds, energy = curve.plan(socs, 80, temps)
+    elapsed = time.perf_counter() - start
+    print(f"  耗时 {elapsed * 1000:.1f} 毫秒, 平均充电 {seconds.mean() / 60:.1f} 分钟, 总耗电 {energy.sum():.0f} kWh")
+    print("--- 充电曲线模块单元测试结束 ---")
@@ -0,0 +1,160 @@
+# core/climate.py
+
+import numpy as np
+
+ZONES = ["front_left", "front_right", "rear_left", "rear_right"]   # 与车窗位置一一对应
+
+
+class CabinClimate:
+    """
+    多温区车厢热湿模型，状态是 (车辆数, 温区数) 的NumPy数组，
+    一次 step 同时推进所有车辆的所有温区，单车空调只是车辆数为1的特例。
+
+    每个温区的温度变化率 (K/s)：
+      (环境平衡温度 - T) * 散热系数      车身漏热，打开车窗时显著加快
+      + 空调热流 / 热容                   制冷为负、制热为正
+      + 温区耦合 * (车厢平均温度 - T)     温区之间的空气混合
+    湿度向车外湿度漂移，空调制冷时蒸发器除湿。
+
+    控制器：
+      - auto：前馈抵消车身漏热 + 按温差比例调节（限幅），稳态无静差；
+        湿度高于设定值时加大除湿；
+      - manual：温差超过回差时以最大功率运行，否则停机（简单恒温器）。
+    """
+
+    THERMAL_MASS = 60.0         # 每个温区的等效热容 (kJ/K)
+    PASSIVE_TAU = 900.0         # 车窗关闭时车厢与环境换热的时间常数 (s)
+    WINDOW_TAU = 120.0          # 车窗全开时额外换热的时间常数 (s)
+    SOLAR_GAIN = 3.0            # 日晒使车厢平衡温度高于车外的度数 (K)
+    ZONE_COUPLING = 1 / 300     # 温区之间的混合速率 (1/s)
+    MAX_POWER = 1.5             # 每个温区的最大制冷/制热热流 (kW)
+    AUTO_GAIN = 0.5             # auto 模式比例增益 (kW/K)
+    DEADBAND = 0.5              # manual 模式的温度回差 (K)
+    COP = 2.5                   # 热泵能效比：热流 / 电功率
+    HUMIDITY_TAU = 1200.0       # 车窗关闭时湿度向车外漂移的时间常数 (s)
+    DEHUMIDIFY_RATE = 0.01      # 每 kW 制冷量的除湿速率 (%/s)
+    MAX_SUBSTEP = 60.0          # 积分子步长上限 (s)，限制控制器在一步内的超调
+
+    def __init__(self, vehicles=1, zones=len(ZONES), temp=22.0, humidity=45.0):
+        shape = (vehicles, zones)
+        # temp/humidity 可以是标量或每车一个值，初始时各温区相同
+        self.temp = np.broadcast_to(self._per_vehicle(temp, vehicles), shape).copy()
+        self.humidity = np.broadcast_to(self._per_vehicle(humidity, vehicles), shape).copy()
+        self.power_kw = np.zeros(vehicles)      # 最近一步每辆车的空调电功率
+        self.energy_kwh = np.zeros(vehicles)    # 累计耗电
+
+    @property
+    def vehicles(self):
+        return self.temp.shape[0]
+
+    def mean_temp(self):
+        return self.temp.mean(axis=1)
+
+    def mean_humidity(self):
+        return self.humidity.mean(axis=1)
+
+    @staticmethod
+    def _per_vehicle(value, vehicles):
+        """标量或每车一个值的数组 -> (车辆数, 1)，便于与温区数组广播。"""
+        value = np.asarray(value, dtype=np.float64)
+        return value.reshape(-1, 1) if value.ndim == 1 else np.broadcast_to(value, (vehicles, 1))
+
+    def heat_flow(self, on, auto, preset_temp, equilibrium, leak):
+        """各温区的空调热流 (kW)，正值制热、负值制冷。"""
+        error = preset_temp - self.temp
+        feedforward = self.THERMAL_MASS * leak * (preset_temp - equilibrium)
+        proportional = np.clip(feedforward + self.AUTO_GAIN * error,
+                               -self.MAX_POWER, self.MAX_POWER)
+        thermostat = np.where(np.abs(error) > self.DEADBAND,
+                              np.sign(error) * self.MAX_POWER, 0.0)
+        return np.where(on, np.where(auto, proportional, thermostat), 0.0)
+
+    def step(self, dt, on, auto, preset_temp, preset_humidity, ambient_temp,
+             ambient_humidity, window_open=0.0):
+        """
+        推进 dt 秒。on/auto 为每车布尔数组（或标量），preset_*/ambient_* 为标量或每车数组，
+        window_open 为每个温区的车窗开度 (0~1)，形状可以是标量、(车辆数,) 或 (车辆数, 温区数)。
+        """
+        n = self.vehicles
+        on = self._per_vehicle(on, n).astype(bool)
+        auto = self._per_vehicle(auto, n).astype(bool)
+        preset_temp = self._per_vehicle(preset_temp, n)
+        preset_humidity = self._per_vehicle(preset_humidity, n)
+        equilibrium = self._per_vehicle(ambient_temp, n) + self.SOLAR_GAIN
+        ambient_humidity = self._per_vehicle(ambient_humidity, n)
+        window_open = np.asarray(window_open, dtype=np.float64)
+        if window_open.ndim == 1:
+            window_open = window_open.reshape(-1, 1)
+        leak = 1.0 / self.PASSIVE_TAU + window_open / self.WINDOW_TAU
+        humidity_leak = 1.0 / self.HUMIDITY_TAU + window_open / self.WINDOW_TAU
+
+        substeps = max(1, int(np.ceil(dt / self.MAX_SUBSTEP)))
+        h = dt / substeps
+        for _ in range(substeps):
+            q = self.heat_flow(on, auto, preset_temp, equilibrium, leak)
+            # auto 模式湿度偏高时，以至少一半的最大功率运行压缩机除湿
+            too_humid = on & auto & (self.humidity > preset_humidity)
+            cooling = np.where(too_humid, np.maximum(-q, 0.5 * self.MAX_POWER), np.maximum(-q, 0.0))
+            mean = self.temp.mean(axis=1, keepdims=True)
+            # 换热和温区耦合用隐式欧拉，步长较大时也不会振荡发散
+            self.temp = (self.temp + h * (equilibrium * leak + q / self.THERMAL_MASS
+                                          + self.ZONE_COUPLING * mean)) \
+                / (1.0 + h * (leak + self.ZONE_COUPLING))
+            self.humidity = (self.humidity + h * (ambient_humidity * humidity_leak
+                                                  - self.DEHUMIDIFY_RATE * cooling)) \
+                / (1.0 + h * humidity_leak)
+            np.clip(self.humidity, 0.0, 100.0, out=self.humidity)
+            # 除湿时多出的制冷量由再热抵消，电功率按总压缩机负荷计
+            self.power_kw = np.maximum(np.abs(q), cooling).sum(axis=1) / self.COP
+            self.energy_kwh += self.power_kw * h / 3600.0
+        return self
+
+    def estimate_energy(self, duration, step=60.0, **conditions):
+        """
+        在给定条件下仿真 duration 秒，返回每辆车的空调耗电 (kWh)，不修改当前状态。
+        conditions 与 step 方法的参数相同（除 dt 外）。
+        """
+        trial = CabinClimate.__new__(CabinClimate)
+        trial.temp = self.temp.copy()
+        trial.humidity = self.humidity.copy()
+        trial.power_kw = np.zeros(self.vehicles)
+        trial.energy_kwh = np.zeros(self.vehicles)
+        elapsed = 0.0
+        while elapsed < duration - 1e-9:
+            dt = min(step, duration - elapsed)
+            trial.step(dt, **conditions)
+            elapsed += dt
+        return trial.energy_kwh
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import time
+
+    print("--- 开始车厢气候模型单元测试 ---")
+    print("\n>>> 单车: 35°C 暴晒后开启空调 (auto, 设定24°C/50%)")
+    cabin = CabinClimate(temp=38, humidity=70)
+    for minute in range(0, 31, 5):
+        print(f"  {minute:>2} 分钟: 温度 {cabin.mean_temp()[0]:5.1f}°C, "
+              f"湿度 {cabin.mean_humidity()[0]:5.1f}%, 功率 {cabin.power_kw[0]:.2f} kW")
+        for _ in range(60):
+            cabin.step(5, on=True, auto=True, preset_temp=24, preset_humidity=50,
+                       ambient_temp=35, ambient_humidity=70)
+
+    print("\n>>> 单车: 打开左前车窗后的各温区温度")
+    cabin.step(300, on=True, auto=True, preset_temp=24, preset_humidity=50,
+               ambient_temp=35, ambient_humidity=70, window_open=[[1.0, 0, 0, 0]])
+    print("  " + ", ".join(f"{zone}: {t:.1f}°C" for zone, t in zip(ZONES, cabin.temp[0])))
+
+    print("\n>>> 1万辆车: 一次数组运算估计未来8小时空调耗电")
+    rng = np.random.default_rng(0)
+    n = 10000
+    fleet = CabinClimate(n, temp=rng.uniform(15, 40, n), humidity=rng.uniform(30, 80, n))
+    start = time.perf_counter()
+    energy = fleet.estimate_energy(8 * 3600, step=60, on=rng.random(n) < 0.7,
+                                   auto=rng.random(n) < 0.5, preset_temp=rng.integers(18, 27, n),
+                                   preset_humidity=50, ambient_temp=rng.uniform(-5, 38, n),
+                                   ambient_humidity=60)
+    elapsed = time.perf_counter() - start
+    print(f"  耗时 {elapsed:.2f} 秒, 平均 {energy.mean():.2f} kWh/车, 总计 {energy.sum():.0f} kWh")
+    print("--- 车厢气候模型单元测试结束 ---")
@@ -0,0 +1,202 @@
+# core/commands.py
+
+import contextlib
+import io
+
+# 命令名 -> 处理函数；处理函数接收 (车辆, *参数)，返回命令执行后的相关状态
+COMMANDS = {}
+# 命令的整数编号（按登记顺序），二进制协议中可以用编号代替命令名
+COMMAND_NAMES = []
+
+
+class Rejected(Exception):
+    """子系统拒绝了命令的参数（如温度超出范围），原因已由子系统打印。"""
+
+
+def _accepted(ok):
+    """子系统的设置方法返回 False 时，让这条命令以失败结束。"""
+    if not ok:
+        raise Rejected()
+
+
+def command(name):
+    """登记一条车辆命令。"""
+    def register(func):
+        COMMANDS[name] = func
+        COMMAND_NAMES.append(name)
+        return func
+    return register
+
+
+def resolve(name):
+    """命令名或编号 -> 处理函数，未知命令抛出 KeyError/IndexError。"""
+    if isinstance(name, int):
+        name = COMMAND_NAMES[name]
+    return COMMANDS[name]
+
+
+def execute(vehicle, name, args=(), capture=True):
+    """
+    执行一条命令，返回 (是否成功, 结果, 子系统输出的提示信息)。
+    子系统用 print 报告无效输入，capture=True 时把这些输出收集为提示信息返回，
+    而不是打印到终端；子系统拒绝的输入、参数类型错误、未知命令以及命令执行中的
+    其它异常都转换为失败结果。
+    """
+    try:
+        handler = resolve(name)
+    except (KeyError, IndexError, TypeError):
+        return False, None, f"未知命令: {name}"
+    buffer = io.StringIO() if capture else None
+    try:
+        if capture:
+            with contextlib.redirect_stdout(buffer):
+                value = handler(vehicle, *args)
+        else:
+            value = handler(vehicle, *args)
+    except Rejected:
+        return False, None, (buffer.getvalue().strip() if capture else "") or "命令被拒绝"
+    except (TypeError, ValueError, KeyError) as error:
+        return False, None, f"参数错误: {error!r}"
+    except Exception as error:     # 处理函数中的任何异常都只让这一条命令失败
+        return False, None, f"执行失败: {error!r}"
+    return True, value, buffer.getvalue().strip() if capture else ""
+
+
+# --- 整车 ---
+
+@command("toggle_engine")
+def _toggle_engine(car):
+    car.toggle_engine()
+    return car.engine_on
+
+
+@command("set_driving_mode")
+def _set_driving_mode(car, mode_index):
+    _accepted(car.set_driving_mode(int(mode_index)))
+    return car.current_driving_mode
+
+
+@command("status")
+def _status(car):
+    # 导航尚未加载时不可能有路线，不为查询状态而加载地图
+    navigation = car.loaded("navigation")
+    return {
+        "engine_on": car.engine_on,
+        "speed": car.speed,
+        "driving_mode": car.current_driving_mode,
+        "battery": {"capacity": car.battery.capacity, "mode_index": car.battery.mode_index,
+                    "is_charging": car.battery.is_charging},
+        "ac": {"is_on": car.ac.is_on, "mode": car.ac.mode, "preset_temp": car.ac.preset_temp,
+               "current_temp": round(car.ac.current_temp, 1)},
+        "light": {"headlights_on": car.light.headlights_on,
+                  "fog_lights_on": car.light.fog_lights_on,
+                  "interior_light_level": car.light.interior_light_level},
+        "door_window": {"doors_locked": car.door_window.doors_locked,
+                        "windows_status": dict(car.door_window.windows_status)},
+        "navigation": {"route": navigation.route if navigation else None,
+                       "progress": navigation.progress if navigation else 0.0},
+    }
+
+
+# --- 空调 ---
+
+@command("ac.turn_on")
+def _ac_turn_on(car):
+    car.ac.turn_on()
+    return car.ac.is_on
+
+
+@command("ac.turn_off")
+def _ac_turn_off(car):
+    car.ac.turn_off()
+    return car.ac.is_on
+
+
+@command("ac.set_temperature")
+def _ac_set_temperature(car, temp):
+    _accepted(car.ac.set_temperature(temp))
+    return car.ac.preset_temp
+
+
+@command("ac.set_humidity")
+def _ac_set_humidity(car, humidity):
+    _accepted(car.ac.set_humidity(humidity))
+    return car.ac.preset_humidity
+
+
+@command("ac.set_mode")
+def _ac_set_mode(car, mode):
+    _accepted(car.ac.set_mode(mode))
+    return car.ac.mode
+
+
+# --- 灯光 ---
+
+@command("light.toggle_headlights")
+def _toggle_headlights(car):
+    car.light.toggle_headlights()
+    return car.light.headlights_on
+
+
+@command("light.toggle_fog_lights")
+def _toggle_fog_lights(car):
+    car.light.toggle_fog_lights()
+    return car.light.fog_lights_on
+
+
+@command("light.set_interior_light_level")
+def _set_interior_light_level(car, level):
+    _accepted(car.light.set_interior_light_level(level))
+    return car.light.interior_light_level
+
+
+# --- 门窗 ---
+
+@command("door_window.toggle_door_locks")
+def _toggle_door_locks(car):
+    car.door_window.toggle_door_locks()
+    return car.door_window.doors_locked
+
+
+@command("door_window.set_window_level")
+def _set_window_level(car, position, level):
+    _accepted(car.door_window.set_window_level(position, level))
+    return car.door_window.windows_status.get(position)
+
+
+@command("door_window.close_all_windows")
+def _close_all_windows(car):
+    car.door_window.close_all_windows()
+    return dict(car.door_window.windows_status)
+
+
+# --- 电池 ---
+
+@command("battery.set_mode")
+def _battery_set_mode(car, mode_index):
+    _accepted(car.battery.set_mode(mode_index))
+    return car.battery.mode_index
+
+
+@command("battery.toggle_charging")
+def _toggle_charging(car):
+    car.battery.toggle_charging()
+    return car.battery.is_charging
+
+
+# --- 导航 ---
+
+@command("navigation.set_points")
+def _set_points(car, start, end):
+    _accepted(car.navigation.set_points(start, end))
+    return True
+
+
+@command("navigation.plan_route")
+def _plan_route(car, start=None, end=None):
+    """可以直接带起点终点，省去单独一条 set_points 命令；返回 [路线, 距离]。"""
+    navigation = car.navigation
+    if start is not None:
+        _accepted(navigation.set_points(start, end))
+    _accepted(navigation.plan_route())
+    return [navigation.route, navigation.total_distance]
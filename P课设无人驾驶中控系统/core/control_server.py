@@ -0,0 +1,355 @@
+# core/control_server.py
+"""
+本机车辆控制服务：其它进程通过本地 TCP 端口（或 Unix 套接字）发送命令控制车辆。
+
+协议：
+  - 每条消息 = 4字节大端长度 + core.packing 编码的消息体；
+  - 连接建立后服务端先发送一条问候消息 {"version": 1, "commands": [命令名...]}，
+    客户端此后可以用命令在列表中的编号代替命令名，减少消息字节数；
+  - 请求消息体是一批命令 [[车辆编号, 命令名或编号, [参数...]], ...]，
+    响应是同样顺序的 [[是否成功, 结果, 提示信息], ...]；
+  - 连接保持复用，客户端可以不等响应连续发送多批命令（流水线），响应按请求顺序返回。
+"""
+
+import asyncio
+import struct
+import time
+
+from core.commands import COMMAND_NAMES, execute
+from core.packing import pack, unpack
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 8765
+_HEADER = struct.Struct('>I')
+
+
+def frame(obj):
+    """编码一条带长度头的消息。"""
+    body = pack(obj)
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    """读取一条完整消息并解码；连接正常关闭时返回 None。"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > ControlServer.MAX_FRAME:
+        raise ValueError(f"消息过大: {length} 字节")
+    return unpack(await reader.readexactly(length))
+
+
+class ControlServer:
+    """
+    基于 asyncio 的控制服务，所有连接共用一个事件循环和同一组车辆。
+    vehicles 为车辆列表（编号即下标），可以是 Vehicle 或车队视图 FleetVehicle。
+    命令在事件循环中逐批同步执行，每批结果一次写回，写缓冲积压超过
+    HIGH_WATER 时才等待网络发送，流水线请求不会逐条阻塞。
+    """
+
+    MAX_FRAME = 16 * 1024 * 1024    # 单条消息的最大字节数
+    HIGH_WATER = 256 * 1024         # 写缓冲积压到此字节数时等待客户端接收
+    IDLE_TIMEOUT = 300              # 空闲连接的保持时间 (s)
+
+    def __init__(self, vehicles, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        self.vehicles = vehicles
+        self.host = host
+        self.port = port
+        self.path = path                # 给出时监听 Unix 套接字而不是 TCP 端口
+        self.connections = 0
+        self.commands_served = 0
+        self._server = None
+
+    async def start(self):
+        if self.path:
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]   # port=0 时取实际端口
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def execute_batch(self, batch):
+        """执行一批命令，返回结果列表；格式错误的命令单独返回失败结果。"""
+        results = []
+        vehicles = self.vehicles
+        for item in batch:
+            try:
+                vehicle_id, name, args = item
+            except (TypeError, ValueError):
+                results.append([False, None, "命令格式应为 [车辆编号, 命令, [参数...]]"])
+                continue
+            if not isinstance(vehicle_id, int) or isinstance(vehicle_id, bool) \
+                    or not 0 <= vehicle_id < len(vehicles):
+                results.append([False, None, f"车辆编号 {vehicle_id!r} 不存在"])
+                continue
+            vehicle = vehicles[vehicle_id]
+            results.append(list(execute(vehicle, name, args)))
+        self.commands_served += len(results)
+        return results
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(frame({"version": PROTOCOL_VERSION, "commands": COMMAND_NAMES}))
+        try:
+            while True:
+                try:
+                    batch = await asyncio.wait_for(read_frame(reader), self.IDLE_TIMEOUT)
+                except ValueError as error:
+                    writer.write(frame([[False, None, f"消息无法解码: {error}"]]))
+                    break
+                if batch is None:
+                    break
+                if not isinstance(batch, list):
+                    batch = [batch]
+                try:
+                    results = self.execute_batch(batch)
+                except Exception as error:
+                    # 每批命令必须恰好回一帧，否则流水线中后续批次的结果会错位
+                    results = [[False, None, f"批处理执行失败: {error!r}"]]
+                writer.write(frame(results))
+                if writer.transport.get_write_buffer_size() > self.HIGH_WATER:
+                    await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+class ControlClient:
+    """
+    控制服务的客户端。send 立即写出一批命令并返回等待结果的 future，
+    可以连续调用实现流水线；call / batch 是等待结果的便捷写法。
+    命令可以用名字给出，发送时自动换成编号。
+    """
+
+    def __init__(self):
+        self.commands = []
+        self._ids = {}
+        self._reader = None
+        self._writer = None
+        self._pending = []          # 按发送顺序排列的 future
+        self._head = 0
+        self._receiver = None
+
+    async def connect(self, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        if path:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        greeting = await read_frame(self._reader)
+        if greeting.get("version") != PROTOCOL_VERSION:
+            raise ConnectionError(f"协议版本不匹配: {greeting.get('version')}")
+        self.commands = greeting["commands"]
+        self._ids = {name: i for i, name in enumerate(self.commands)}
+        self._receiver = asyncio.get_running_loop().create_task(self._receive())
+        return self
+
+    async def _receive(self):
+        try:
+            while True:
+                results = await read_frame(self._reader)
+                if results is None:
+                    break
+                future = self._pending[self._head]
+                self._pending[self._head] = None
+                self._head += 1
+                if self._head > 1024 and self._head * 2 > len(self._pending):
+                    del self._pending[:self._head]
+                    self._head = 0
+                if not future.cancelled():
+                    future.set_result(results)
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            for future in self._pending[self._head:]:
+                if future is not None and not future.done():
+                    future.set_exception(ConnectionError(f"连接已断开: {error}"))
+        else:
+            for future in self._pending[self._head:]:
+                if future is not None and not future.done():
+                    future.set_exception(ConnectionError("连接已关闭"))
+
+    def encode(self, vehicle_id, name, args=()):
+        return [vehicle_id, self._ids.get(name, name), list(args)]
+
+    def send(self, commands):
+        """写出一批已编码的命令，返回结果 future。"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(frame(commands))
+        return future
+
+    async def batch(self, commands):
+        """commands 为 [(车辆编号, 命令名, 参数序列), ...]，返回结果列表。"""
+        future = self.send([self.encode(*command) for command in commands])
+        if self._writer.transport.get_write_buffer_size() > ControlServer.HIGH_WATER:
+            await self._writer.drain()
+        return await future
+
+    async def call(self, vehicle_id, name, *args):
+        """发送单条命令，返回 (是否成功, 结果, 提示信息)。"""
+        (result,) = await self.batch([(vehicle_id, name, args)])
+        return tuple(result)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self._receiver is not None:
+            await asyncio.gather(self._receiver, return_exceptions=True)
+
+
+# --- 压测客户端 ---
+
+def _workload(client, vehicles, size, seed):
+    """生成一批混合命令：开关类、设定类和状态查询。"""
+    import random
+    rng = random.Random(seed)
+    choices = [
+        lambda v: client.encode(v, "ac.set_temperature", [rng.randint(16, 30)]),
+        lambda v: client.encode(v, "light.toggle_headlights"),
+        lambda v: client.encode(v, "door_window.set_window_level",
+                                ["front_left", rng.randint(0, 100)]),
+        lambda v: client.encode(v, "light.set_interior_light_level", [rng.randint(0, 5)]),
+        lambda v: client.encode(v, "toggle_engine"),
+        lambda v: client.encode(v, "battery.set_mode", [rng.randint(1, 2)]),
+    ]
+    return [rng.choice(choices)(rng.randrange(vehicles)) for _ in range(size)]
+
+
+async def load_test(host='127.0.0.1', port=DEFAULT_PORT, path=None, vehicles=1,
+                    connections=4, batch_size=100, depth=8, total=200000):
+    """
+    负载生成：connections 个连接各自保持 depth 批命令在途（流水线），
+    每批 batch_size 条，共发送 total 条命令，返回吞吐量和批次延迟统计。
+    """
+    per_connection = total // connections
+    latencies = []
+
+    async def worker(index):
+        client = await ControlClient().connect(host, port, path)
+        # 预先生成几批不同的命令循环使用，压测只衡量服务端和协议本身
+        batches = [_workload(client, vehicles, batch_size, index * 100 + i) for i in range(8)]
+        sent = 0
+        in_flight = asyncio.Semaphore(depth)
+        futures = []
+
+        def done(future, started):
+            latencies.append(time.perf_counter() - started)
+            in_flight.release()
+
+        while sent < per_connection:
+            await in_flight.acquire()
+            commands = batches[len(futures) % len(batches)][:per_connection - sent]
+            future = client.send(commands)
+            started = time.perf_counter()
+            future.add_done_callback(lambda f, s=started: done(f, s))
+            futures.append(future)
+            sent += len(commands)
+        results = await asyncio.gather(*futures)
+        await client.close()
+        return sum(1 for batch in results for ok, _, _ in batch if ok)
+
+    start = time.perf_counter()
+    succeeded = sum(await asyncio.gather(*(worker(i) for i in range(connections))))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "commands": per_connection * connections,
+        "succeeded": succeeded,
+        "seconds": round(elapsed, 3),
+        "commands_per_second": round(per_connection * connections / elapsed),
+        "batch_latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 2),
+        "batch_latency_ms_p99": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def _build_vehicles(fleet_size):
+    """fleet_size>0 时使用车队视图（状态在内存数组中），否则使用一辆完整的 Vehicle。"""
+    from core.runtime import VehicleRuntime
+    runtime = VehicleRuntime()
+    if fleet_size:
+        from core.fleet import Fleet
+        fleet = Fleet(fleet_size)
+        runtime.simulation.register(fleet)
+        return runtime, [fleet[i] for i in range(fleet_size)]
+    from core.vehicle import Vehicle
+    car = Vehicle()
+    car.attach(runtime.simulation)
+    return runtime, [car]
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, path=None, fleet_size=0, ready=None):
+    """启动控制服务并随仿真时钟推进车辆（充电、空调、行驶）。"""
+    runtime, vehicles = _build_vehicles(fleet_size)
+    server = ControlServer(vehicles, host, port, path)
+    await server.start()
+    runtime.start()
+    where = path or f"{host}:{server.port}"
+    print(f"控制服务已启动: {where}, 车辆数 {len(vehicles)}")
+    if ready is not None:
+        ready.set()
+    try:
+        await server.serve_forever()
+    finally:
+        await runtime.stop()
+
+
+def _serve_process(port, fleet_size, ready):
+    asyncio.run(serve(port=port, fleet_size=fleet_size, ready=ready))
+
+
+if __name__ == '__main__':
+    import argparse
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description="本机车辆控制服务")
+    parser.add_argument("action", choices=["serve", "bench"], nargs="?", default="bench")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--path", help="Unix 套接字路径（代替 TCP 端口）")
+    parser.add_argument("--fleet", type=int, default=0, help="以车队视图提供多少辆车")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--total", type=int, default=200000)
+    parser.add_argument("--spawn", action="store_true", help="压测前在子进程中启动服务")
+    options = parser.parse_args()
+
+    if options.action == "serve":
+        asyncio.run(serve(port=options.port, path=options.path, fleet_size=options.fleet))
+    else:
+        server_process = None
+        if options.spawn:
+            ready = multiprocessing.Event()
+            server_process = multiprocessing.Process(
+                target=_serve_process, args=(options.port, options.fleet or 100, ready), daemon=True)
+            server_process.start()
+            ready.wait(30)
+        try:
+            report = asyncio.run(load_test(port=options.port, path=options.path,
+                                           vehicles=options.fleet or (100 if options.spawn else 1),
+                                           connections=options.connections,
+                                           batch_size=options.batch, depth=options.depth,
+                                           total=options.total))
+            print(report)
+        finally:
+            if server_process is not None:
+                server_process.terminate()
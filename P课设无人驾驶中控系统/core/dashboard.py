@@ -0,0 +1,198 @@
+# core/dashboard.py
+
+import contextlib
+import io
+import shutil
+import sys
+import threading
+import time
+import unicodedata
+
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+SAVE_CURSOR = "\x1b7"
+RESTORE_CURSOR = "\x1b8"
+CLEAR_LINE_END = "\x1b[K"
+
+
+def display_width(text):
+    """终端中的显示宽度：中文等全角字符占两列。"""
+    width = 0
+    for char in text:
+        width += 2 if unicodedata.east_asian_width(char) in "WF" else 1
+    return width
+
+
+class DashboardRenderer:
+    """
+    差量终端渲染器。一帧是一个行列表，首帧（或 invalidate 之后）清屏整体输出，
+    之后只用ANSI光标控制重写内容发生变化的行，整帧拼成一个字符串一次写出。
+    render 按 fps 节流，两次调用间隔不足一帧时直接跳过，不产生任何输出。
+
+    差量更新以帧的最后一行（通常是输入提示）末尾为光标基准：保存光标，
+    按物理行数（考虑全角字符和自动折行）上移到目标行重写，再恢复光标，
+    因此用户正在输入的内容不受影响。已滚出屏幕顶端的行不重绘。
+    输出不是终端时退化为普通的整帧打印。
+    """
+
+    def __init__(self, stream=None, fps=10):
+        self.stream = stream or sys.stdout
+        self.interval = 1.0 / fps if fps else 0.0
+        self.ansi = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.frames = 0             # 实际产生输出的帧数
+        self.lines_written = 0      # 累计重写的行数
+        self._previous = None
+        self._last = 0.0
+
+    def invalidate(self):
+        """屏幕内容已被其它输出打乱，下一帧整体重绘。"""
+        self._previous = None
+
+    def _rows(self, lines, columns):
+        """每行在终端中占用的物理行数。"""
+        return [max(1, -(-display_width(line) // columns)) for line in lines]
+
+    def render(self, lines, force=False):
+        """输出一帧；被节流跳过或没有任何变化时返回 False。"""
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return False
+        self._last = now
+        previous = self._previous
+        if previous == lines:
+            return False
+
+        if not self.ansi:
+            self.stream.write("\n".join(lines) + "\n")
+            self._previous = list(lines)
+            self.lines_written += len(lines)
+        else:
+            size = shutil.get_terminal_size()
+            rows = self._rows(lines, size.columns)
+            if previous is None or len(previous) != len(lines) \
+                    or rows != self._rows(previous, size.columns):
+                # 首帧或布局变化：清屏重绘，光标停在最后一行末尾
+                self.stream.write(CLEAR_SCREEN + "\n".join(lines))
+                self._previous = list(lines)
+                self.lines_written += len(lines)
+            else:
+                out = [SAVE_CURSOR]
+                current = list(previous)
+                # below[i]: 第 i 行首到最后一行首之间的物理行数
+                below = 0
+                for row in range(len(lines) - 1, -1, -1):
+                    if row < len(lines) - 1:
+                        below += rows[row]
+                    if lines[row] == previous[row] or below >= size.lines:
+                        continue
+                    out.append(RESTORE_CURSOR + "\r")
+                    if below:
+                        out.append(f"\x1b[{below}A")
+                    out.append(lines[row] + CLEAR_LINE_END)
+                    current[row] = lines[row]
+                    self.lines_written += 1
+                self._previous = current
+                if len(out) == 1:
+                    return False    # 变化的行都在屏幕之外
+                out.append(RESTORE_CURSOR)
+                self.stream.write("".join(out))
+        self.stream.flush()
+        self.frames += 1
+        return True
+
+
+class LiveDashboard:
+    """
+    后台刷新线程：等待用户输入期间按固定帧率推进仿真并差量重绘仪表盘。
+    与主线程共用 lock，主线程执行命令时调用 pause，不会与命令输出交错。
+    推进仿真时子系统打印的提示（如"充电完成"）不直接输出以免打乱画面，
+    最后一条保存在 notice 中，由 frame 决定是否显示。
+    给出车辆的事件总线 events 时，只有收到状态变化事件后才重新生成帧。
+    """
+
+    def __init__(self, frame, renderer, lock, on_tick=None, fps=5, events=None):
+        self.frame = frame              # 返回当前帧行列表的函数
+        self.renderer = renderer
+        self.lock = lock
+        self.on_tick = on_tick          # 每帧重绘前调用，如推进仿真时钟
+        self.interval = 1.0 / fps
+        self.notice = ""
+        self._active = False
+        self._dirty = True
+        if events is not None:
+            events.subscribe(self._mark_dirty)
+        self._events = events
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-dashboard", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _mark_dirty(self, events):
+        self._dirty = True
+
+    def resume(self):
+        self._active = True
+        self._dirty = True
+
+    def pause(self):
+        with self.lock:
+            self._active = False
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                if not self._active:
+                    continue
+                if self.on_tick is not None:
+                    output = io.StringIO()
+                    with contextlib.redirect_stdout(output):
+                        self.on_tick()
+                    messages = output.getvalue().split("\n")
+                    notice = next((m.strip() for m in reversed(messages) if m.strip()), None)
+                    if notice is not None:
+                        self.notice = notice
+                        self._dirty = True
+                if self._events is not None and not self._dirty:
+                    continue
+                self._dirty = False
+                # 本线程自己按 fps 定时，不再经过渲染器的节流
+                self.renderer.render(self.frame(), force=True)
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    print("--- 开始仪表盘渲染器单元测试 ---")
+    from core.vehicle import Vehicle
+    from core.simulation import Simulation
+
+    car = Vehicle()
+    simulation = Simulation(step=0.1)
+    car.attach(simulation)
+    car.battery.capacity = 20
+    car.battery.toggle_charging()
+
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+    terminal = Terminal()
+    renderer = DashboardRenderer(terminal, fps=0)
+    renderer.render(car.dashboard_lines())
+    first = terminal.tell()
+    for _ in range(10):
+        simulation.run(duration=60.0)       # 每帧推进1分钟，CC段约充1.3%
+        renderer.render(car.dashboard_lines())
+    updates = terminal.tell() - first
+    print(f"\n  首帧 {first} 字符，随后10帧共 {updates} 字符，重写 "
+          f"{renderer.lines_written - len(car.dashboard_lines())} 行")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        renderer.render(car.dashboard_lines())
+    print(f"  无变化时每帧耗时 {(time.perf_counter() - start):.3f} 毫秒")
+    print("--- 仪表盘渲染器单元测试结束 ---")
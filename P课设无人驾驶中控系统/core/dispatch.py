@@ -0,0 +1,384 @@
+# core/dispatch.py
+
+import heapq
+from array import array
+from collections import namedtuple
+
+from core.graph import as_distance, INF
+
+# 一条派单结果：request/vehicle 为传入列表中的下标，没有可派车辆时 vehicle 为 None
+Assignment = namedtuple('Assignment', ['request', 'vehicle', 'distance'])
+
+
+def multi_source_dijkstra(g, sources, targets=None, stats=None):
+    """
+    多源Dijkstra：所有源点同时以距离0入堆，一次搜索求出每个节点到最近源点的距离。
+    返回 (dist, owner) 两个扁平数组，owner[v] 为离 v 最近的源在 sources 中的下标 (-1 表示不可达)。
+    给出 targets 时，这些节点全部出堆后提前结束。
+    """
+    n = len(g)
+    dist = array('d', [INF]) * n
+    owner = array('q', [-1]) * n
+    heap = []
+    for i, node in enumerate(sources):
+        if dist[node] > 0.0:
+            dist[node] = 0.0
+            owner[node] = i
+            heap.append((0.0, node))
+    heapq.heapify(heap)
+    remaining = len(set(targets)) if targets is not None else -1
+    wanted = set(targets) if targets is not None else ()
+    offsets, tgt, weights = g.offsets, g.targets, g.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    expanded = 0
+
+    while heap and remaining:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        expanded += 1
+        if u in wanted:
+            remaining -= 1
+        label = owner[u]
+        for e in range(offsets[u], offsets[u + 1]):
+            v = tgt[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                owner[v] = label
+                heappush(heap, (nd, v))
+    if stats is not None:
+        stats['expanded'] = expanded
+    return dist, owner
+
+
+def k_nearest_sources(rg, sources, targets, k, stats=None):
+    """
+    为每个目标节点找出最近的 k 个源：在反向图 rg 上从目标出发做有界Dijkstra，
+    凑满 k 个源即停止。源分布越密，每次搜索越局部，总代价约为
+    目标数 x k x (节点数/源数)，与地图总规模无关。k 不超过源的个数。
+    返回 {目标节点: [(源下标, 距离), ...]}，按距离从近到远排列。
+    """
+    k = min(k, len(sources))
+    at = {}                                         # 节点 -> 位于该节点的源下标
+    for i, node in enumerate(sources):
+        at.setdefault(node, []).append(i)
+    offsets, tgt, weights = rg.offsets, rg.targets, rg.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    found = {}
+    expanded = 0
+
+    for target in targets:
+        if target in found:
+            continue
+        nearest = []
+        dist = {target: 0.0}
+        heap = [(0.0, target)]
+        while heap and len(nearest) < k:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            expanded += 1
+            for s in at.get(u, ()):
+                nearest.append((s, d))
+            for e in range(offsets[u], offsets[u + 1]):
+                v = tgt[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        found[target] = nearest[:k]
+    if stats is not None:
+        stats['expanded'] = expanded
+    return found
+
+
+def k_nearest_from_sources(g, sources, targets, k, stats=None):
+    """
+    与 k_nearest_sources 结果相同，但从每个源所在节点出发在正向图 g 上搜索，
+    适合源很少而目标很多的情况（此时从目标出发的每次搜索都要扫过大半张地图）。
+    每个目标保留目前最近的 k 个源；一次搜索的距离超过所有尚未到达的目标
+    当前第 k 近的距离后，它不可能再改变结果，即停止。
+    """
+    k = min(k, len(sources))
+    at = {}
+    for i, node in enumerate(sources):
+        at.setdefault(node, []).append(i)
+    best = {t: [] for t in targets}                 # 目标 -> 最大堆 [(-距离, -源下标)]
+    offsets, tgt, weights = g.offsets, g.targets, g.weights
+    heappush, heappop, heappushpop = heapq.heappush, heapq.heappop, heapq.heappushpop
+    expanded = 0
+
+    for node, members in at.items() if k else ():
+        # 按当前第 k 近的距离从小到大排列目标，搜索距离超过的目标依次退出
+        bounds = sorted((-kept[0][0] if len(kept) == k else INF, t) for t, kept in best.items())
+        waiting, first = set(best), 0                # 尚未到达、仍可能被改进的目标
+        dist = {node: 0.0}
+        heap = [(0.0, node)]
+        while heap and waiting:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            while first < len(bounds) and bounds[first][0] < d:
+                waiting.discard(bounds[first][1])
+                first += 1
+            if not waiting:
+                break
+            expanded += 1
+            if u in waiting:
+                waiting.remove(u)
+                kept = best[u]
+                for s in members:
+                    if len(kept) < k:
+                        heappush(kept, (-d, -s))
+                    elif (-d, -s) > kept[0]:
+                        heappushpop(kept, (-d, -s))
+            for e in range(offsets[u], offsets[u + 1]):
+                v = tgt[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+    if stats is not None:
+        stats['expanded'] = expanded
+    return {t: [(-s, -d) for d, s in sorted(kept, reverse=True)] for t, kept in best.items()}
+
+
+def min_cost_assignment(candidates, columns):
+    """
+    稀疏二部图最小费用匹配（最短增广路 + 列势，Jonker-Volgenant 思路）。
+    candidates[i] 为第 i 行可选的 [(列, 费用)]，列编号在 0..columns-1。
+    每行另有一个只属于自己、费用极大的"不匹配"列，因此结果先保证匹配的行数最多，
+    再使总费用最小。逐行用Dijkstra在约化费用上寻找到空闲列的最短增广路；
+    候选之间没有冲突时每行只出堆一次。返回每行匹配到的列，无法匹配的行为 -1。
+    """
+    rows = len(candidates)
+    # "不匹配"的代价大于任何一组真实匹配的总费用
+    unmatched = 1.0 + sum(max((cost for _, cost in options), default=0.0)
+                          for options in candidates)
+    price = [0.0] * (columns + rows)
+    col_row = [-1] * (columns + rows)
+    row_col = [-1] * rows
+    row_cost = [0.0] * rows
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    for row in range(rows):
+        dist, pred, via, heap = {}, {}, {}, []
+        scanned = {}
+        col, owner, base = -1, row, 0.0
+        while True:
+            # 从 owner 行（新加入的行或占用刚出堆列的行）扩展它的全部候选列
+            for nxt, cost in candidates[owner] + [(columns + owner, unmatched)]:
+                if nxt in scanned:
+                    continue
+                nd = base + cost - price[nxt]
+                if nd < dist.get(nxt, INF):
+                    dist[nxt], pred[nxt], via[nxt] = nd, owner, cost
+                    heappush(heap, (nd, nxt))
+            while True:
+                d, col = heappop(heap)
+                if col not in scanned and d <= dist[col]:
+                    break
+            scanned[col] = d
+            owner = col_row[col]
+            if owner < 0:
+                break
+            # 约化费用相对 owner 行当前的匹配计算
+            base = d - (row_cost[owner] - price[col])
+        total = scanned[col]
+        for c, d in scanned.items():
+            price[c] += d - total
+        while True:
+            owner = pred[col]
+            previous = row_col[owner]
+            col_row[col], row_col[owner], row_cost[owner] = owner, col, via[col]
+            if owner == row:
+                break
+            col = previous
+    return [col if col < columns else -1 for col in row_col]
+
+
+class Dispatcher:
+    """
+    派单：把乘车请求分配给导航地图上离上车点最近的空闲车辆，不再逐对规划路线。
+    nearest 用一次多源Dijkstra同时求出所有请求的最近车辆；assign 从各请求点在
+    反向图上做局部搜索得到最近的若干辆车（车辆很少时改为从各车辆出发搜索），
+    再在稀疏距离矩阵上做最小费用匹配。
+    """
+
+    CANDIDATES = 8          # 批量匹配时每个请求考虑的最近车辆数
+
+    def __init__(self, graph):
+        """graph 为 CompiledGraph 或 Navigation（使用其编译后的地图）。"""
+        self.graph = getattr(graph, 'compiled', graph)
+        self._navigation = graph if graph is not self.graph else None
+        self._reverse = None
+        self.last_expanded = 0
+
+    def reverse_graph(self):
+        """反向图，首次批量派单时构建（给出 Navigation 时复用它的反向图）。"""
+        if self._reverse is None:
+            if self._navigation is not None:
+                self._reverse = self._navigation.reverse_graph()
+            else:
+                self._reverse = self.graph.reverse()
+        return self._reverse
+
+    def node(self, location):
+        """地点名或节点编号 -> 节点编号；地图上不存在时抛出 ValueError。"""
+        if isinstance(location, str):
+            if location not in self.graph.index:
+                raise ValueError(f"地图上没有地点 '{location}'")
+            return self.graph.index[location]
+        node = int(location)
+        if not 0 <= node < len(self.graph):
+            raise ValueError(f"节点编号 {location} 超出地图范围 0..{len(self.graph) - 1}")
+        return node
+
+    def nearest(self, vehicles, requests):
+        """
+        每个请求各自的最近车辆（不同请求可能得到同一辆车）。
+        vehicles/requests 为地点名或节点编号列表。
+        """
+        sources = [self.node(v) for v in vehicles]
+        pickups = [self.node(r) for r in requests]
+        stats = {}
+        dist, owner = multi_source_dijkstra(self.graph, sources, pickups, stats)
+        self.last_expanded = stats['expanded']
+        return [Assignment(i, owner[p] if owner[p] >= 0 else None,
+                           as_distance(dist[p]) if dist[p] < INF else None)
+                for i, p in enumerate(pickups)]
+
+    def assign(self, vehicles, requests, k=None, method="optimal"):
+        """
+        批量派单，每辆车至多接一个请求。先为每个请求找出最近的 k 辆车，
+        再在这个稀疏的距离矩阵上求总接驾距离最小的匹配 (method="optimal")，
+        或按距离从近到远贪心分配 (method="greedy")。k 越大越接近全局最优。
+        """
+        if method not in ("optimal", "greedy"):
+            raise ValueError(f"无效的派单方法 '{method}'")
+        sources = [self.node(v) for v in vehicles]
+        pickups = [self.node(r) for r in requests]
+        k = min(k or self.CANDIDATES, len(sources))
+        stats = {}
+        # 从请求点出发共扫过约 请求数 x k/车辆数 张地图，从车辆出发约 车辆数 张，取代价小的方向
+        if len(set(sources)) ** 2 < len(set(pickups)) * k:
+            found = k_nearest_from_sources(self.graph, sources, pickups, k, stats)
+        else:
+            found = k_nearest_sources(self.reverse_graph(), sources, pickups, k, stats)
+        self.last_expanded = stats['expanded']
+        candidates = [found[p] for p in pickups]
+
+        if method == "optimal":
+            chosen = min_cost_assignment(candidates, len(sources))
+        else:
+            chosen = [-1] * len(pickups)
+            taken = set()
+            pairs = sorted((d, i, v) for i, options in enumerate(candidates) for v, d in options)
+            for d, i, v in pairs:
+                if chosen[i] < 0 and v not in taken:
+                    chosen[i] = v
+                    taken.add(v)
+
+        results = []
+        for i, v in enumerate(chosen):
+            if v < 0:
+                results.append(Assignment(i, None, None))
+            else:
+                distance = next(d for s, d in candidates[i] if s == v)
+                results.append(Assignment(i, v, as_distance(distance)))
+        return results
+
+    def assign_fleet(self, fleet, requests, k=None, method="optimal"):
+        """对车队中的空闲车辆派单，结果中的 vehicle 为车队车辆编号。"""
+        idle = fleet.idle_vehicles()
+        results = self.assign(fleet.position[idle].tolist(), requests, k, method)
+        return [a._replace(vehicle=int(idle[a.vehicle])) if a.vehicle is not None else a
+                for a in results]
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import itertools
+    import random
+    import time
+    from benchmarks.map_gen import grid
+    from core.fleet import Fleet
+    from core.graph import dijkstra
+
+    print("--- 开始派单模块单元测试 ---")
+    rng = random.Random(0)
+
+    print("\n>>> 校验: 随机小规模实例与穷举最优解对比")
+    for trial in range(200):
+        rows, cols = rng.randint(1, 5), rng.randint(1, 6)
+        candidates = [[(c, rng.randint(1, 50)) for c in rng.sample(range(cols), rng.randint(0, cols))]
+                      for _ in range(rows)]
+        chosen = min_cost_assignment(candidates, cols)
+        cost = {(r, c): w for r, options in enumerate(candidates) for c, w in options}
+        best = (0, 0)
+        for perm in itertools.permutations(list(range(cols)) + [-1] * rows, rows):
+            if all(c < 0 or (r, c) in cost for r, c in enumerate(perm)):
+                matched = [(r, c) for r, c in enumerate(perm) if c >= 0]
+                score = (-len(matched), sum(cost[m] for m in matched))
+                best = min(best, score)
+        got = [(r, c) for r, c in enumerate(chosen) if c >= 0]
+        assert len(set(c for _, c in got)) == len(got)
+        assert (-len(got), sum(cost[m] for m in got)) == best, (candidates, chosen, best)
+    print("  200 个随机实例全部与穷举结果一致")
+
+    g = grid(100000)        # 约10万个路口的双向网格
+    dispatcher = Dispatcher(g)
+    dispatcher.reverse_graph()
+    vehicles = [rng.randrange(len(g)) for _ in range(5000)]
+    requests = [rng.randrange(len(g)) for _ in range(2000)]
+    print(f"\n>>> 地图 {len(g)} 个节点 {g.edge_count} 条边，{len(vehicles)} 辆空闲车，"
+          f"{len(requests)} 个请求")
+
+    start = time.perf_counter()
+    nearest = dispatcher.nearest(vehicles, requests)
+    elapsed = time.perf_counter() - start
+    print(f"  最近车辆: {elapsed * 1000:.0f} ms ({len(requests) / elapsed:.0f} 请求/秒)，"
+          f"扩展 {dispatcher.last_expanded} 个节点")
+    # 抽查: 与从请求点出发的反向Dijkstra结果一致
+    rg = dispatcher.reverse_graph()
+    for a in nearest[:5]:
+        back, _ = dijkstra(rg, requests[a.request])
+        assert as_distance(min(back[v] for v in vehicles)) == a.distance
+
+    for method in ("greedy", "optimal"):
+        start = time.perf_counter()
+        result = dispatcher.assign(vehicles, requests, method=method)
+        elapsed = time.perf_counter() - start
+        matched = [a for a in result if a.vehicle is not None]
+        print(f"  批量派单({method}): {elapsed * 1000:.0f} ms ({len(requests) / elapsed:.0f} 请求/秒)，"
+              f"派出 {len(matched)} 辆，总接驾距离 {sum(a.distance for a in matched)} 米")
+
+    print("\n>>> 车辆很少时: 200 个请求")
+    for count in (50, 5):
+        few = vehicles[:count]
+        start = time.perf_counter()
+        result = dispatcher.assign(few, requests[:200])
+        elapsed = time.perf_counter() - start
+        print(f"  {count} 辆车: {elapsed * 1000:.0f} ms ({200 / elapsed:.0f} 请求/秒)，"
+              f"扩展 {dispatcher.last_expanded} 个节点，"
+              f"派出 {sum(a.vehicle is not None for a in result)} 辆")
+        # 两种搜索方向得到的候选距离一致
+        forward = k_nearest_from_sources(g, few, requests[:20], 3)
+        backward = k_nearest_sources(rg, few, requests[:20], 3)
+        assert all([d for _, d in forward[t]] == [d for _, d in backward[t]] for t in forward)
+
+    for bad in (-1, len(g), "不存在的地点"):
+        try:
+            dispatcher.assign([bad], requests[:1])
+        except ValueError as error:
+            print(f"  无效车辆位置 {bad!r}: {error}")
+
+    print("\n>>> 车队派单: 1万辆车随机分布，一半在行驶中")
+    fleet = Fleet(10000)
+    fleet.position[:] = [rng.randrange(len(g)) for _ in range(fleet.size)]
+    fleet.engine_on[::2] = True
+    result = dispatcher.assign_fleet(fleet, requests[:10])
+    for a in result[:3]:
+        print(f"  请求 {a.request} -> 车辆 {a.vehicle}，接驾距离 {a.distance} 米")
+    print("--- 派单模块单元测试结束 ---")
@@ -0,0 +1,79 @@
+# core/events.py
+
+from collections import namedtuple
+
+# 一次状态变化：topic 为来源子系统名 ("ac", "battery", "door_window", "light",
+# "navigation", "vehicle")，changes 为 {字段: 新值}
+ChangeEvent = namedtuple('ChangeEvent', ['topic', 'changes'])
+
+TOPICS = ("vehicle", "ac", "battery", "door_window", "light", "navigation")
+
+
+class EventBus:
+    """
+    车内轻量发布/订阅总线。子系统状态变化时 publish，持久化、仪表盘、遥测等
+    消费者 subscribe 后收到 ChangeEvent 列表。
+
+    deferred=True 时（车辆接入仿真时钟后）事件先按 topic 合并暂存，
+    每个仿真 tick 结束时 flush 一次：同一 tick 内对同一子系统的多次变化
+    合并成一个事件（同一字段取最后的值），每个消费者每次 flush 至多收到一次通知。
+    deferred=False 时每次 publish 立即投递。
+    """
+
+    def __init__(self, deferred=False):
+        self.deferred = deferred
+        self.published = 0          # 累计发布的变化次数
+        self.delivered = 0          # 累计通知消费者的次数
+        self._subscribers = []      # [(回调, topic集合或 None)]
+        self._pending = {}          # topic -> 合并后的 changes
+
+    def subscribe(self, callback, topics=None):
+        """登记消费者，callback(events) 接收一批 ChangeEvent；topics 为 None 表示全部。"""
+        self._subscribers.append((callback, frozenset(topics) if topics else None))
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(cb, topics) for cb, topics in self._subscribers if cb != callback]
+
+    def publish(self, topic, changes):
+        self.published += 1
+        pending = self._pending.get(topic)
+        if pending is None:
+            self._pending[topic] = dict(changes)
+        else:
+            pending.update(changes)
+        if not self.deferred:
+            self.flush()
+
+    def flush(self):
+        """投递暂存的合并事件，返回事件数。消费者在回调中发布的事件留到下一次 flush。"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        events = [ChangeEvent(topic, changes) for topic, changes in pending.items()]
+        for callback, topics in list(self._subscribers):
+            selected = events if topics is None else [e for e in events if e.topic in topics]
+            if selected:
+                callback(selected)
+                self.delivered += 1
+        return len(events)
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    print("--- 开始事件总线单元测试 ---")
+    bus = EventBus(deferred=True)
+    received = []
+    bus.subscribe(received.append)
+    saved = []
+    bus.subscribe(lambda events: saved.extend(events), topics=["ac"])
+
+    print("\n>>> 同一 tick 内空调温度变化100次，再开一次大灯")
+    for i in range(100):
+        bus.publish("ac", {"current_temp": 30 - i * 0.05})
+    bus.publish("light", {"headlights_on": True})
+    bus.flush()
+    print(f"  发布 {bus.published} 次，通知 {bus.delivered} 次")
+    print(f"  全部消费者收到: {received}")
+    print(f"  空调消费者收到: {saved}")
+    print("--- 事件总线单元测试结束 ---")
@@ -0,0 +1,395 @@
+# core/fleet.py
+
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from core.charge_model import ChargeCurve
+from core.climate import CabinClimate
+from core.utils import load_state
+from core.vehicle import Vehicle
+from core.subsystems.air_conditioner import AirConditioner
+from core.subsystems.battery import Battery
+from core.subsystems.door_window import DoorWindow
+from core.subsystems.light import Light
+
+AC_MODES = AirConditioner.MODES
+
+
+class Fleet:
+    """
+    车队状态引擎：以"结构体数组"(struct-of-arrays) 形式保存成千上万辆车的状态，
+    每个字段是一列按车辆编号索引的NumPy数组，批量操作是一次向量化的数组运算。
+    fleet[i] 返回第 i 辆车的轻量视图，保留 Vehicle 及各子系统原有的方法接口。
+    """
+
+    WINDOW_POSITIONS = DoorWindow.WINDOW_POSITIONS
+    CLIMATE_STEP = 60.0     # 车厢气候模型的推进间隔 (s)，温湿度变化远慢于仿真步长
+
+    def __init__(self, size, template=None):
+        """
+        创建 size 辆车的车队。template 为 {子系统名: 状态} 字典，
+        缺省时使用状态存储中的当前车辆状态作为所有车辆的初始值。
+        """
+        if template is None:
+            template = {name: load_state(name) or {}
+                        for name in ("ac", "battery", "door_window", "light")}
+        ac = template.get("ac", {})
+        battery = template.get("battery", {})
+        door_window = template.get("door_window", {})
+        light = template.get("light", {})
+        windows = door_window.get("windows_status", {})
+
+        self.size = size
+        # 整车
+        self.engine_on = np.zeros(size, dtype=bool)
+        self.speed = np.zeros(size, dtype=np.float32)
+        self.driving_mode = np.zeros(size, dtype=np.int8)
+        self.region = np.zeros(size, dtype=np.int32)
+        self.position = np.full(size, -1, dtype=np.int64)   # 所在地点在导航地图中的编号，-1 表示未知
+        # 电池
+        self.capacity = np.full(size, battery.get("capacity", 80), dtype=np.int16)
+        self.battery_mode = np.full(size, battery.get("mode_index", 1), dtype=np.int8)
+        self.is_charging = np.full(size, battery.get("is_charging", False), dtype=bool)
+        self.charge_progress = np.zeros(size, dtype=np.float64)    # 不足1%的充电量累计
+        self.charge_curve = ChargeCurve()       # 仿真充电与 charge_plan 共用的CC/CV曲线
+        # 空调
+        self.ac_on = np.full(size, ac.get("is_on", False), dtype=bool)
+        self.ac_mode = np.full(size, AC_MODES.index(ac.get("mode", "auto")), dtype=np.int8)
+        self.preset_temp = np.full(size, ac.get("preset_temp", 24), dtype=np.float32)
+        self.current_temp = np.full(size, ac.get("current_temp", 22), dtype=np.float32)
+        self.preset_humidity = np.full(size, ac.get("preset_humidity", 50), dtype=np.float32)
+        self.current_humidity = np.full(size, ac.get("current_humidity", 45), dtype=np.float32)
+        # 多温区温湿度状态；current_temp/current_humidity 是其按温区平均的结果
+        self.climate = CabinClimate(size, temp=self.current_temp, humidity=self.current_humidity)
+        self._climate_elapsed = 0.0
+        # 门窗：每行是一辆车的四个车窗，列顺序同 WINDOW_POSITIONS
+        self.doors_locked = np.full(size, door_window.get("doors_locked", True), dtype=bool)
+        self.windows = np.tile(np.array([windows.get(pos, 0) for pos in self.WINDOW_POSITIONS],
+                                        dtype=np.uint8), (size, 1))
+        # 灯光
+        self.headlights_on = np.full(size, light.get("headlights_on", False), dtype=bool)
+        self.fog_lights_on = np.full(size, light.get("fog_lights_on", False), dtype=bool)
+        self.interior_light_level = np.full(size, light.get("interior_light_level", 2),
+                                            dtype=np.int8)
+
+        self.navigation = None      # 全车队共用一份地图，首次访问车辆视图的导航时加载
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, vehicle_id):
+        if not 0 <= vehicle_id < self.size:
+            raise IndexError(f"车辆编号 {vehicle_id} 超出范围 (0-{self.size - 1})")
+        return FleetVehicle(self, vehicle_id)
+
+    # --- 选择车辆 ---
+
+    def in_region(self, region):
+        """返回位于某个区域的车辆编号数组。"""
+        return np.flatnonzero(self.region == region)
+
+    def idle_vehicles(self):
+        """返回可接单的车辆编号：位置已知、引擎关闭且不在充电。"""
+        return np.flatnonzero((self.position >= 0) & ~self.engine_on & ~self.is_charging)
+
+    def _select(self, ids):
+        """ids 可以是编号序列、布尔掩码或 None（表示全部车辆）。"""
+        return slice(None) if ids is None else np.asarray(ids)
+
+    # --- 批量操作 ---
+
+    def lock_doors(self, ids=None):
+        self.doors_locked[self._select(ids)] = True
+
+    def unlock_doors(self, ids=None):
+        self.doors_locked[self._select(ids)] = False
+
+    def set_window_level(self, position, level, ids=None):
+        if position not in self.WINDOW_POSITIONS:
+            raise ValueError(f"无效的车窗位置 '{position}'")
+        if not 0 <= level <= 100:
+            raise ValueError("车窗打开程度必须在 0 到 100 之间")
+        self.windows[self._select(ids), self.WINDOW_POSITIONS.index(position)] = level
+
+    def close_all_windows(self, ids=None):
+        self.windows[self._select(ids)] = 0
+
+    def set_ac(self, on, ids=None):
+        self.ac_on[self._select(ids)] = on
+
+    def set_temperature(self, temp, ids=None):
+        """temp 可以是标量，也可以是与 ids 等长的数组。"""
+        temp = np.asarray(temp, dtype=np.float32)
+        if np.any((temp < 16) | (temp > 30)):
+            raise ValueError("温度必须在 16 到 30 之间")
+        self.preset_temp[self._select(ids)] = temp
+
+    def set_headlights(self, on, ids=None):
+        self.headlights_on[self._select(ids)] = on
+
+    def set_interior_light_level(self, level, ids=None):
+        if not 0 <= level <= Light.MAX_INTERIOR_LEVEL:
+            raise ValueError(f"无效的亮度等级 (0-{Light.MAX_INTERIOR_LEVEL})")
+        self.interior_light_level[self._select(ids)] = level
+
+    def set_battery_mode(self, mode_index, ids=None):
+        if mode_index not in Battery.MODES:
+            raise ValueError(f"无效的模式索引 {mode_index}")
+        self.battery_mode[self._select(ids)] = mode_index
+
+    def charge_targets(self):
+        """每辆车的充电目标电量：充满模式100%，养护模式80%。"""
+        return np.where(self.battery_mode == 1, 100, 80).astype(np.int16)
+
+    def charge_plan(self, temperature=25.0, curve=None):
+        """
+        按CC/CV充电曲线一次算出每辆车充到目标电量所需的 (秒数, 耗电kWh)。
+        temperature 可以是标量或每辆车的电池温度数组。
+        """
+        curve = curve or self.charge_curve
+        return curve.plan(self.capacity, self.charge_targets(), temperature)
+
+    def _climate_conditions(self):
+        return dict(on=self.ac_on, auto=self.ac_mode == AC_MODES.index("auto"),
+                    preset_temp=self.preset_temp, preset_humidity=self.preset_humidity,
+                    ambient_temp=AirConditioner.AMBIENT_TEMP,
+                    ambient_humidity=AirConditioner.AMBIENT_HUMIDITY,
+                    window_open=self.windows / 100.0)
+
+    def climate_energy(self, duration, step=60.0):
+        """按当前空调设置估计未来 duration 秒每辆车的空调耗电 (kWh)，不改变车队状态。"""
+        return self.climate.estimate_energy(duration, step, **self._climate_conditions())
+
+    def low_battery(self, threshold=20):
+        return np.flatnonzero(self.capacity < threshold)
+
+    def tick(self, dt, now=None):
+        """
+        仿真时钟推进 dt 秒：整个车队的充电（按 charge_curve）和车厢气候各是一次
+        数组运算，规则与单车的 Battery.tick / AirConditioner.tick 相同；
+        气候模型每累计 CLIMATE_STEP 秒推进一次。
+        """
+        charging = np.flatnonzero(self.is_charging)
+        if charging.size:
+            capacity = self.capacity[charging]
+            targets = self.charge_targets()[charging]
+            soc = self.charge_curve.soc_after(capacity + self.charge_progress[charging], dt)
+            # 开始充电时已高于目标的车辆电量不变，直接判定为充电完成
+            done = (capacity >= targets) | (soc >= np.minimum(targets, self.charge_curve.full_soc))
+            self.capacity[charging] = np.where(done, np.maximum(capacity, targets), np.floor(soc))
+            self.charge_progress[charging] = np.where(done, 0.0, soc - np.floor(soc))
+            self.is_charging[charging[done]] = False
+
+        self._climate_elapsed += dt
+        if self._climate_elapsed >= self.CLIMATE_STEP:
+            self.climate.step(self._climate_elapsed, **self._climate_conditions())
+            self._climate_elapsed = 0.0
+            self.current_temp[:] = self.climate.mean_temp()
+            self.current_humidity[:] = self.climate.mean_humidity()
+
+    def summary(self):
+        """车队整体统计。"""
+        return {
+            "vehicles": self.size,
+            "engines_on": int(self.engine_on.sum()),
+            "charging": int(self.is_charging.sum()),
+            "mean_capacity": float(self.capacity.mean()) if self.size else 0.0,
+            "doors_unlocked": int((~self.doors_locked).sum()),
+            "ac_on": int(self.ac_on.sum()),
+            "ac_power_kw": round(float(self.climate.power_kw.sum()), 1),
+        }
+
+
+def _number(value):
+    """整数值按整数返回，保持与单车状态文件中的写法一致。"""
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def _column(name, cast):
+    """生成把属性映射到车队数组某一格的 property。"""
+    def getter(self):
+        return cast(getattr(self._fleet, name)[self._id])
+
+    def setter(self, value):
+        getattr(self._fleet, name)[self._id] = value
+    return property(getter, setter)
+
+
+class _FleetView:
+    def __init__(self, fleet, vehicle_id):
+        self._fleet = fleet
+        self._id = vehicle_id
+
+    def save_state(self):
+        """状态直接写在车队数组中，无需单独持久化。"""
+
+
+class AirConditionerView(_FleetView, AirConditioner):
+    is_on = _column("ac_on", bool)
+    preset_temp = _column("preset_temp", _number)
+    current_temp = _column("current_temp", _number)
+    preset_humidity = _column("preset_humidity", _number)
+    current_humidity = _column("current_humidity", _number)
+
+    def power(self):
+        return float(self._fleet.climate.power_kw[self._id])
+
+    def tick(self, dt, now=None, windows=None):
+        """车厢气候由 Fleet.tick 对整个车队统一推进，单车视图不单独推进。"""
+
+    @property
+    def mode(self):
+        return AC_MODES[self._fleet.ac_mode[self._id]]
+
+    @mode.setter
+    def mode(self, value):
+        self._fleet.ac_mode[self._id] = AC_MODES.index(value)
+
+
+class BatteryView(_FleetView, Battery):
+    capacity = _column("capacity", int)
+    mode_index = _column("battery_mode", int)
+    is_charging = _column("is_charging", bool)
+
+    @property
+    def simulation(self):
+        """车队的充电由 Fleet.tick 统一推进，开始充电时不阻塞。"""
+        return self._fleet
+
+    def tick(self, dt, now=None):
+        """充电进度由 Fleet.tick 对整个车队统一推进，单车视图不单独推进。"""
+
+    @property
+    def mode(self):
+        return self.MODES[self.mode_index]
+
+    @mode.setter
+    def mode(self, value):
+        pass    # 模式名称由 mode_index 推导
+
+
+class _WindowsStatus(MutableMapping):
+    """把某辆车的车窗数组行包装成 {位置: 打开程度} 字典。"""
+
+    def __init__(self, fleet, vehicle_id):
+        self._row = fleet.windows[vehicle_id]
+
+    def __getitem__(self, position):
+        return int(self._row[DoorWindow.WINDOW_POSITIONS.index(position)])
+
+    def __setitem__(self, position, level):
+        self._row[DoorWindow.WINDOW_POSITIONS.index(position)] = level
+
+    def __delitem__(self, position):
+        raise TypeError("车窗位置不能删除")
+
+    def __iter__(self):
+        return iter(DoorWindow.WINDOW_POSITIONS)
+
+    def __len__(self):
+        return len(DoorWindow.WINDOW_POSITIONS)
+
+
+class DoorWindowView(_FleetView, DoorWindow):
+    doors_locked = _column("doors_locked", bool)
+
+    @property
+    def windows_status(self):
+        return _WindowsStatus(self._fleet, self._id)
+
+
+class LightView(_FleetView, Light):
+    headlights_on = _column("headlights_on", bool)
+    fog_lights_on = _column("fog_lights_on", bool)
+    interior_light_level = _column("interior_light_level", int)
+
+
+class FleetVehicle(_FleetView, Vehicle):
+    """
+    车队中单辆车的视图，方法接口与 Vehicle 相同，所有状态读写都落在车队数组上。
+    导航子系统在整个车队中共用一份地图。
+    """
+    engine_on = _column("engine_on", bool)
+    speed = _column("speed", _number)
+
+    def __init__(self, fleet, vehicle_id, make="HUST", model="AutopilotSystem"):
+        super().__init__(fleet, vehicle_id)
+        self.make = make
+        self.model = model
+        self.ac = AirConditionerView(fleet, vehicle_id)
+        self.battery = BatteryView(fleet, vehicle_id)
+        self.door_window = DoorWindowView(fleet, vehicle_id)
+        self.light = LightView(fleet, vehicle_id)
+        self.startup_times = {}         # 子系统视图随车构造，没有单独的启动阶段
+
+    def loaded(self, name):
+        """车队共用的导航尚未构造时返回 None，不为查询而加载地图。"""
+        if name == "navigation":
+            return self._fleet.navigation
+        return super().loaded(name)
+
+    def tick(self, dt, now=None):
+        """车队状态只由 Fleet.tick 按数组整体推进；单车视图上推进时钟不做任何事。"""
+
+    @property
+    def current_driving_mode(self):
+        return self.DRIVING_MODES[self._fleet.driving_mode[self._id]]
+
+    @current_driving_mode.setter
+    def current_driving_mode(self, value):
+        self._fleet.driving_mode[self._id] = self.DRIVING_MODES.index(value)
+
+    @property
+    def navigation(self):
+        if self._fleet.navigation is None:
+            from core.subsystems.navigation import Navigation
+            self._fleet.navigation = Navigation()
+        return self._fleet.navigation
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    print("--- 开始车队模块单元测试 ---")
+    fleet = Fleet(10000)
+    fleet.region[:] = np.arange(fleet.size) % 8
+
+    print("\n>>> 操作: 解锁全部车门，再锁上3号区域的车门")
+    fleet.unlock_doors()
+    fleet.lock_doors(fleet.in_region(3))
+    print(f"  已上锁车辆数: {int(fleet.doors_locked.sum())}")
+
+    print("\n>>> 操作: 将前100辆车的空调设为24度")
+    fleet.set_temperature(24, ids=np.arange(100))
+
+    print("\n>>> 操作: 通过单车视图控制7号车")
+    car = fleet[7]
+    car.toggle_engine()
+    car.light.toggle_headlights()
+    car.door_window.set_window_level("front_left", 50)
+    car.ac.display_status()
+    car.door_window.display_status()
+    car.battery.capacity = 50
+    car.battery.toggle_charging()
+    car.tick(1.0)               # 单车视图的 tick 不推进状态
+    fleet.tick(600.0)
+    print(f"  7号车充电10分钟后电量: {car.battery.capacity}，"
+          f"预计还需 {fleet.charge_plan()[0][7] / 60:.0f} 分钟充到目标")
+
+    print("\n>>> 校验: 养护模式下电量高于目标时开始充电，电量不会被降低")
+    small = Fleet(3)
+    small.set_battery_mode(2)
+    small.capacity[:] = [95, 50, 100]
+    small.is_charging[:] = True
+    small.tick(0.1)
+    assert small.capacity.tolist() == [95, 50, 100], small.capacity
+    assert small.is_charging.tolist() == [False, True, False]
+    print(f"  一次 tick(0.1) 后电量: {small.capacity.tolist()}")
+    print(f"  导航已加载: {car.loaded('navigation') is not None}")
+    print("\n".join(car.startup_report()))
+    print("\n>>> 操作: 估计全车队未来1小时空调耗电")
+    fleet.set_ac(True)
+    print(f"  总计 {fleet.climate_energy(3600).sum():.0f} kWh")
+    print(f"\n车队统计: {fleet.summary()}")
+    print("--- 车队模块单元测试结束 ---")
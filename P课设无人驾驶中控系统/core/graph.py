@@ -0,0 +1,347 @@
+# core/graph.py
+
+import heapq
+from array import array
+
+from core import instrument
+
+INF = float('inf')
+
+
+class CompiledGraph:
+    """
+    编译后的路网图。
+    地点名被映射为从0开始的整数编号，邻接关系以CSR数组存储：
+    节点 u 的出边为 targets[offsets[u]:offsets[u+1]]，对应权重在 weights 中。
+    """
+
+    def __init__(self, names, offsets, targets, weights):
+        self.names = names                                  # 编号 -> 地点名
+        self.index = {name: i for i, name in enumerate(names)}  # 地点名 -> 编号
+        self.offsets = offsets                              # array('q')，长度 n+1
+        self.targets = targets                              # array('q')，长度 m
+        self.weights = weights                              # array('d')，长度 m
+
+    @classmethod
+    def from_dict(cls, locations, graph):
+        """从 map.json 的 locations 列表和字典邻接表编译出CSR图。"""
+        names = list(locations)
+        index = {name: i for i, name in enumerate(names)}
+        # 图中出现但不在 locations 里的地点也要编号，否则无法参与寻路
+        for node, edges in graph.items():
+            for name in (node, *edges):
+                if name not in index:
+                    index[name] = len(names)
+                    names.append(name)
+
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = array('d')
+        for name in names:
+            for neighbor, weight in graph.get(name, {}).items():
+                targets.append(index[neighbor])
+                weights.append(weight)
+            offsets.append(len(targets))
+        return cls(names, offsets, targets, weights)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # 从二进制地图映射来的数组是 memoryview，无法序列化，复制为 array 再传给子进程
+        state = dict(self.__dict__)
+        for key, code in (('offsets', 'q'), ('targets', 'q'), ('weights', 'd')):
+            if isinstance(state[key], memoryview):
+                state[key] = array(code, state[key])
+        return state
+
+    def to_dict(self):
+        """还原为 map.json 风格的字典邻接表。"""
+        graph = {}
+        for u, name in enumerate(self.names):
+            graph[name] = {self.names[v]: as_distance(w) for v, w in self.neighbors(u)}
+        return graph
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def reverse(self):
+        """构造反向图（所有边反向），供反向搜索和到达距离计算使用。"""
+        n = len(self.names)
+        counts = [0] * (n + 1)
+        for v in self.targets:
+            counts[v + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array('q', counts)
+        fill = counts[:n]
+        targets = array('q', [0]) * len(self.targets)
+        weights = array('d', [0.0]) * len(self.targets)
+        for u in range(n):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                v = self.targets[e]
+                slot = fill[v]
+                targets[slot] = u
+                weights[slot] = self.weights[e]
+                fill[v] = slot + 1
+        return CompiledGraph(self.names, offsets, targets, weights)
+
+    def edge_index(self, u, v):
+        """返回边 u->v 在CSR数组中的下标，边不存在时返回 -1。"""
+        for e in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[e] == v:
+                return e
+        return -1
+
+    def neighbors(self, u):
+        """返回节点 u 的 (邻居编号, 权重) 列表。"""
+        start, end = self.offsets[u], self.offsets[u + 1]
+        return list(zip(self.targets[start:end], self.weights[start:end]))
+
+
+def dijkstra(g, source, target=-1, stats=None):
+    """
+    在CSR数组上运行Dijkstra算法。
+    返回 (dist, prev) 两个扁平数组；指定 target 时弹出终点即提前结束。
+    传入 stats 字典时会写入扩展（出堆）的节点数和成功松弛的边数。
+    """
+    n = len(g)
+    dist = array('d', [INF]) * n
+    prev = array('q', [-1]) * n
+    dist[source] = 0.0
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    heap = [(0.0, source)]
+    expanded = 0
+    relaxed = 0
+
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        expanded += 1
+        if u == target:
+            break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                relaxed += 1
+                heappush(heap, (nd, v))
+    _record_search(stats, expanded, relaxed)
+    return dist, prev
+
+
+def _record_search(stats, expanded, relaxed):
+    if stats is not None:
+        stats['expanded'] = expanded
+        stats['relaxed'] = relaxed
+    if instrument.enabled:
+        instrument.add('graph.searches')
+        instrument.add('graph.popped', expanded)
+        instrument.add('graph.relaxed', relaxed)
+
+
+def bidirectional_dijkstra(g, rg, source, target, stats=None):
+    """
+    双向Dijkstra：从起点在正向图 g、从终点在反向图 rg 上同时搜索，
+    两侧堆顶距离之和不小于已知最优值时停止。
+    返回 (距离, 节点编号路径)，不可达时为 (INF, None)。
+    """
+    if source == target:
+        if stats is not None:
+            stats['expanded'] = 1
+        return 0.0, [source]
+
+    n = len(g)
+    dist_f = array('d', [INF]) * n
+    dist_b = array('d', [INF]) * n
+    prev_f = array('q', [-1]) * n
+    next_b = array('q', [-1]) * n
+    dist_f[source] = 0.0
+    dist_b[target] = 0.0
+    heap_f = [(0.0, source)]
+    heap_b = [(0.0, target)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+    best = INF
+    meet = -1
+    expanded = 0
+    relaxed = 0
+
+    while heap_f and heap_b:
+        if heap_f[0][0] + heap_b[0][0] >= best:
+            break
+        # 每次扩展堆顶距离较小的一侧
+        if heap_f[0][0] <= heap_b[0][0]:
+            heap, graph, dist, other, link = heap_f, g, dist_f, dist_b, prev_f
+        else:
+            heap, graph, dist, other, link = heap_b, rg, dist_b, dist_f, next_b
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        expanded += 1
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                link[v] = u
+                relaxed += 1
+                heappush(heap, (nd, v))
+            if dist[v] + other[v] < best:
+                best = dist[v] + other[v]
+                meet = v
+
+    _record_search(stats, expanded, relaxed)
+    if meet < 0:
+        return INF, None
+    path = extract_path(prev_f, source, meet)
+    current = meet
+    while current != target:
+        current = next_b[current]
+        path.append(current)
+    return best, path
+
+
+def astar(g, source, target, landmarks, stats=None):
+    """
+    以地标 (ALT) 下界为启发函数的A*搜索。
+    启发函数满足一致性，因此终点第一次出堆时即为最短距离。
+    返回 (距离, 节点编号路径)，不可达时为 (INF, None)。
+    """
+    n = len(g)
+    dist = array('d', [INF]) * n
+    prev = array('q', [-1]) * n
+    heuristic = landmarks.potential_to(target)
+    dist[source] = 0.0
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    heap = [(heuristic(source), 0.0, source)]
+    expanded = 0
+    relaxed = 0
+
+    while heap:
+        _, d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        expanded += 1
+        if u == target:
+            break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                h = heuristic(v)
+                if h == INF:
+                    continue   # 地标证明 v 无法到达终点
+                dist[v] = nd
+                prev[v] = u
+                relaxed += 1
+                heappush(heap, (nd + h, nd, v))
+
+    _record_search(stats, expanded, relaxed)
+    if dist[target] == INF:
+        return INF, None
+    return dist[target], extract_path(prev, source, target)
+
+
+class Landmarks:
+    """
+    ALT算法的地标表。
+    forward[i][v] 为地标 i 到 v 的距离，backward[i][v] 为 v 到地标 i 的距离，
+    由三角不等式可得 v 到 t 的距离下界。
+    """
+
+    def __init__(self, nodes, forward, backward):
+        self.nodes = nodes
+        self.forward = forward
+        self.backward = backward
+
+    @classmethod
+    def build(cls, g, count=4, rg=None):
+        """用"最远点"策略选取地标，并计算正反两个方向的距离表。"""
+        rg = rg or g.reverse()
+        n = len(g)
+        count = min(count, n)
+        nodes, forward, backward = [], [], []
+        # 从出度最大的节点出发，先找离它最远的点作为第一个地标
+        seed = max(range(n), key=lambda u: g.offsets[u + 1] - g.offsets[u], default=0)
+        nearest, _ = dijkstra(g, seed)
+        while len(nodes) < count:
+            candidates = [v for v in range(n) if nearest[v] != INF and v not in nodes]
+            if not candidates:
+                candidates = [v for v in range(n) if v not in nodes]
+            landmark = max(candidates, key=lambda v: nearest[v])
+            dist_from, _ = dijkstra(g, landmark)
+            dist_to, _ = dijkstra(rg, landmark)
+            nodes.append(landmark)
+            forward.append(dist_from)
+            backward.append(dist_to)
+            if len(nodes) == 1:
+                nearest = array('d', dist_from)
+            else:
+                for v in range(n):
+                    if dist_from[v] < nearest[v]:
+                        nearest[v] = dist_from[v]
+        return cls(nodes, forward, backward)
+
+    def potential_to(self, target):
+        """返回以 target 为终点的下界函数 h(v)。"""
+        tables = []
+        for dist_from, dist_to in zip(self.forward, self.backward):
+            tables.append((dist_from, dist_from[target], dist_to, dist_to[target]))
+
+        def heuristic(v):
+            bound = 0.0
+            for dist_from, from_t, dist_to, to_t in tables:
+                # d(L,t) <= d(L,v) + d(v,t)
+                if from_t != INF:
+                    if dist_from[v] != INF:
+                        bound = max(bound, from_t - dist_from[v])
+                elif dist_from[v] != INF:
+                    return INF      # L 能到 v 却到不了 t，说明 v 到不了 t
+                # d(v,L) <= d(v,t) + d(t,L)
+                if dist_to[v] != INF and to_t != INF:
+                    bound = max(bound, dist_to[v] - to_t)
+                elif dist_to[v] == INF and to_t != INF:
+                    return INF      # t 能到 L 而 v 不能，说明 v 到不了 t
+            return bound
+        return heuristic
+
+    def to_dict(self, g):
+        return {
+            "landmarks": [g.names[v] for v in self.nodes],
+            "forward": [list(d) for d in self.forward],
+            "backward": [list(d) for d in self.backward],
+        }
+
+    @classmethod
+    def from_dict(cls, data, g):
+        nodes = [g.index[name] for name in data['landmarks']]
+        forward = [array('d', d) for d in data['forward']]
+        backward = [array('d', d) for d in data['backward']]
+        return cls(nodes, forward, backward)
+
+
+def extract_path(prev, source, target):
+    """根据前驱数组回溯出 source 到 target 的节点编号序列，不可达时返回 None。"""
+    path = [target]
+    current = target
+    while current != source:
+        current = prev[current]
+        if current < 0:
+            return None
+        path.append(current)
+    path.reverse()
+    return path
+
+
+def as_distance(value):
+    """整数距离按整数显示，与 map.json 中的写法保持一致。"""
+    if value != INF and float(value).is_integer():
+        return int(value)
+    return value
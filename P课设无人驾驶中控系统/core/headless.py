@@ -0,0 +1,156 @@
+# core/headless.py
+"""
+无界面批处理/回放模式：从文件或标准输入逐行读取命令并执行，不弹出任何提示，
+每条命令输出一行JSON结果，结束时报告吞吐量，用于回归测试和压力测试。
+
+每行一条命令，支持三种写法（# 开头为注释，空行忽略）：
+  文本:      ac.set_temperature 24          可加车辆编号前缀: @3 toggle_engine
+  JSON数组:  ["door_window.set_window_level", "front_left", 50]
+  JSON对象:  {"vehicle": 0, "cmd": "navigation.plan_route", "args": ["紫菘", "西十二"]}
+命令名见 core/commands.py；另有 advance <秒数>，把仿真时钟推进指定的虚拟时间。
+"""
+
+import contextlib
+import io
+import json
+import time
+
+from core.commands import execute
+
+
+def _parse_value(token):
+    for convert in (int, float):
+        try:
+            return convert(token)
+        except ValueError:
+            pass
+    return token
+
+
+def parse_line(line):
+    """解析一行命令，返回 (车辆编号, 命令名, 参数列表)；空行和注释返回 None。"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line[0] == '{':
+        data = json.loads(line)
+        vehicle_id, args = data.get('vehicle', 0), data.get('args', [])
+        if not isinstance(vehicle_id, int) or isinstance(vehicle_id, bool):
+            raise TypeError(f"vehicle 必须是整数: {vehicle_id!r}")
+        if not isinstance(args, list):
+            raise TypeError(f"args 必须是数组: {args!r}")
+        return vehicle_id, data['cmd'], args
+    if line[0] == '[':
+        data = json.loads(line)
+        if not isinstance(data, list) or not data:
+            raise TypeError("JSON数组形式应为 [命令, 参数...]")
+        return 0, data[0], data[1:]
+    tokens = line.split()
+    vehicle_id = 0
+    if tokens[0].startswith('@'):
+        vehicle_id = int(tokens[0][1:])
+        tokens = tokens[1:]
+    return vehicle_id, tokens[0], [_parse_value(token) for token in tokens[1:]]
+
+
+def run_script(lines, vehicles, output=None, simulation=None):
+    """
+    逐行执行命令流（任何可迭代的文本行，不会整体读入内存）。
+    output 为可写文本流时每条命令写出一行JSON结果；返回统计摘要。
+    """
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                              default=_to_builtin).encode
+    commands = failed = 0
+    start = time.perf_counter()
+    for number, line in enumerate(lines, 1):
+        try:
+            parsed = parse_line(line)
+        except (ValueError, KeyError, IndexError, TypeError) as error:
+            parsed, result = None, (False, None, f"无法解析: {error!r}")
+        else:
+            if parsed is None:
+                continue
+            vehicle_id, name, args = parsed
+            if name == 'advance':
+                result = _advance(simulation, args)
+            elif not 0 <= vehicle_id < len(vehicles):
+                result = (False, None, f"车辆编号 {vehicle_id} 不存在")
+            else:
+                result = execute(vehicles[vehicle_id], name, args)
+        commands += 1
+        ok, value, message = result
+        if not ok:
+            failed += 1
+        if output is not None:
+            output.write(encode({"line": number, "ok": ok, "result": value,
+                                 "message": message}))
+            output.write('\n')
+    elapsed = time.perf_counter() - start
+    return {
+        "commands": commands,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "ops_per_second": round(commands / elapsed) if elapsed > 0 else 0,
+    }
+
+
+def _advance(simulation, args):
+    if simulation is None:
+        return False, None, "没有仿真时钟"
+    try:
+        seconds = float(args[0])
+    except (IndexError, TypeError, ValueError):
+        return False, None, "用法: advance <秒数>"
+    # 仿真推进中子系统的提示（如"充电完成"）收进结果，不混入标准输出的结果流
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        simulation.run(duration=seconds)
+    return True, round(simulation.now, 6), output.getvalue().strip()
+
+
+def _to_builtin(value):
+    """NumPy 标量等无法直接编码为JSON的值。"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"无法编码的类型: {type(value).__name__}")
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import io
+    import random
+    from core.fleet import Fleet
+    from core.simulation import Simulation
+
+    print("--- 开始批处理模式单元测试 ---")
+    fleet = Fleet(100)
+    simulation = Simulation(step=1.0)
+    simulation.register(fleet)
+    vehicles = [fleet[i] for i in range(len(fleet))]
+
+    script = [
+        "# 注释行",
+        "ac.set_temperature 24",
+        '["door_window.set_window_level", "front_left", 50]',
+        '{"vehicle": 3, "cmd": "toggle_engine"}',
+        "@3 battery.toggle_charging",
+        "advance 60",
+        "@3 status",
+        "ac.set_temperature 99",
+        "no_such_command",
+        '{"vehicle": "1", "cmd": "status"}',
+        '{"cmd": "ac.set_temperature", "args": 5}',
+        '["set_driving_mode", 1e999]',
+    ]
+    out = io.StringIO()
+    run_script(script, vehicles, out, simulation)
+    print(out.getvalue(), end="")
+
+    print("\n>>> 20万条随机命令")
+    rng = random.Random(0)
+    templates = ["@{} ac.set_temperature {}", "@{} light.set_interior_light_level {}",
+                 "@{} door_window.set_window_level front_left {}", "@{} toggle_engine"]
+    lines = (rng.choice(templates).format(rng.randrange(100), rng.randint(0, 30))
+             for _ in range(200000))
+    print(f"  {run_script(lines, vehicles, io.StringIO(), simulation)}")
+    print("--- 批处理模式单元测试结束 ---")
@@ -0,0 +1,314 @@
+# core/instrument.py
+"""
+可选的性能插桩：调用次数、延迟直方图和计数器（Dijkstra 出堆/松弛次数、写盘字节数等）。
+
+默认关闭。关闭时：
+  * 子系统方法不做任何包装（enable 时才把 TARGETS 中各类的公开方法替换为计时包装，
+    disable 时还原），没有额外开销；
+  * core.utils 中用 @timed 标注的 I/O 函数和热点代码中的计数只多一次 enabled 判断。
+开启方式：设置环境变量 CAR_INSTRUMENT=1 启动 main.py，或在主菜单中选择 p。
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import threading
+import time
+from array import array
+
+enabled = False
+
+# enable 时插桩的类: (模块, 类名, 指标名前缀)
+TARGETS = [
+    ("core.vehicle", "Vehicle", "vehicle"),
+    ("core.subsystems.air_conditioner", "AirConditioner", "ac"),
+    ("core.subsystems.battery", "Battery", "battery"),
+    ("core.subsystems.door_window", "DoorWindow", "door_window"),
+    ("core.subsystems.light", "Light", "light"),
+    ("core.subsystems.navigation", "Navigation", "navigation"),
+    ("core.dashboard", "DashboardRenderer", "dashboard"),
+    ("core.utils", "WriteBehindStore", "io.store"),
+    ("core.utils", "StateJournal", "io.journal"),
+]
+
+
+class Histogram:
+    """
+    HDR风格的对数-线性延迟直方图（单位纳秒）。
+    32 ns 以下每个值一个桶，之后每个2的幂区间再等分为 16 个子桶，
+    相对误差不超过 1/16；桶计数存放在预分配的 array 中，记录是 O(1) 的。
+    I/O 计时会同时来自后台写盘线程和主线程，每个直方图用自己的锁保护记录和导出。
+    """
+
+    SUB_BITS = 4
+    BUCKETS = 64 << SUB_BITS
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def index(cls, value):
+        shift = value.bit_length() - cls.SUB_BITS - 1
+        if shift <= 0:
+            return value
+        return min((shift << cls.SUB_BITS) + (value >> shift), cls.BUCKETS - 1)
+
+    @classmethod
+    def upper_bound(cls, index):
+        """桶内的最大值。"""
+        if index < 2 << cls.SUB_BITS:
+            return index
+        shift = (index >> cls.SUB_BITS) - 1
+        mantissa = (index & ((1 << cls.SUB_BITS) - 1)) + (1 << cls.SUB_BITS)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        index = self.index(value)
+        with self._lock:
+            self.counts[index] += 1
+            if not self.count or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self.count += 1
+            self.total += value
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "total_ns": self.total,
+                "min_ns": self.min,
+                "mean_ns": self.total // self.count if self.count else 0,
+                "p50_ns": self.percentile(50),
+                "p90_ns": self.percentile(90),
+                "p99_ns": self.percentile(99),
+                "p999_ns": self.percentile(99.9),
+                "max_ns": self.max,
+                # 稀疏桶: [桶上界, 计数]，可用于合并多次运行的结果
+                "buckets": [[self.upper_bound(i), c] for i, c in enumerate(self.counts) if c],
+            }
+
+
+_lock = threading.Lock()
+_histograms = {}            # 指标名 -> Histogram
+_counters = {}              # 计数器名 -> 累计值
+_patched = []               # [(类, 方法名, 原函数)]
+
+
+def histogram(name):
+    h = _histograms.get(name)
+    if h is None:
+        with _lock:
+            h = _histograms.setdefault(name, Histogram())
+    return h
+
+
+def observe(name, nanoseconds):
+    histogram(name).record(nanoseconds)
+
+
+def add(name, amount=1):
+    """累加计数器（线程安全）；热点代码中应先判断 instrument.enabled 再调用。"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class span:
+    """计时上下文: with instrument.span("navigation.load_map"): ..."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns() if enabled else None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            observe(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+def _wrap(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(name, time.perf_counter_ns() - start)
+    wrapper.__instrumented__ = func
+    return wrapper
+
+
+def timed(name):
+    """函数装饰器：开启插桩时记录每次调用的耗时，关闭时只多一次 enabled 判断。"""
+    def decorate(func):
+        measured = _wrap(func, name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if enabled:
+                return measured(*args, **kwargs)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _patch(cls, prefix):
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not inspect.isfunction(value) \
+                or hasattr(value, '__instrumented__'):
+            continue
+        setattr(cls, attr, _wrap(value, f"{prefix}.{attr}"))
+        _patched.append((cls, attr, value))
+
+
+def enable():
+    """开启插桩：包装 TARGETS 中各类的公开方法。"""
+    global enabled
+    with _lock:
+        if enabled:
+            return
+        for module, class_name, prefix in TARGETS:
+            _patch(getattr(importlib.import_module(module), class_name), prefix)
+        enabled = True
+
+
+def disable():
+    """关闭插桩并还原被包装的方法；已收集的数据保留到 reset。"""
+    global enabled
+    with _lock:
+        enabled = False
+        while _patched:
+            cls, attr, original = _patched.pop()
+            setattr(cls, attr, original)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """返回可直接序列化为JSON的全部指标。"""
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    return {
+        "enabled": enabled,
+        "counters": dict(sorted(counters.items())),
+        "timers": {name: h.to_dict() for name, h in sorted(histograms.items())},
+    }
+
+
+def export(path):
+    """把指标写成JSON文件（path 为完整路径）。"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def _format_ns(value):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.1f}{unit}"
+    return f"{value}ns"
+
+
+def report_lines(limit=30):
+    """按总耗时排序的文本报告。"""
+    data = snapshot()
+    lines = [f"{'指标':<36}{'次数':>9}{'总耗时':>10}{'p50':>9}{'p99':>9}{'最大':>9}"]
+    timers = sorted(data["timers"].items(), key=lambda item: -item[1]["total_ns"])
+    for name, t in timers[:limit]:
+        lines.append(f"{name:<38}{t['count']:>9}{_format_ns(t['total_ns']):>10}"
+                     f"{_format_ns(t['p50_ns']):>9}{_format_ns(t['p99_ns']):>9}"
+                     f"{_format_ns(t['max_ns']):>9}")
+    for name, value in data["counters"].items():
+        lines.append(f"{name:<38}{value:>9}")
+    return lines
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import os
+    import tempfile
+    # 以 python -m 运行时本文件是 __main__，其它模块引用的是 core.instrument
+    from core import instrument
+    from core.vehicle import Vehicle
+
+    print("--- 开始性能插桩单元测试 ---")
+    h = Histogram()
+    for value in range(1, 100001):
+        h.record(value * 1000)
+    print(f"\n  1..100000us 均匀分布: p50={_format_ns(h.percentile(50))} "
+          f"p99={_format_ns(h.percentile(99))} max={_format_ns(h.max)}")
+
+    car = Vehicle()
+    start = time.perf_counter()
+    for _ in range(100000):
+        car.light.status_lines()
+    disabled = time.perf_counter() - start
+
+    instrument.enable()
+    start = time.perf_counter()
+    for _ in range(100000):
+        car.light.status_lines()
+    measured = time.perf_counter() - start
+    print(f"  10万次调用: 关闭 {disabled * 1e3:.0f}ms，开启 {measured * 1e3:.0f}ms")
+
+    if car.navigation.set_points("居民区", "喻园大道-东九"):
+        car.navigation.plan_route()
+    car.ac.set_temperature(22)
+    car.events.flush()
+    print()
+    for line in instrument.report_lines(12):
+        print("  " + line)
+
+    path = instrument.export(os.path.join(tempfile.gettempdir(), "instrument.json"))
+    print(f"\n  已导出 {os.path.getsize(path)} 字节到 {path}")
+
+    def count():
+        for _ in range(100000):
+            instrument.add("demo.concurrent")
+    workers = [threading.Thread(target=count) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    print(f"  4个线程各累加10万次: {instrument.snapshot()['counters']['demo.concurrent']}")
+
+    def observe_many():
+        for _ in range(100000):
+            instrument.observe("demo.concurrent", 1000)
+    workers = [threading.Thread(target=observe_many) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    print(f"  4个线程各记录10万次耗时: {instrument.histogram('demo.concurrent').count}")
+    instrument.disable()
+    print(f"  关闭后方法已还原: {not hasattr(Vehicle.tick, '__instrumented__')}")
+    print("--- 性能插桩单元测试结束 ---")
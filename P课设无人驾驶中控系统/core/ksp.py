@@ -0,0 +1,119 @@
+# core/ksp.py
+
+import heapq
+from array import array
+
+from core.graph import dijkstra, INF
+
+
+def _tree_path(next_hop, start, target, banned_nodes):
+    """沿到终点的最短路树走出路径；途经被禁用的节点时返回 None。"""
+    path = [start]
+    current = start
+    while current != target:
+        current = next_hop[current]
+        if current < 0 or current in banned_nodes:
+            return None
+        path.append(current)
+    return path
+
+
+def _spur_search(g, spur, target, to_target, banned_nodes, banned_edges, stats):
+    """
+    在去掉 banned_nodes 和从 spur 出发的 banned_edges 后，求 spur 到 target 的最短路。
+    以完整图上到终点的距离 to_target 为A*启发函数：删点删边只会让距离变长，
+    所以它始终是一致的下界。
+    """
+    dist = {spur: 0.0}
+    prev = {spur: -1}
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    heappush, heappop = heapq.heappush, heapq.heappop
+    heap = [(to_target[spur], 0.0, spur)]
+    while heap:
+        _, d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        stats['expanded'] += 1
+        if u == target:
+            path = [u]
+            while prev[path[-1]] >= 0:
+                path.append(prev[path[-1]])
+            path.reverse()
+            return d, path
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if v in banned_nodes or (u == spur and v in banned_edges):
+                continue
+            h = to_target[v]
+            if h == INF:
+                continue
+            nd = d + weights[e]
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                prev[v] = u
+                heappush(heap, (nd + h, nd, v))
+    return INF, None
+
+
+def k_shortest_paths(g, rg, source, target, k, stats=None):
+    """
+    Yen算法求 source 到 target 的前 k 条无环最短路，返回 [(距离, 节点编号路径)]。
+    搜索状态在各轮之间复用：
+      - 在反向图上只跑一次Dijkstra，得到每个节点到终点的距离和下一跳；
+      - 偏离点到终点的树上路径没有碰到禁用点/边时直接使用，无需搜索；
+      - 需要搜索时用上面的距离作为A*下界，只扩展很少的节点。
+    """
+    if stats is None:
+        stats = {}
+    stats.update(expanded=0, spur_searches=0, tree_reuses=0)
+    if k <= 0:
+        return []
+    to_target, next_hop = dijkstra(rg, target)
+    if to_target[source] == INF:
+        return []
+
+    first = _tree_path(next_hop, source, target, ())
+    found = [(to_target[source], first)]
+    found_set = {tuple(first)}
+    candidates = []
+    queued = set()
+
+    while len(found) < k:
+        _, last_path = found[-1]
+        # 路径前缀的累计距离
+        prefix = array('d', [0.0])
+        for u, v in zip(last_path, last_path[1:]):
+            prefix.append(prefix[-1] + g.weights[g.edge_index(u, v)])
+
+        for j in range(len(last_path) - 1):
+            spur = last_path[j]
+            root = last_path[:j + 1]
+            banned_nodes = set(root[:-1])
+            banned_edges = {path[j + 1] for _, path in found
+                            if len(path) > j + 1 and path[:j + 1] == root}
+
+            spur_path = None
+            if next_hop[spur] not in banned_edges:
+                spur_path = _tree_path(next_hop, spur, target, banned_nodes)
+            if spur_path is not None:
+                stats['tree_reuses'] += 1
+                spur_cost = to_target[spur]
+            else:
+                stats['spur_searches'] += 1
+                spur_cost, spur_path = _spur_search(g, spur, target, to_target,
+                                                    banned_nodes, banned_edges, stats)
+                if spur_path is None:
+                    continue
+
+            candidate = tuple(root[:-1] + spur_path)
+            if candidate in queued or candidate in found_set:
+                continue
+            queued.add(candidate)
+            heapq.heappush(candidates, (prefix[j] + spur_cost, candidate))
+
+        if not candidates:
+            break
+        cost, path = heapq.heappop(candidates)
+        found.append((cost, list(path)))
+        found_set.add(path)
+    return found
@@ -0,0 +1,79 @@
+# core/location_index.py
+
+import math
+from bisect import bisect_left
+from collections import defaultdict
+
+
+def _grams(text):
+    """取首尾加标记后的字符二元组，中文地名按字切分即可。"""
+    padded = f"^{text}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class LocationIndex:
+    """
+    地点名目录，在地图加载时构建一次。
+      - 精确查找：名字 -> 编号的哈希表；
+      - 前缀补全：按名字排序的数组上二分查找，等价于压缩的前缀树，内存更省；
+      - 模糊匹配：字符二元组倒排索引，按 Dice 相似度排序给出建议。
+    """
+
+    def __init__(self, names):
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._sorted = sorted(self._ids)
+        self._postings = defaultdict(list)
+        self._gram_counts = {}
+        for name in self._sorted:
+            grams = _grams(name)
+            self._gram_counts[name] = len(grams)
+            for gram in grams:
+                self._postings[gram].append(name)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def lookup(self, name):
+        """精确查找，返回编号或 None。"""
+        return self._ids.get(name)
+
+    def complete(self, prefix, limit=10):
+        """返回以 prefix 开头的地点名（按字典序）。"""
+        names = self._sorted
+        i = bisect_left(names, prefix)
+        result = []
+        while i < len(names) and len(result) < limit and names[i].startswith(prefix):
+            result.append(names[i])
+            i += 1
+        return result
+
+    def suggest(self, query, limit=5, min_score=0.3):
+        """
+        容错模糊匹配，返回按相关度排序的 [(地点名, 分数)]。
+        前缀命中的名字排在最前，其余按二元组 Dice 系数排序。
+        """
+        if not query:
+            return []
+        if query in self._ids:
+            return [(query, 1.0)]
+        scores = {name: 1.0 for name in self.complete(query, limit)}
+
+        # 前缀过滤：相似度达到 min_score 的名字至少共享 need 个二元组，
+        # 因此只需从最稀有的 len-need+1 个二元组的倒排表中取候选，再逐个精确打分
+        query_grams = sorted(_grams(query), key=lambda g: len(self._postings.get(g, ())))
+        total = len(query_grams)
+        need = max(1, math.ceil(min_score * (total + 1) / 2))
+        candidates = set()
+        for gram in query_grams[:total - need + 1]:
+            candidates.update(self._postings.get(gram, ()))
+        for name in candidates:
+            padded = f"^{name}$"
+            common = sum(1 for gram in query_grams if gram in padded)
+            score = 2 * common / (total + self._gram_counts[name])
+            if score >= min_score and score > scores.get(name, 0.0):
+                scores[name] = score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(item[0]), item[0]))
+        return ranked[:limit]
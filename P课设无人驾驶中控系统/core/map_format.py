@@ -0,0 +1,129 @@
+# core/map_format.py
+# 用法（在项目根目录下）: python -m core.map_format [map.json] [map.bin]
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from core.graph import CompiledGraph
+from core.utils import data_path, load_data, file_digest
+
+# 二进制地图格式（小端，各数组段按8字节对齐）:
+#   头部    : 魔数 b'RMAP' | 版本 u32 | 节点数 n u32 | locations 数 u32 | 边数 m u64
+#             | 字符串区字节数 u64 | 源 map.json 的SHA-256 (32字节，无源文件时全0)
+#   offsets : (n+1) 个 int64，CSR行偏移
+#   targets : m 个 int64，边的终点编号
+#   weights : m 个 float64，边长（米）
+#   strings : (n+1) 个 int64 的名字偏移 + UTF-8 名字字节串
+# 编号 0..locations数-1 的节点依次对应 map.json 中的 locations 列表。
+MAGIC = b'RMAP'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ32s')
+
+
+def _pad(f):
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+def write_map(g, location_count, map_hash, filename):
+    """把编译好的图写成二进制地图文件（先写临时文件再原子替换）。"""
+    encoded = [name.encode('utf-8') for name in g.names]
+    name_offsets = array('q', [0])
+    for raw in encoded:
+        name_offsets.append(name_offsets[-1] + len(raw))
+    digest = bytes.fromhex(map_hash) if map_hash else bytes(32)
+
+    path = data_path(filename)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(g), location_count, g.edge_count,
+                            name_offsets[-1], digest))
+        _pad(f)
+        for section in (g.offsets, g.targets):
+            array('q', section).tofile(f)
+        array('d', g.weights).tofile(f)
+        name_offsets.tofile(f)
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, path)
+
+
+def convert_map(json_name='map.json', bin_name='map.bin'):
+    """将 JSON 地图转换为二进制地图，返回写入的节点数和边数。"""
+    map_data = load_data(json_name)
+    if not map_data:
+        raise FileNotFoundError(f"错误: {json_name} 地图文件未找到或格式错误。")
+    locations = map_data.get('locations', [])
+    g = CompiledGraph.from_dict(locations, map_data.get('graph', {}))
+    write_map(g, len(locations), file_digest(json_name), bin_name)
+    return len(g), g.edge_count
+
+
+class MappedMap:
+    """
+    用mmap打开的二进制地图。
+    CSR数组是直接指向映射内存的 memoryview（零拷贝）；映射采用写时复制方式，
+    运行时修改边权只影响本进程的私有页，不会写回文件。
+    """
+
+    def __init__(self, graph, location_count, map_hash, buffers):
+        self.graph = graph
+        self.location_count = location_count
+        self.map_hash = map_hash
+        self._buffers = buffers
+
+    @property
+    def locations(self):
+        return self.graph.names[:self.location_count]
+
+    def close(self):
+        f, mm, views = self._buffers
+        for view in views:
+            view.release()
+        mm.close()
+        f.close()
+
+
+def open_map(filename='map.bin', expected_hash=None):
+    """
+    打开二进制地图；文件不存在、格式不符，或给出了 expected_hash 但与文件中
+    记录的源 map.json 摘要不一致（说明 JSON 已修改而未重新转换）时返回 None。
+    """
+    path = data_path(filename)
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+        return None
+    f = open(path, 'rb')
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, version, n, location_count, m, string_bytes, digest = HEADER.unpack_from(mm, 0)
+    map_hash = digest.hex() if digest != bytes(32) else None
+    start = HEADER.size + (-HEADER.size % 8)
+    sizes = [(n + 1) * 8, m * 8, m * 8, (n + 1) * 8]
+    if (magic != MAGIC or version != VERSION
+            or len(mm) != start + sum(sizes) + string_bytes
+            or (expected_hash is not None and map_hash != expected_hash)):
+        mm.close()
+        f.close()
+        return None
+
+    views = []
+    sections = []
+    for size, code in zip(sizes, 'qqdq'):
+        raw = memoryview(mm)[start:start + size]
+        views.append(raw)
+        sections.append(raw.cast(code))
+        start += size
+    views[:0] = sections            # 先释放按类型转换的视图，再释放原始字节视图
+    offsets, targets, weights, name_offsets = sections
+    blob = mm[start:start + string_bytes]
+    names = [blob[name_offsets[i]:name_offsets[i + 1]].decode('utf-8') for i in range(n)]
+
+    graph = CompiledGraph(names, offsets, targets, weights)
+    return MappedMap(graph, location_count, map_hash, (f, mm, views))
+
+
+if __name__ == '__main__':
+    json_name = sys.argv[1] if len(sys.argv) > 1 else 'map.json'
+    bin_name = sys.argv[2] if len(sys.argv) > 2 else 'map.bin'
+    nodes, edges = convert_map(json_name, bin_name)
+    print(f"已将 {json_name} 转换为 {bin_name}: {nodes} 个地点, {edges} 条道路。")
@@ -0,0 +1,202 @@
+# core/packing.py
+"""
+紧凑二进制编码，格式与 MessagePack 的常用子集兼容（不依赖第三方库）：
+None / bool / int / float / str / bytes / list(tuple) / dict。
+小整数和短字符串只占1字节类型头，命令消息通常只有十几个字节。
+"""
+
+import struct
+
+
+_pack_int8 = struct.Struct('>b').pack
+_pack_int16 = struct.Struct('>h').pack
+_pack_int32 = struct.Struct('>i').pack
+_pack_int64 = struct.Struct('>q').pack
+_pack_uint8 = struct.Struct('>B').pack
+_pack_uint16 = struct.Struct('>H').pack
+_pack_uint32 = struct.Struct('>I').pack
+_pack_float64 = struct.Struct('>d').pack
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(b'\xc0')
+    elif obj is True:
+        out.append(b'\xc3')
+    elif obj is False:
+        out.append(b'\xc2')
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(_pack_uint8(obj))
+        elif -32 <= obj < 0:
+            out.append(_pack_int8(obj))
+        elif -0x80 <= obj < 0x80:
+            out.append(b'\xd0' + _pack_int8(obj))
+        elif -0x8000 <= obj < 0x8000:
+            out.append(b'\xd1' + _pack_int16(obj))
+        elif -0x80000000 <= obj < 0x80000000:
+            out.append(b'\xd2' + _pack_int32(obj))
+        else:
+            out.append(b'\xd3' + _pack_int64(obj))
+    elif isinstance(obj, float):
+        out.append(b'\xcb' + _pack_float64(obj))
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        n = len(data)
+        if n < 32:
+            out.append(_pack_uint8(0xa0 | n))
+        elif n < 0x100:
+            out.append(b'\xd9' + _pack_uint8(n))
+        elif n < 0x10000:
+            out.append(b'\xda' + _pack_uint16(n))
+        else:
+            out.append(b'\xdb' + _pack_uint32(n))
+        out.append(data)
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(_pack_uint8(0x90 | n))
+        elif n < 0x10000:
+            out.append(b'\xdc' + _pack_uint16(n))
+        else:
+            out.append(b'\xdd' + _pack_uint32(n))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(_pack_uint8(0x80 | n))
+        elif n < 0x10000:
+            out.append(b'\xde' + _pack_uint16(n))
+        else:
+            out.append(b'\xdf' + _pack_uint32(n))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        out.append(b'\xc6' + _pack_uint32(len(data)))
+        out.append(data)
+    elif hasattr(obj, 'item'):     # NumPy标量（车队视图的字段）
+        _pack(obj.item(), out)
+    else:
+        raise TypeError(f"无法编码的类型: {type(obj).__name__}")
+
+
+def pack(obj):
+    """编码为字节串。"""
+    out = []
+    _pack(obj, out)
+    return b''.join(out)
+
+
+# 定长类型: 类型头 -> (解码器, 字节数)
+_FIXED = {
+    0xcc: (struct.Struct('>B').unpack_from, 1),
+    0xcd: (struct.Struct('>H').unpack_from, 2),
+    0xce: (struct.Struct('>I').unpack_from, 4),
+    0xcf: (struct.Struct('>Q').unpack_from, 8),
+    0xd0: (struct.Struct('>b').unpack_from, 1),
+    0xd1: (struct.Struct('>h').unpack_from, 2),
+    0xd2: (struct.Struct('>i').unpack_from, 4),
+    0xd3: (struct.Struct('>q').unpack_from, 8),
+    0xca: (struct.Struct('>f').unpack_from, 4),
+    0xcb: (struct.Struct('>d').unpack_from, 8),
+}
+# 变长类型的长度字段: 类型头 -> (解码器, 字节数)
+_LENGTH = {
+    0xd9: _FIXED[0xcc], 0xda: _FIXED[0xcd], 0xdb: _FIXED[0xce],      # str
+    0xc4: _FIXED[0xcc], 0xc5: _FIXED[0xcd], 0xc6: _FIXED[0xce],      # bin
+    0xdc: _FIXED[0xcd], 0xdd: _FIXED[0xce],                          # array
+    0xde: _FIXED[0xcd], 0xdf: _FIXED[0xce],                          # map
+}
+
+
+def _unpack(data, pos):
+    tag = data[pos]
+    pos += 1
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xe0:
+        return tag - 0x100, pos
+    if 0xa0 <= tag < 0xc0:
+        end = pos + (tag & 0x1f)
+        return str(data[pos:end], 'utf-8'), end
+    if 0x90 <= tag < 0xa0:
+        return _unpack_array(data, pos, tag & 0x0f)
+    if 0x80 <= tag < 0x90:
+        return _unpack_map(data, pos, tag & 0x0f)
+    if tag == 0xc0:
+        return None, pos
+    if tag == 0xc2:
+        return False, pos
+    if tag == 0xc3:
+        return True, pos
+    fixed = _FIXED.get(tag)
+    if fixed is not None:
+        unpack_from, size = fixed
+        return unpack_from(data, pos)[0], pos + size
+    length = _LENGTH.get(tag)
+    if length is None:
+        raise ValueError(f"未知的类型头: 0x{tag:02x}")
+    unpack_from, size = length
+    n = unpack_from(data, pos)[0]
+    pos += size
+    if tag in (0xd9, 0xda, 0xdb):
+        return str(data[pos:pos + n], 'utf-8'), pos + n
+    if tag in (0xc4, 0xc5, 0xc6):
+        return bytes(data[pos:pos + n]), pos + n
+    if tag in (0xdc, 0xdd):
+        return _unpack_array(data, pos, n)
+    return _unpack_map(data, pos, n)
+
+
+def _unpack_array(data, pos, n):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data, pos, n):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        value, pos = _unpack(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def unpack(data):
+    """解码一个完整的字节串；数组统一解码为 list。"""
+    try:
+        obj, pos = _unpack(data, 0)
+    except (IndexError, struct.error) as error:
+        raise ValueError("数据不完整") from error
+    if pos != len(data):
+        raise ValueError("数据末尾有多余字节")
+    return obj
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import json
+    import time
+
+    print("--- 开始二进制编码单元测试 ---")
+    samples = [None, True, False, 0, 127, -1, -33, 300, -70000, 2 ** 40, 3.5, "", "空调",
+               "x" * 40, [], [1, [2, "三"]], {"a": 1, "车窗": [0, 50]}, b"\x00\x01", list(range(20))]
+    for sample in samples:
+        assert unpack(pack(sample)) == sample, sample
+    print(f"  {len(samples)} 个样例往返编码一致")
+
+    batch = [[0, 3, [24]], [0, 0, []], [1, "navigation.plan_route", ["紫菘", "西十二"]]] * 100
+    start = time.perf_counter()
+    for _ in range(100):
+        unpack(pack(batch))
+    elapsed = time.perf_counter() - start
+    size = len(pack(batch))
+    print(f"  300条命令: 编码 {size} 字节 (JSON {len(json.dumps(batch).encode())} 字节), "
+          f"编解码 {elapsed / 100 * 1e6 / 300:.2f} 微秒/条")
+    print("--- 二进制编码单元测试结束 ---")
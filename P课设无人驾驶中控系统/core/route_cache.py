@@ -0,0 +1,81 @@
+# core/route_cache.py
+
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    有容量上限的LRU路线缓存。
+    键为 (起点, 终点, 图版本)，值为 (距离, 节点编号路径)。
+    同时维护"边 -> 使用该边的缓存键"的反向索引，
+    边权变化时只需淘汰经过该边的路线。
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_edge = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """查询缓存，命中时把条目移到最近使用的位置。"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, distance, path):
+        if self.capacity <= 0:
+            return
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (distance, path)
+        for edge in self._edges(path):
+            self._by_edge.setdefault(edge, set()).add(key)
+        while len(self._entries) > self.capacity:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def invalidate_edge(self, edge, version):
+        """淘汰经过 edge 的路线，其余条目迁移到新的图版本下。"""
+        for key in list(self._by_edge.get(edge, ())):
+            self._discard(key)
+        entries = self._entries
+        self._entries = OrderedDict()
+        self._by_edge = {}
+        for (start, end, _), (distance, path) in entries.items():
+            self.put((start, end, version), distance, path)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_edge.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "capacity": self.capacity,
+        }
+
+    def _discard(self, key):
+        distance, path = self._entries.pop(key)
+        for edge in self._edges(path):
+            keys = self._by_edge.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_edge[edge]
+
+    @staticmethod
+    def _edges(path):
+        return zip(path, path[1:]) if path else ()
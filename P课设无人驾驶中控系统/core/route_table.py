@@ -0,0 +1,106 @@
+# core/route_table.py
+
+import mmap
+import os
+import struct
+from array import array
+
+from core.graph import dijkstra, INF
+from core.utils import data_path
+
+# 文件格式（小端）:
+#   头部  : 魔数 b'RTBL' | 版本 u32 | 节点数 n u32 | map.json 的SHA-256 (32字节)
+#   距离表: n*n 个 float64，dist[s*n+t]
+#   下一跳: n*n 个 int32，  next[s*n+t] 为从 s 去往 t 的第一个节点，-1 表示不可达
+MAGIC = b'RTBL'
+VERSION = 1
+HEADER = struct.Struct('<4sII32s')
+
+
+class RouteTable:
+    """
+    全源最短路的距离表与下一跳表。
+    表以紧凑的二进制文件缓存在 data 文件夹中，启动时用mmap映射，
+    查询路径只需沿下一跳表走 O(路径长度) 步。
+    """
+
+    def __init__(self, n, dist, next_hop):
+        self.n = n
+        self.dist = dist            # 支持下标访问的 float64 序列
+        self.next_hop = next_hop    # 支持下标访问的 int32 序列
+        self._source = None         # 映射模式下保存文件、mmap及其视图，直到 close()
+
+    @classmethod
+    def build(cls, g, rg):
+        """对每个终点在反向图上跑一次Dijkstra，得到整列的距离和下一跳。"""
+        n = len(g)
+        dist = array('d', [INF]) * (n * n)
+        next_hop = array('i', [-1]) * (n * n)
+        for t in range(n):
+            to_t, toward_t = dijkstra(rg, t)
+            for s in range(n):
+                dist[s * n + t] = to_t[s]
+                next_hop[s * n + t] = toward_t[s]
+        return cls(n, dist, next_hop)
+
+    def save(self, filename, map_hash):
+        """写入临时文件后原子替换，避免其他进程映射到写了一半的表。"""
+        path = data_path(filename)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.n, bytes.fromhex(map_hash)))
+            array('d', self.dist).tofile(f)
+            array('i', self.next_hop).tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, filename, map_hash, n):
+        """映射缓存文件；文件缺失、损坏或与当前地图不匹配时返回 None。"""
+        path = data_path(filename)
+        if not os.path.exists(path):
+            return None
+        f = open(path, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:      # 空文件
+            f.close()
+            return None
+        size = HEADER.size + n * n * (8 + 4)
+        header = HEADER.unpack_from(mm, 0) if len(mm) == size else None
+        if header != (MAGIC, VERSION, n, bytes.fromhex(map_hash)):
+            mm.close()
+            f.close()
+            return None
+        dist_end = HEADER.size + n * n * 8
+        dist_bytes = memoryview(mm)[HEADER.size:dist_end]
+        next_bytes = memoryview(mm)[dist_end:]
+        table = cls(n, dist_bytes.cast('d'), next_bytes.cast('i'))
+        table._source = (f, mm, dist_bytes, next_bytes)
+        return table
+
+    def distance(self, s, t):
+        return self.dist[s * self.n + t]
+
+    def path(self, s, t):
+        """沿下一跳表走出 s 到 t 的节点编号路径，不可达时返回 None。"""
+        if s == t:
+            return [s]
+        n, next_hop = self.n, self.next_hop
+        if next_hop[s * n + t] < 0:
+            return None
+        path = [s]
+        current = s
+        while current != t:
+            current = next_hop[current * n + t]
+            path.append(current)
+        return path
+
+    def close(self):
+        """释放内存映射。"""
+        if self._source is not None:
+            f, mm, dist_bytes, next_bytes = self._source
+            for view in (self.dist, self.next_hop, dist_bytes, next_bytes):
+                view.release()
+            mm.close()
+            f.close()
+            self._source = None
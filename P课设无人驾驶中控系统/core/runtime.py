@@ -0,0 +1,267 @@
+# core/runtime.py
+
+import asyncio
+import contextlib
+import io
+
+from core.simulation import Simulation
+
+
+class VehicleRuntime:
+    """
+    asyncio 运行时：在一个事件循环里同时驱动任意多辆车，不为每辆车开线程。
+    后台时钟任务按墙钟流逝的时间（乘以 speedup）推进仿真引擎，充电、空调和
+    导航行驶都在仿真 tick 中前进；耗时操作以 wait_until 挂起等待条件成立，
+    期间事件循环可以继续处理其它车辆的命令和仪表盘刷新。
+    """
+
+    def __init__(self, simulation=None, interval=0.05, speedup=1.0):
+        self.simulation = simulation or Simulation(step=0.1)
+        self.interval = interval        # 时钟任务的唤醒间隔（墙钟秒）
+        self.speedup = speedup          # 虚拟时间相对墙钟的倍速
+        self._waiters = []              # [(条件函数, future)]
+        self._tasks = set()
+        self._clock = None
+
+    def add(self, vehicle, quiet=False):
+        """接入一辆车，返回它的异步控制接口。"""
+        vehicle.attach(self.simulation)
+        return AsyncVehicle(self, vehicle, quiet)
+
+    def add_fleet(self, fleet, quiet=True):
+        """
+        接入一个车队：车队整体由 Fleet.tick 以数组运算推进，
+        返回每辆车视图的异步控制接口列表。
+        """
+        self.simulation.register(fleet)
+        return [AsyncVehicle(self, fleet[i], quiet) for i in range(len(fleet))]
+
+    # --- 生命周期 ---
+
+    def start(self):
+        if self._clock is None:
+            self._clock = asyncio.get_running_loop().create_task(self._run_clock())
+        return self
+
+    async def stop(self):
+        tasks = [self._clock, *self._tasks] if self._clock else list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._clock = None
+        self._tasks.clear()
+        for _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _run_clock(self):
+        loop = asyncio.get_running_loop()
+        wall_start = loop.time()
+        sim_start = self.simulation.now
+        while True:
+            await asyncio.sleep(self.interval)
+            # 按绝对目标时间推进，步长取整造成的误差不会累积
+            target = sim_start + (loop.time() - wall_start) * self.speedup
+            if target > self.simulation.now:
+                self.simulation.run(duration=target - self.simulation.now)
+            self._check_waiters()
+
+    def _check_waiters(self):
+        pending = []
+        for predicate, future in self._waiters:
+            if future.done():
+                continue
+            try:
+                if predicate():
+                    future.set_result(True)
+                    continue
+            except Exception as error:      # 条件函数出错时唤醒等待者并抛给它
+                future.set_exception(error)
+                continue
+            pending.append((predicate, future))
+        self._waiters = pending
+
+    # --- 任务与等待 ---
+
+    def spawn(self, coroutine):
+        """把一个协程作为后台任务运行，运行时停止时一并取消。"""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def wait_until(self, predicate, timeout=None):
+        """挂起直到 predicate() 为真（每次仿真推进后检查），超时抛出 asyncio.TimeoutError。"""
+        if predicate():
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        return await asyncio.wait_for(future, timeout)
+
+    def every(self, interval, callback):
+        """后台周期任务：每 interval 秒（墙钟）调用一次 callback，如刷新仪表盘。"""
+        async def repeat():
+            while True:
+                callback()
+                await asyncio.sleep(interval)
+        return self.spawn(repeat())
+
+
+class _AsyncSubsystem:
+    """把子系统的同步方法包装成协程；每条命令执行后让出一次事件循环。"""
+
+    def __init__(self, owner, target):
+        self._owner = owner
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        async def command(*args, **kwargs):
+            result = self._owner._call(attr, *args, **kwargs)
+            await asyncio.sleep(0)
+            return result
+        command.__name__ = name
+        return command
+
+
+class AsyncVehicle:
+    """
+    Vehicle 的异步控制接口。
+    car.ac.set_temperature(22) 等子系统命令都是可 await 的，
+    charge / drive_to / condition_cabin 是持续一段时间的操作，
+    等待期间不阻塞事件循环，可以用 runtime.spawn 放到后台运行。
+    quiet=True 时不输出子系统的提示信息（批量驱动大量车辆时使用）。
+    """
+
+    def __init__(self, runtime, vehicle, quiet=False):
+        self.runtime = runtime
+        self.vehicle = vehicle
+        self.quiet = quiet
+        self.ac = _AsyncSubsystem(self, vehicle.ac)
+        self.battery = _AsyncSubsystem(self, vehicle.battery)
+        self.door_window = _AsyncSubsystem(self, vehicle.door_window)
+        self.light = _AsyncSubsystem(self, vehicle.light)
+
+    @property
+    def navigation(self):
+        # 车队视图的导航在首次访问时才加载地图
+        return _AsyncSubsystem(self, self.vehicle.navigation)
+
+    def _call(self, func, *args, **kwargs):
+        if not self.quiet:
+            return func(*args, **kwargs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+
+    async def toggle_engine(self):
+        result = self._call(self.vehicle.toggle_engine)
+        await asyncio.sleep(0)
+        return result
+
+    async def set_driving_mode(self, mode_index):
+        result = self._call(self.vehicle.set_driving_mode, mode_index)
+        await asyncio.sleep(0)
+        return result
+
+    async def charge(self, mode_index=None, timeout=None):
+        """开始充电并等待充到目标电量，返回最终电量。"""
+        battery = self.vehicle.battery
+        if mode_index is not None:
+            self._call(battery.set_mode, mode_index)
+        if not battery.is_charging:
+            self._call(battery.toggle_charging)
+        await self.runtime.wait_until(lambda: not battery.is_charging, timeout)
+        return battery.capacity
+
+    async def drive_to(self, start, end, timeout=None):
+        """规划路线并以自动驾驶模式行驶到终点，路线规划失败时返回 False。"""
+        vehicle = self.vehicle
+        navigation = vehicle.navigation
+        if not self._call(navigation.set_points, start, end):
+            return False
+        self._call(navigation.plan_route)
+        if not navigation.route:
+            return False
+        if not vehicle.engine_on:
+            self._call(vehicle.toggle_engine)
+        self._call(vehicle.set_driving_mode, 2)
+        await self.runtime.wait_until(lambda: navigation.arrived, timeout)
+        return True
+
+    async def condition_cabin(self, temp=None, tolerance=0.5, timeout=None, settle=300.0):
+        """
+        开启空调（可同时设定温度），等待车内温度进入设定值 ± tolerance，返回车内温度。
+        设定值达不到时（如车窗开着），车内温度在 settle 秒虚拟时间内变化不超过0.1°C
+        即视为已稳定，同样结束等待；调用方可以比较返回值与设定温度。
+        """
+        ac = self.vehicle.ac
+        simulation = self.runtime.simulation
+        if temp is not None:
+            self._call(ac.set_temperature, temp)
+        if not ac.is_on:
+            self._call(ac.turn_on)
+        mark = [ac.current_temp, simulation.now]     # 上次明显变化时的温度和时间
+
+        def conditioned():
+            current = ac.current_temp
+            if abs(current - ac.preset_temp) <= tolerance:
+                return True
+            if abs(current - mark[0]) > 0.1:
+                mark[:] = [current, simulation.now]
+                return False
+            return simulation.now - mark[1] >= settle
+
+        await self.runtime.wait_until(conditioned, timeout)
+        return ac.current_temp
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import time
+    import numpy as np
+    from core.fleet import Fleet
+    from core.vehicle import Vehicle
+
+    async def demo():
+        print("--- 开始异步运行时单元测试 ---")
+        async with VehicleRuntime(speedup=1200) as runtime:
+            car = runtime.add(Vehicle())
+            await car.battery.set_mode(1)
+            car.vehicle.battery.capacity = 40
+            car.vehicle.ac.current_temp = 30
+            await car.door_window.close_all_windows()
+
+            print("\n>>> 后台任务: 充电 + 空调调温，仪表盘每0.5秒刷新一次")
+            charging = runtime.spawn(car.charge())
+            cooling = runtime.spawn(car.condition_cabin(22))
+            runtime.every(0.5, lambda: print(
+                f"  [仪表盘] 虚拟时间 {runtime.simulation.now:6.1f}s  "
+                f"电量 {car.vehicle.battery.capacity:3d}%  "
+                f"车内 {car.vehicle.ac.current_temp:.1f}°C"))
+            print(f"  充电完成，电量 {await charging}%")
+            print(f"  调温完成，车内 {await cooling:.1f}°C")
+
+            print("\n>>> 后台任务: 自动驾驶从居民区到喻园大道-东九")
+            arrived = await car.drive_to("居民区", "喻园大道-东九")
+            print(f"  到达: {arrived}, 虚拟时间 {runtime.simulation.now:.0f}s")
+
+            print("\n>>> 同一事件循环并发驱动1000辆车队车辆充电")
+            fleet = Fleet(1000)
+            fleet.capacity[:] = np.arange(1000) % 60 + 20
+            cars = runtime.add_fleet(fleet)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(c.charge(mode_index=2) for c in cars))
+            print(f"  {len(results)} 辆车充电完成，最低电量 {min(results)}%，"
+                  f"墙钟耗时 {time.perf_counter() - start:.1f} 秒")
+        print("--- 异步运行时单元测试结束 ---")
+
+    asyncio.run(demo())
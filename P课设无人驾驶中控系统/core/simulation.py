@@ -0,0 +1,107 @@
+# core/simulation.py
+
+import heapq
+import itertools
+import time
+
+
+class VirtualClock:
+    """仿真用的虚拟时钟，单位为秒，只在仿真推进时前进。"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def advance(self, dt):
+        self.now += dt
+        return self.now
+
+
+class Simulation:
+    """
+    定步长 + 离散事件的仿真引擎。
+    参与者（车辆、车队等）通过 register 登记，需实现 tick(dt, now) 方法，
+    每一步按登记顺序被调用一次；schedule 可以安排在某个虚拟时刻触发的一次性事件。
+    realtime=True 时按墙钟速度推进（可用 speedup 加速），否则尽可能快地运行，
+    用于在几秒内仿真数天的车队运行。
+    """
+
+    def __init__(self, step=0.1, realtime=False, speedup=1.0):
+        self.step_size = step
+        self.realtime = realtime
+        self.speedup = speedup
+        self.clock = VirtualClock()
+        self.steps = 0
+        self._participants = []
+        self._events = []
+        self._sequence = itertools.count()
+
+    @property
+    def now(self):
+        return self.clock.now
+
+    def register(self, participant):
+        if participant not in self._participants:
+            self._participants.append(participant)
+        return participant
+
+    def unregister(self, participant):
+        if participant in self._participants:
+            self._participants.remove(participant)
+
+    def schedule(self, delay, callback, *args):
+        """安排 delay 秒（虚拟时间）后调用 callback(*args)。"""
+        heapq.heappush(self._events, (self.now + delay, next(self._sequence), callback, args))
+
+    def step(self):
+        """推进一个时间步：先触发到期事件，再让所有参与者前进 dt。"""
+        dt = self.step_size
+        end = self.now + dt
+        while self._events and self._events[0][0] <= end:
+            _, _, callback, args = heapq.heappop(self._events)
+            callback(*args)
+        self.clock.advance(dt)
+        for participant in list(self._participants):
+            participant.tick(dt, self.now)
+        self.steps += 1
+
+    def run(self, duration=None, until=None):
+        """
+        运行 duration 秒虚拟时间，或直到 until() 返回真。
+        两者都不给时运行到没有参与者和待触发事件为止。
+        """
+        end = self.now + duration if duration is not None else None
+        wall_start = time.perf_counter()
+        sim_start = self.now
+        while True:
+            if end is not None and self.now >= end - 1e-9:
+                break
+            if until is not None and until():
+                break
+            if end is None and until is None and not self._participants and not self._events:
+                break
+            self.step()
+            if self.realtime:
+                lag = (self.now - sim_start) / self.speedup - (time.perf_counter() - wall_start)
+                if lag > 0:
+                    time.sleep(lag)
+        return self.now
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    print("--- 开始仿真引擎单元测试 ---")
+    from core.fleet import Fleet
+
+    fleet = Fleet(10000)
+    fleet.capacity[:] = 20
+    fleet.is_charging[::2] = True
+    sim = Simulation(step=1.0)
+    sim.register(fleet)
+
+    print("\n>>> 操作: 尽可能快地仿真车队运行2天")
+    start = time.perf_counter()
+    sim.run(duration=2 * 24 * 3600)
+    elapsed = time.perf_counter() - start
+    print(f"  虚拟时间: {sim.now / 3600:.0f} 小时, 步数: {sim.steps}, 耗时: {elapsed:.2f} 秒")
+    print(f"  车队统计: {fleet.summary()}")
+    print("--- 仿真引擎单元测试结束 ---")
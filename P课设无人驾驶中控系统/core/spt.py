@@ -0,0 +1,105 @@
+# core/spt.py
+
+import heapq
+
+from core.graph import dijkstra, extract_path, INF
+
+
+class ShortestPathTree:
+    """
+    以某个起点为根的完整最短路树，支持边权变化后的增量修复。
+    边权变小时只从受益的终点向外松弛；边权变大且该边在树上时，
+    只把以终点为根的子树重置，再从子树外的入边重新接回。
+    未受影响的节点保持不动，修复代价与受影响区域的大小成正比。
+    """
+
+    def __init__(self, g, rg, source):
+        self.g = g              # 正向图，修复时沿出边松弛
+        self.rg = rg            # 反向图，修复时查找受影响节点的入边
+        self.source = source
+        self.dist, self.parent = dijkstra(g, source)
+        self.last_touched = len(g)
+
+    def distance(self, target):
+        return self.dist[target]
+
+    def path_to(self, target):
+        if self.dist[target] == INF:
+            return None
+        return extract_path(self.parent, self.source, target)
+
+    def update_edge(self, u, v, old_weight, new_weight):
+        """
+        边 u->v 的权重已在 g 和 rg 中由 old_weight 改为 new_weight，修复最短路树。
+        返回本次修复重新计算的节点数。
+        """
+        dist, parent = self.dist, self.parent
+        if new_weight < old_weight:
+            candidate = dist[u] + new_weight
+            if candidate >= dist[v]:
+                self.last_touched = 0
+                return 0
+            dist[v] = candidate
+            parent[v] = u
+            self.last_touched = self._propagate([(candidate, v)])
+            return self.last_touched
+
+        if new_weight == old_weight or parent[v] != u:
+            self.last_touched = 0          # 非树边变长，不影响任何最短路
+            return 0
+
+        # 1. 收集以 v 为根的子树，这些节点的最短路都经过了变长的边
+        affected = self._subtree(v)
+        for x in affected:
+            dist[x] = INF
+            parent[x] = -1
+
+        # 2. 从子树外的入边给每个受影响节点一个初始距离
+        offsets, sources, weights = self.rg.offsets, self.rg.targets, self.rg.weights
+        heap = []
+        for x in affected:
+            best, best_parent = INF, -1
+            for e in range(offsets[x], offsets[x + 1]):
+                y = sources[e]
+                candidate = dist[y] + weights[e]
+                if candidate < best:
+                    best, best_parent = candidate, y
+            if best < INF:
+                dist[x] = best
+                parent[x] = best_parent
+                heap.append((best, x))
+        heapq.heapify(heap)
+
+        # 3. 在受影响区域内继续Dijkstra
+        self.last_touched = len(affected) + self._propagate(heap)
+        return self.last_touched
+
+    def _subtree(self, root):
+        offsets, targets, parent = self.g.offsets, self.g.targets, self.parent
+        subtree = [root]
+        for node in subtree:
+            for e in range(offsets[node], offsets[node + 1]):
+                child = targets[e]
+                if parent[child] == node and child != root:
+                    subtree.append(child)
+        return subtree
+
+    def _propagate(self, heap):
+        """从堆中的节点出发做只接受改进的松弛，返回出堆的节点数。"""
+        dist, parent = self.dist, self.parent
+        offsets, targets, weights = self.g.offsets, self.g.targets, self.g.weights
+        heappush, heappop = heapq.heappush, heapq.heappop
+        popped = 0
+        while heap:
+            d, x = heappop(heap)
+            if d > dist[x]:
+                continue
+            popped += 1
+            for e in range(offsets[x], offsets[x + 1]):
+                z = targets[e]
+                nd = d + weights[e]
+                if nd < dist[z]:
+                    dist[z] = nd
+                    parent[z] = x
+                    heappush(heap, (nd, z))
+        return popped
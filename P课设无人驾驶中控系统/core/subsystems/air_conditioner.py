@@ -1,10 +1,22 @@
 # core/subsystems/air_conditioner.py
-from core.utils import load_data, save_data
+from core.utils import load_state, record_state
+
+try:
+    from core.climate import ZONES, CabinClimate
+except ImportError:     # 未安装NumPy时退回单温区的简单温度漂移
+    CabinClimate = None
 
 class AirConditioner:
+    MODES = ["auto", "manual"]
+    events = None       # 所属车辆的事件总线，由 Vehicle 装配
+    AMBIENT_TEMP = 30       # 车外环境温度 (°C)
+    AMBIENT_HUMIDITY = 70   # 车外相对湿度 (%)
+    DRIFT_RATE = 0.01       # 无气候模型时，车内温度每秒向目标温度靠近的比例
+    CLIMATE_STEP = 1.0      # 气候模型的推进间隔 (s)，仿真步长更小时累计后再推进
+
     def __init__(self):
         # 初始化时加载状态，如果文件不存在则使用默认值
-        initial_state = load_data('ac.json') or {
+        initial_state = load_state('ac') or {
             "is_on": False,
             "mode": "auto",  # auto, manual
             "preset_temp": 24,
@@ -16,7 +28,10 @@ class AirConditioner:
         self.mode = initial_state['mode']
         self.preset_temp = initial_state['preset_temp']
         self.current_temp = initial_state['current_temp']
-        # ... 其他属性
+        self.preset_humidity = initial_state.get('preset_humidity', 50)
+        self.current_humidity = initial_state.get('current_humidity', 45)
+        self._climate = None    # 多温区气候模型，首次 tick 时按当前温湿度创建
+        self._climate_elapsed = 0.0
 
     def turn_on(self):
         """开启空调"""
@@ -31,27 +46,97 @@ class AirConditioner:
         self.save_state()
 
     def set_temperature(self, temp):
-        """设置温度"""
+        """设置温度，返回设置是否有效。"""
         if 16 <= temp <= 30:
             self.preset_temp = temp
             print(f"空调温度已设置为: {self.preset_temp}°C")
             self.save_state()
+            return True
+        print("温度设置无效。")
+        return False
+
+    def set_humidity(self, humidity):
+        """设置目标湿度（auto 模式下生效），返回设置是否有效。"""
+        if 30 <= humidity <= 70:
+            self.preset_humidity = humidity
+            print(f"空调湿度已设置为: {self.preset_humidity}%")
+            self.save_state()
+            return True
+        print("湿度设置无效。")
+        return False
+
+    def set_mode(self, mode):
+        """切换 auto / manual 模式，返回设置是否有效。"""
+        if mode in self.MODES:
+            self.mode = mode
+            print(f"空调模式已切换为: {self.mode}")
+            self.save_state()
+            return True
+        print("无效的空调模式。")
+        return False
+
+    def tick(self, dt, now=None, windows=None):
+        """
+        仿真时钟推进 dt 秒时调用，由多温区气候模型推进车内温湿度
+        （见 core/climate.py）。windows 为 {车窗位置: 打开程度}，打开的车窗会加快
+        对应温区与车外的换热。温度或湿度每变化0.1记录一次状态。
+        """
+        self._climate_elapsed += dt
+        if self._climate_elapsed < self.CLIMATE_STEP:
+            return
+        dt, self._climate_elapsed = self._climate_elapsed, 0.0
+        previous = (round(self.current_temp, 1), round(self.current_humidity, 1))
+        if CabinClimate is None:
+            target = self.preset_temp if self.is_on else self.AMBIENT_TEMP
+            factor = min(1.0, self.DRIFT_RATE * dt)
+            self.current_temp += (target - self.current_temp) * factor
         else:
-            print("温度设置无效。")
-    
-    def display_status(self, show_header=True):
-        """显示当前状态 (代替C的绘图函数)"""
+            if self._climate is None:
+                self._climate = CabinClimate(1, temp=self.current_temp,
+                                             humidity=self.current_humidity)
+            window_open = 0.0
+            if windows:
+                window_open = [[windows.get(zone, 0) / 100 for zone in ZONES]]
+            self._climate.step(dt, self.is_on, self.mode == "auto", self.preset_temp,
+                               self.preset_humidity, self.AMBIENT_TEMP, self.AMBIENT_HUMIDITY,
+                               window_open)
+            self.current_temp = float(self._climate.mean_temp()[0])
+            self.current_humidity = float(self._climate.mean_humidity()[0])
+        if (round(self.current_temp, 1), round(self.current_humidity, 1)) != previous:
+            self.save_state()
+
+    def power(self):
+        """空调当前电功率 (kW)，无气候模型时为0。"""
+        return float(self._climate.power_kw[0]) if self._climate is not None else 0.0
+
+    def status_lines(self, show_header=True):
+        """返回空调状态的各行文本"""
         status = "开启" if self.is_on else "关闭"
+        lines = ["", "--- 空调状态 ---"] if show_header else []
+        lines.append(f"  状态: {status}")
+        lines.append(f"  模式: {self.mode}")
+        lines.append(f"  设定温度: {self.preset_temp}°C  设定湿度: {self.preset_humidity}%")
+        lines.append(f"  车内温度: {self.current_temp:.1f}°C  车内湿度: {self.current_humidity:.1f}%")
         if show_header:
-            print(f"\n--- 空调状态 ---")
-        print(f"  状态: {status}")
-        print(f"  模式: {self.mode}")
-        print(f"  设定温度: {self.preset_temp}°C")
-        if show_header:
-            print(f"------------------")
+            lines.append("------------------")
+        return lines
+
+    def display_status(self, show_header=True):
+        """显示当前状态 (代替C的绘图函数)"""
+        print("\n".join(self.status_lines(show_header)))
 
 
     def save_state(self):
         """保存当前状态到文件"""
-        state = self.__dict__ # 使用__dict__可以方便地获取所有实例属性
-        save_data(state, 'ac.json')
\ No newline at end of file
+        state = {
+            "is_on": self.is_on,
+            "mode": self.mode,
+            "preset_temp": self.preset_temp,
+            "current_temp": round(self.current_temp, 1),
+            "preset_humidity": self.preset_humidity,
+            "current_humidity": round(self.current_humidity, 1)
+        }
+        if self.events is not None:
+            self.events.publish('ac', state)   # 由车辆的持久化消费者按 tick 合并写入
+        else:
+            record_state('ac', state)
\ No newline at end of file
@@ -1,7 +1,12 @@
 # core/subsystems/battery.py
 
 import time
-from core.utils import load_data, save_data
+from core.utils import load_state, record_state
+
+try:
+    from core.charge_model import ChargeCurve
+except ImportError:     # 未安装NumPy时退回按 CHARGE_RATE 线性充电
+    ChargeCurve = None
 
 class Battery:
     """
@@ -13,12 +18,14 @@ class Battery:
         1: "电池充满模式",
         2: "电池养护模式"
     }
+    CHARGE_RATE = 10    # 无充电曲线时的充电速度 (%/秒)，与阻塞式模拟每0.1秒充1%一致
+    events = None       # 所属车辆的事件总线，由 Vehicle 装配
 
     def __init__(self):
         """初始化电池系统，从文件加载状态或使用默认值。"""
         print("初始化电池系统中...")
-        # 优先从 a.json 加载状态
-        initial_state = load_data('battery.json')
+        # 优先从状态存储加载状态
+        initial_state = load_state('battery')
         if initial_state:
             self.capacity = initial_state.get('capacity', 80)
             self.mode_index = initial_state.get('mode_index', 1)
@@ -34,11 +41,15 @@ class Battery:
             self.mode_index = 1
             
         self.mode = self.MODES[self.mode_index]
+        self.simulation = None          # 接入仿真引擎后充电由时钟推进，不再阻塞
+        self._charge_progress = 0.0     # 不足1%的充电量累计
+        # 仿真充电按CC/CV曲线推进，与 Fleet.charge_plan 的充电时间估计一致
+        self.charge_curve = ChargeCurve() if ChargeCurve is not None else None
         print("电池系统初始化完成。")
 
     def set_mode(self, mode_index):
         """
-        设置充电模式。
+        设置充电模式，返回设置是否有效。
         对应C代码中BatteryMouse函数里对模式的选择。
         """
         if mode_index in self.MODES:
@@ -46,8 +57,9 @@ class Battery:
             self.mode = self.MODES[mode_index]
             print(f"电池模式已切换为: {self.mode}")
             self.save_state()
-        else:
-            print(f"错误：无效的模式索引 {mode_index}")
+            return True
+        print(f"错误：无效的模式索引 {mode_index}")
+        return False
 
     def toggle_charging(self):
         """
@@ -57,12 +69,55 @@ class Battery:
         self.is_charging = not self.is_charging
         if self.is_charging:
             print("电池开始充电...")
-            self.simulate_charging_cycle()
+            if self.simulation is None:
+                self.simulate_charging_cycle()
+            else:
+                print(f"充电目标: {self.target_capacity()}%")
         else:
             # 在实际应用中，手动停止充电的逻辑会在这里
             print("充电已手动停止。")
         self.save_state()
 
+    def target_capacity(self):
+        """当前模式下的充电目标电量。"""
+        return 100 if self.mode_index == 1 else 80
+
+    def tick(self, dt, now=None):
+        """
+        仿真时钟推进 dt 秒时调用：充电中按CC/CV充电曲线增加电量
+        （未安装NumPy时按 CHARGE_RATE 线性增加），达到目标后自动停止充电；
+        开始时已高于目标则直接停止，电量不变。
+        曲线在CV段只能渐近100%，电量到达曲线的截止电量 full_soc 即视为充满。
+        """
+        if not self.is_charging:
+            return
+        target_capacity = self.target_capacity()
+        if self.capacity >= target_capacity:
+            print("电量已达到或超过目标，无需充电。")
+            self.is_charging = False
+            self._charge_progress = 0.0
+            self.save_state()
+            return
+        soc = self.capacity + self._charge_progress
+        if self.charge_curve is None:
+            soc += self.CHARGE_RATE * dt
+            full = target_capacity
+        else:
+            soc = float(self.charge_curve.soc_after(soc, dt))
+            full = min(target_capacity, self.charge_curve.full_soc)
+        if soc < full:
+            gained = int(soc) - self.capacity
+            self._charge_progress = soc - int(soc)
+            if gained:
+                self.capacity += gained
+                self.save_state()
+        else:
+            self.capacity = target_capacity
+            self.is_charging = False
+            self._charge_progress = 0.0
+            print(f"\n充电完成！当前电量: {self.capacity}%")
+            self.save_state()
+
     def simulate_charging_cycle(self):
         """
         模拟充电过程。
@@ -71,7 +126,7 @@ class Battery:
         if not self.is_charging:
             return
 
-        target_capacity = 100 if self.mode_index == 1 else 80
+        target_capacity = self.target_capacity()
         print(f"充电目标: {target_capacity}%")
 
         if self.capacity >= target_capacity:
@@ -89,35 +144,42 @@ class Battery:
         print(f"\n充电完成！当前电量: {self.capacity}%")
         self.save_state()
         
-    def display_status(self, show_header=True):
-        """
-        显示当前电池状态。
-        代替C代码中所有Draw...函数，用文本方式呈现信息。
-        """
-        if show_header:
-            print("\n--- 电池状态 ---")
-        
+    def status_lines(self, show_header=True):
+        """返回电池状态的各行文本，供 display_status 和仪表盘渲染器使用。"""
+        lines = ["", "--- 电池状态 ---"] if show_header else []
+
         charge_status = "正在充电" if self.is_charging else "未充电"
-        
+
         # 制作一个简单的文本进度条（使用ASCII字符以避免控制台编码问题）
         progress = int(self.capacity / 10)
         bar = '#' * progress + '.' * (10 - progress)
 
-        print(f"  电量: |{bar}| {self.capacity}%")
-        print(f"  模式: {self.mode}")
-        print(f"  状态: {charge_status}")
-        
+        lines.append(f"  电量: |{bar}| {self.capacity}%")
+        lines.append(f"  模式: {self.mode}")
+        lines.append(f"  状态: {charge_status}")
+
         if show_header:
-            print("------------------")
+            lines.append("------------------")
+        return lines
+
+    def display_status(self, show_header=True):
+        """
+        显示当前电池状态。
+        代替C代码中所有Draw...函数，用文本方式呈现信息。
+        """
+        print("\n".join(self.status_lines(show_header)))
 
     def save_state(self):
-        """将当前电池状态保存到 a.json 文件。"""
+        """将当前电池状态记录到状态日志。"""
         state = {
             "capacity": self.capacity,
             "mode_index": self.mode_index,
             "is_charging": self.is_charging
         }
-        save_data(state, 'battery.json')
+        if self.events is not None:
+            self.events.publish('battery', state)   # 由车辆的持久化消费者按 tick 合并写入
+        else:
+            record_state('battery', state)
 
 # --- 单元测试 ---
 # 这个部分的代码只有在直接运行 battery.py 时才会执行
@@ -125,7 +187,7 @@ class Battery:
 if __name__ == '__main__':
     print("--- 开始电池模块单元测试 ---")
     
-    # 1. 创建一个电池对象，它会自动从 a.json 加载状态
+    # 1. 创建一个电池对象，它会自动从状态存储加载状态
     my_battery = Battery()
     
     # 2. 显示初始状态
@@ -142,5 +204,29 @@ if __name__ == '__main__':
     my_battery.toggle_charging() 
     
     # 5. 充电完成后，显示最终状态
-    print("\n--- 电池模块单元测试结束 ---")
-    my_battery.display_status()
\ No newline at end of file
+    my_battery.display_status()
+
+    # 6. 由仿真时钟推进充电时，高于目标电量开始充电不会把电量降到目标
+    print("\n>>> 校验: 养护模式下从95%开始充电，推进一次时钟")
+    saved = my_battery.capacity
+    my_battery.capacity = 95
+    my_battery.is_charging = True
+    my_battery.tick(0.1)
+    assert my_battery.capacity == 95 and not my_battery.is_charging
+    print(f"  电量仍为 {my_battery.capacity}%，已停止充电")
+
+    # 7. 仿真充电的耗时与充电曲线的估计一致
+    if my_battery.charge_curve is not None:
+        print("\n>>> 校验: 养护模式下从20%充到80%，每次推进1秒")
+        my_battery.capacity = 20
+        my_battery.is_charging = True
+        elapsed = 0
+        while my_battery.is_charging:
+            my_battery.tick(1.0)
+            elapsed += 1
+        expected = float(my_battery.charge_curve.time_to_target(20, 80))
+        assert abs(elapsed - expected) <= 1, (elapsed, expected)
+        print(f"  仿真耗时 {elapsed} 秒，充电曲线估计 {expected:.0f} 秒")
+    my_battery.capacity = saved
+    my_battery.save_state()
+    print("\n--- 电池模块单元测试结束 ---")
\ No newline at end of file
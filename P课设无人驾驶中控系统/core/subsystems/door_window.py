@@ -1,16 +1,17 @@
 # core/subsystems/door_window.py
 
-from core.utils import load_data, save_data
+from core.utils import load_state, record_state
 
 class DoorWindow:
     """负责管理车辆门窗系统的类。"""
 
     WINDOW_POSITIONS = ["front_left", "front_right", "rear_left", "rear_right"]
+    events = None       # 所属车辆的事件总线，由 Vehicle 装配
 
     def __init__(self):
         """初始化门窗系统，从文件加载状态。"""
         print("初始化门窗系统中...")
-        initial_state = load_data('door_window.json') or {
+        initial_state = load_state('door_window') or {
             "doors_locked": True,
             "windows_status": {pos: 0 for pos in self.WINDOW_POSITIONS}
         }
@@ -27,17 +28,18 @@ class DoorWindow:
         return self.doors_locked
 
     def set_window_level(self, position, level):
-        """设置单个车窗的打开程度 (0-100)。"""
+        """设置单个车窗的打开程度 (0-100)，返回设置是否有效。"""
         if position not in self.WINDOW_POSITIONS:
             print(f"错误：无效的车窗位置 '{position}'")
-            return
+            return False
         if not 0 <= level <= 100:
             print("错误：车窗打开程度必须在 0 到 100 之间。")
-            return
+            return False
             
         self.windows_status[position] = level
         print(f"{position} 车窗已设置为 {level}% 打开。")
         self.save_state()
+        return True
 
     def close_all_windows(self):
         """一键关闭所有车窗。"""
@@ -46,17 +48,21 @@ class DoorWindow:
         print("所有车窗已关闭。")
         self.save_state()
 
-    def display_status(self, show_header=True):
-        """显示当前门窗状态。"""
-        if show_header:
-            print("\n--- 门窗状态 ---")
+    def status_lines(self, show_header=True):
+        """返回门窗状态的各行文本。"""
+        lines = ["", "--- 门窗状态 ---"] if show_header else []
         lock_status = "已上锁" if self.doors_locked else "已解锁"
-        print(f"  车门锁: {lock_status}")
-        print("  车窗状态:")
+        lines.append(f"  车门锁: {lock_status}")
+        lines.append("  车窗状态:")
         for pos, level in self.windows_status.items():
-            print(f"    - {pos}: {level}% 打开")
+            lines.append(f"    - {pos}: {level}% 打开")
         if show_header:
-            print("------------------")
+            lines.append("------------------")
+        return lines
+
+    def display_status(self, show_header=True):
+        """显示当前门窗状态。"""
+        print("\n".join(self.status_lines(show_header)))
 
     def save_state(self):
         """将当前状态保存到文件。"""
@@ -64,7 +70,10 @@ class DoorWindow:
             "doors_locked": self.doors_locked,
             "windows_status": self.windows_status
         }
-        save_data(state, 'door_window.json')
+        if self.events is not None:
+            self.events.publish('door_window', state)   # 由车辆的持久化消费者按 tick 合并写入
+        else:
+            record_state('door_window', state)
 
 # --- 单元测试 ---
 if __name__ == '__main__':
@@ -1,16 +1,17 @@
 # core/subsystems/light.py
 
-from core.utils import load_data, save_data
+from core.utils import load_state, record_state
 
 class Light:
     """负责管理车辆照明系统的类。"""
     
     MAX_INTERIOR_LEVEL = 5
+    events = None       # 所属车辆的事件总线，由 Vehicle 装配
 
     def __init__(self):
         """初始化照明系统，从文件加载状态。"""
         print("初始化照明系统中...")
-        initial_state = load_data('light.json') or {
+        initial_state = load_state('light') or {
             "headlights_on": False,
             "fog_lights_on": False,
             "interior_light_level": 2
@@ -35,25 +36,30 @@ class Light:
         self.save_state()
 
     def set_interior_light_level(self, level):
-        """设置车内灯光亮度。"""
+        """设置车内灯光亮度，返回设置是否有效。"""
         if 0 <= level <= self.MAX_INTERIOR_LEVEL:
             self.interior_light_level = level
             print(f"车内灯光亮度已设置为: {level}")
             self.save_state()
-        else:
-            print(f"错误：无效的亮度等级 (0-{self.MAX_INTERIOR_LEVEL})。")
+            return True
+        print(f"错误：无效的亮度等级 (0-{self.MAX_INTERIOR_LEVEL})。")
+        return False
 
-    def display_status(self, show_header=True):
-        """显示当前照明状态。"""
-        if show_header:
-            print("\n--- 照明状态 ---")
+    def status_lines(self, show_header=True):
+        """返回照明状态的各行文本。"""
+        lines = ["", "--- 照明状态 ---"] if show_header else []
         headlight_status = "开启" if self.headlights_on else "关闭"
         fog_light_status = "开启" if self.fog_lights_on else "关闭"
-        print(f"  前大灯: {headlight_status}")
-        print(f"  雾灯: {fog_light_status}")
-        print(f"  车内灯亮度: {self.interior_light_level}/{self.MAX_INTERIOR_LEVEL}")
+        lines.append(f"  前大灯: {headlight_status}")
+        lines.append(f"  雾灯: {fog_light_status}")
+        lines.append(f"  车内灯亮度: {self.interior_light_level}/{self.MAX_INTERIOR_LEVEL}")
         if show_header:
-            print("------------------")
+            lines.append("------------------")
+        return lines
+
+    def display_status(self, show_header=True):
+        """显示当前照明状态。"""
+        print("\n".join(self.status_lines(show_header)))
 
     def save_state(self):
         """将当前状态保存到文件。"""
@@ -62,7 +68,10 @@ class Light:
             "fog_lights_on": self.fog_lights_on,
             "interior_light_level": self.interior_light_level
         }
-        save_data(state, 'light.json')
+        if self.events is not None:
+            self.events.publish('light', state)   # 由车辆的持久化消费者按 tick 合并写入
+        else:
+            record_state('light', state)
 
 # --- 单元测试 ---
 if __name__ == '__main__':
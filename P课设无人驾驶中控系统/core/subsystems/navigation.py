@@ -1,42 +1,238 @@
 # core/subsystems/navigation.py
 
-import heapq
-from core.utils import load_data
+from core.utils import load_data, save_data, file_digest
+from core.route_table import RouteTable
+from core.route_cache import RouteCache
+from core.spt import ShortestPathTree
+from core.batch import plan_batch
+from core.ksp import k_shortest_paths
+from core.map_format import open_map
+from core.location_index import LocationIndex
+from core.graph import (CompiledGraph, Landmarks, dijkstra, bidirectional_dijkstra,
+                        astar, extract_path, as_distance, INF)
 
 class Navigation:
     """
     负责处理车辆导航、地图信息和路径规划的类。
     核心功能是使用Dijkstra算法计算最短路径。
+    地图在加载时被编译为整数编号的CSR图 (core.graph.CompiledGraph)，
+    寻路在扁平数组上进行，避免反复哈希地点名字符串。
     """
-    def __init__(self):
+    # 可选的搜索模式，各模式给出的最短距离完全相同，只是查询代价不同
+    SEARCH_MODES = {
+        "dijkstra": "单向Dijkstra",
+        "bidirectional": "双向Dijkstra",
+        "alt": "A*地标下界(ALT)",
+        "table": "全源预计算查表",
+        "incremental": "增量最短路树",
+    }
+    LANDMARK_COUNT = 4
+    ROUTE_CACHE_SIZE = 256
+    AVERAGE_SPEED = 8.3             # 假设平均速度为30km/h (约8.3m/s)
+    events = None                   # 所属车辆的事件总线，由 Vehicle 装配
+
+    def __init__(self, search_mode="dijkstra"):
         """初始化导航系统，加载地图数据。"""
         print("初始化导航系统中...")
-        map_data = load_data('map.json')
-        if not map_data:
-            raise FileNotFoundError("错误: map.json 地图文件未找到或格式错误。")
-        
-        self.locations = map_data.get('locations', [])
-        self.graph = map_data.get('graph', {})
+        # 优先用mmap打开由 map.json 转换来的二进制地图，JSON不存在或已修改时回退到JSON
+        self.map_hash = file_digest('map.json')
+        self._mapped = open_map('map.bin', self.map_hash)
+        if self._mapped is not None:
+            self.locations = self._mapped.locations
+            self.compiled = self._mapped.graph
+            self.map_hash = self._mapped.map_hash
+            self._graph = None      # 字典邻接表仅在需要时从CSR数组还原
+        else:
+            map_data = load_data('map.json')
+            if not map_data:
+                raise FileNotFoundError("错误: map.json 地图文件未找到或格式错误。")
+            self.locations = map_data.get('locations', [])
+            self._graph = map_data.get('graph', {})
+            self.compiled = CompiledGraph.from_dict(self.locations, self._graph)
+        self.catalog = LocationIndex(self.locations)   # 地点名哈希/前缀/模糊索引
+        self.search_mode = search_mode if search_mode in self.SEARCH_MODES else "dijkstra"
+        self.last_expanded = 0      # 上一次规划扩展的节点数
+        self._reverse = None        # 反向图，双向搜索和地标预计算时按需构建
+        self._landmarks = None      # 地标距离表，ALT模式下按需加载
+        self._route_table = None    # 全源下一跳表，查表模式下按需映射
+        self._tree = None           # 以当前起点为根的最短路树，增量模式下维护
+        self.graph_version = 0      # 每次运行时修改边权都会加一
+        self.route_cache = RouteCache(self.ROUTE_CACHE_SIZE)
         self.start_point = None
         self.end_point = None
         self.route = None
         self.total_distance = 0
+        self.alternatives = []      # [(路线, 距离, 预计时间)]，由 plan_alternatives 填充
+        self.progress = 0.0         # 沿当前路线已行驶的距离（米），由仿真时钟推进
+        if self.search_mode == "table":
+            self.route_table()      # 查表模式在启动时就映射路线表
         print("导航系统初始化完成。")
 
+    @property
+    def graph(self):
+        """map.json 风格的字典邻接表；从二进制地图加载时首次访问才构建。"""
+        if self._graph is None:
+            self._graph = self.compiled.to_dict()
+        return self._graph
+
     def set_points(self, start, end):
         """设置导航的起点和终点。"""
-        if start not in self.locations:
+        if start not in self.catalog:
             print(f"错误：起点 '{start}' 不在地图上。")
+            self._print_suggestions(start)
             return False
-        if end not in self.locations:
+        if end not in self.catalog:
             print(f"错误：终点 '{end}' 不在地图上。")
+            self._print_suggestions(end)
             return False
         
         self.start_point = start
         self.end_point = end
+        self._publish({"start_point": start, "end_point": end})
         print(f"导航已设置: 从 {start} 到 {end}")
         return True
 
+    def suggest_locations(self, query, limit=5):
+        """根据输入的部分或有错字的地点名，返回按相关度排序的候选地点名。"""
+        return [name for name, _ in self.catalog.suggest(query, limit)]
+
+    def _print_suggestions(self, query):
+        suggestions = self.suggest_locations(query)
+        if suggestions:
+            print(f"  您是不是要找: {', '.join(suggestions)}")
+
+    def set_search_mode(self, mode):
+        """切换路径搜索模式。"""
+        if mode not in self.SEARCH_MODES:
+            print(f"错误：无效的搜索模式 '{mode}'")
+            return False
+        self.search_mode = mode
+        if mode != "incremental":
+            self._tree = None
+        print(f"导航搜索模式已切换为: {self.SEARCH_MODES[mode]}")
+        return True
+
+    def reverse_graph(self):
+        """返回反向图，首次使用时构建。"""
+        if self._reverse is None:
+            self._reverse = self.compiled.reverse()
+        return self._reverse
+
+    def landmarks(self):
+        """
+        返回ALT地标表。
+        地标距离按地图预计算一次并保存在 map.json 旁边的 map.landmarks.json 中，
+        以 map.json 的摘要作为键，地图变化后会自动重新计算。
+        """
+        if self._landmarks is not None:
+            return self._landmarks
+        if self.graph_version > 0:
+            # 边权已在运行时被修改，文件中的地标距离不再对应当前路网
+            self._landmarks = Landmarks.build(self.compiled, self.LANDMARK_COUNT,
+                                              self.reverse_graph())
+            return self._landmarks
+        cached = load_data('map.landmarks.json')
+        if cached and cached.get('map_hash') == self.map_hash:
+            try:
+                self._landmarks = Landmarks.from_dict(cached, self.compiled)
+            except (KeyError, TypeError):
+                self._landmarks = None
+        if self._landmarks is None:
+            print("正在预计算导航地标...")
+            self._landmarks = Landmarks.build(self.compiled, self.LANDMARK_COUNT,
+                                              self.reverse_graph())
+            data = self._landmarks.to_dict(self.compiled)
+            data['map_hash'] = self.map_hash
+            save_data(data, 'map.landmarks.json')
+        return self._landmarks
+
+    def route_table(self):
+        """
+        返回全源距离/下一跳表。
+        表缓存在 data/map.routes.bin 中，头部记录 map.json 的摘要，
+        启动时直接mmap映射；地图变化后摘要不符，会自动重建并覆盖缓存。
+        """
+        if self._route_table is None and self.graph_version > 0:
+            # 运行时边权变化后只在内存中重建，不覆盖按 map.json 生成的缓存
+            self._route_table = RouteTable.build(self.compiled, self.reverse_graph())
+        if self._route_table is None:
+            n = len(self.compiled)
+            self._route_table = RouteTable.open('map.routes.bin', self.map_hash, n)
+            if self._route_table is None:
+                print("正在预计算全源路线表...")
+                table = RouteTable.build(self.compiled, self.reverse_graph())
+                table.save('map.routes.bin', self.map_hash)
+                self._route_table = RouteTable.open('map.routes.bin', self.map_hash, n) or table
+        return self._route_table
+
+    def update_edge_weight(self, start, end, weight):
+        """
+        在运行时修改一条已有道路的长度（例如交通拥堵导致的等效距离变化）。
+        图版本号加一；边权变大时只淘汰经过这条边的缓存路线，
+        变小时任何路线都可能改走这条边，因此清空整个缓存。
+        """
+        u = self.compiled.index.get(start)
+        v = self.compiled.index.get(end)
+        e = self.compiled.edge_index(u, v) if u is not None and v is not None else -1
+        if e < 0:
+            print(f"错误：地图上没有从 '{start}' 到 '{end}' 的道路。")
+            return False
+        if weight < 0:
+            print("错误：道路长度不能为负数。")
+            return False
+
+        old_weight = self.compiled.weights[e]
+        self.compiled.weights[e] = weight
+        if self._graph is not None:
+            self._graph[start][end] = weight
+        if self._reverse is not None:
+            self._reverse.weights[self._reverse.edge_index(v, u)] = weight
+        self.graph_version += 1
+        if self._tree is not None:
+            repaired = self._tree.update_edge(u, v, old_weight, weight)
+            print(f"最短路树已增量修复，重新计算了 {repaired} 个节点。")
+
+        # 全源表对任何边权变化都失效；地标下界只在边权变小时失效
+        if self._route_table is not None:
+            self._route_table.close()
+            self._route_table = None
+        if weight < old_weight:
+            self._landmarks = None
+            self.route_cache.clear()
+        else:
+            self.route_cache.invalidate_edge((u, v), self.graph_version)
+        print(f"道路 {start} -> {end} 的长度已更新为 {weight} 米。")
+        return True
+
+    def cache_stats(self):
+        """返回路线缓存的命中/未命中计数等统计信息。"""
+        stats = self.route_cache.stats()
+        stats["graph_version"] = self.graph_version
+        return stats
+
+    def _search(self, source, target):
+        """按当前搜索模式计算最短路，返回 (距离, 节点编号路径)。"""
+        stats = {}
+        if self.search_mode == "bidirectional":
+            distance, path = bidirectional_dijkstra(self.compiled, self.reverse_graph(),
+                                                    source, target, stats)
+        elif self.search_mode == "table":
+            table = self.route_table()
+            distance, path = table.distance(source, target), table.path(source, target)
+        elif self.search_mode == "incremental":
+            if self._tree is None or self._tree.source != source:
+                self._tree = ShortestPathTree(self.compiled, self.reverse_graph(), source)
+                stats['expanded'] = self._tree.last_touched
+            distance, path = self._tree.distance(target), self._tree.path_to(target)
+        elif self.search_mode == "alt":
+            distance, path = astar(self.compiled, source, target, self.landmarks(), stats)
+        else:
+            distances, previous_nodes = dijkstra(self.compiled, source, target, stats)
+            distance = distances[target]
+            path = extract_path(previous_nodes, source, target)
+        self.last_expanded = stats.get('expanded', 0)
+        return distance, path
+
     def plan_route(self):
         """
         使用Dijkstra算法规划最短路径。
@@ -46,71 +242,131 @@ class Navigation:
             print("错误：请先设置起点和终点。")
             return False
 
-        # 1. 初始化距离、前驱节点和优先队列
-        distances = {location: float('inf') for location in self.locations}
-        distances[self.start_point] = 0
-        previous_nodes = {location: None for location in self.locations}
-        
-        # 优先队列（最小堆）存储 (距离, 节点)
-        priority_queue = [(0, self.start_point)]
-
-        # 2. Dijkstra算法主循环
-        while priority_queue:
-            # 弹出当前距离最小的节点
-            current_distance, current_node = heapq.heappop(priority_queue)
+        # 1. 将起点和终点转换为整数编号
+        source = self.compiled.index[self.start_point]
+        target = self.compiled.index[self.end_point]
 
-            # 如果当前距离已经大于记录的距离，则跳过
-            if current_distance > distances[current_node]:
-                continue
+        # 2. 先查路线缓存，未命中时按当前搜索模式求最短路
+        key = (self.start_point, self.end_point, self.graph_version)
+        cached = self.route_cache.get(key)
+        if cached is not None:
+            distance, path = cached
+            self.last_expanded = 0
+        else:
+            distance, path = self._search(source, target)
+            self.route_cache.put(key, distance, path)
 
-            # 如果到达终点，则可以提前结束
-            if current_node == self.end_point:
-                break
-            
-            # 遍历当前节点的所有邻居
-            for neighbor, weight in self.graph.get(current_node, {}).items():
-                distance = current_distance + weight
-                
-                # 如果找到了更短的路径，则更新
-                if distance < distances[neighbor]:
-                    distances[neighbor] = distance
-                    previous_nodes[neighbor] = current_node
-                    heapq.heappush(priority_queue, (distance, neighbor))
-
-        # 3. 回溯路径并保存结果
-        path = []
-        current = self.end_point
-        while current is not None:
-            path.insert(0, current)
-            current = previous_nodes[current]
-        
         # 检查路径是否可达
-        if path[0] == self.start_point:
-            self.route = path
-            self.total_distance = distances[self.end_point]
+        self.progress = 0.0
+        if path is not None:
+            self.route = [self.compiled.names[node] for node in path]
+            self.total_distance = as_distance(distance)
+            self._publish({"route": self.route, "total_distance": self.total_distance,
+                           "progress": 0.0})
             print("路径规划成功！")
             return True
         else:
             self.route = None
-            self.total_distance = float('inf')
+            self.total_distance = INF
+            self._publish({"route": None, "total_distance": INF, "progress": 0.0})
             print("错误：无法找到从起点到终点的路径。")
             return False
             
-    def display_route(self):
-        """以文本方式显示规划好的路线信息。"""
-        print("\n--- 导航路线 ---")
-        if self.route:
-            print(f"  起点: {self.start_point}")
-            print(f"  终点: {self.end_point}")
-            print(f"  路线: {' -> '.join(self.route)}")
-            print(f"  总距离: {self.total_distance} 米")
-            # 假设平均速度为30km/h (约8.3m/s)
-            estimated_time = self.total_distance / 8.3
-            print(f"  预计时间: {estimated_time:.1f} 秒")
+    def plan_routes(self, pairs, workers=None):
+        """
+        批量规划多条路线，不影响当前设置的起点终点。
+        pairs 为 (起点, 终点) 序列；返回一个逐条产出 RouteResult(start, end, route, distance)
+        的生成器，同一起点的查询只计算一次最短路树，workers>1 时不同起点在进程池中并行。
+        """
+        return plan_batch(self.compiled, pairs, workers)
+
+    def plan_alternatives(self, k=3):
+        """
+        为当前起点终点规划前 k 条无环备选路线（Yen算法），按距离从短到长排列。
+        结果保存在 self.alternatives 中，每项为 (路线, 距离, 预计时间)。
+        """
+        if not self.start_point or not self.end_point:
+            print("错误：请先设置起点和终点。")
+            return False
+        source = self.compiled.index[self.start_point]
+        target = self.compiled.index[self.end_point]
+        stats = {}
+        paths = k_shortest_paths(self.compiled, self.reverse_graph(), source, target, k, stats)
+        self.last_expanded = stats['expanded']
+        self.alternatives = []
+        for distance, path in paths:
+            route = [self.compiled.names[node] for node in path]
+            self.alternatives.append((route, as_distance(distance), distance / self.AVERAGE_SPEED))
+        if not self.alternatives:
+            print("错误：无法找到从起点到终点的路径。")
+            return False
+        print(f"共找到 {len(self.alternatives)} 条备选路线。")
+        return True
+
+    def display_alternatives(self):
+        """以文本方式显示备选路线列表。"""
+        print("\n--- 备选路线 ---")
+        if self.alternatives:
+            for i, (route, distance, eta) in enumerate(self.alternatives, 1):
+                print(f"  {i}. {' -> '.join(route)}")
+                print(f"     距离: {distance} 米, 预计时间: {eta:.1f} 秒")
         else:
-            print("  当前没有规划路线。")
+            print("  当前没有备选路线。")
         print("------------------")
 
+    @property
+    def arrived(self):
+        return bool(self.route) and self.progress >= self.total_distance
+
+    def advance(self, distance):
+        """沿当前路线前进 distance 米，返回是否已到达终点。"""
+        if not self.route:
+            return False
+        self.progress = min(self.progress + distance, self.total_distance)
+        self._publish({"progress": self.progress})
+        return self.arrived
+
+    def _publish(self, changes):
+        if self.events is not None:
+            self.events.publish('navigation', changes)
+
+    def current_location(self):
+        """返回车辆最近经过的路线节点。"""
+        if not self.route:
+            return None
+        travelled = 0.0
+        for u, v in zip(self.route, self.route[1:]):
+            a, b = self.compiled.index[u], self.compiled.index[v]
+            travelled += self.compiled.weights[self.compiled.edge_index(a, b)]
+            if travelled > self.progress:
+                return u
+        return self.route[-1]
+
+    @staticmethod
+    def idle_route_lines():
+        """没有规划路线时的显示内容，导航尚未加载时仪表盘也用它。"""
+        return ["", "--- 导航路线 ---", "  当前没有规划路线。", "------------------"]
+
+    def route_lines(self):
+        """返回路线信息的各行文本，供 display_route 和仪表盘渲染器使用。"""
+        if not self.route:
+            return self.idle_route_lines()
+        lines = ["", "--- 导航路线 ---"]
+        lines.append(f"  起点: {self.start_point}")
+        lines.append(f"  终点: {self.end_point}")
+        lines.append(f"  路线: {' -> '.join(self.route)}")
+        lines.append(f"  总距离: {self.total_distance} 米")
+        estimated_time = self.total_distance / self.AVERAGE_SPEED
+        lines.append(f"  预计时间: {estimated_time:.1f} 秒")
+        if self.progress > 0:
+            lines.append(f"  已行驶: {self.progress:.0f}/{self.total_distance} 米 (当前位置: {self.current_location()})")
+        lines.append("------------------")
+        return lines
+
+    def display_route(self):
+        """以文本方式显示规划好的路线信息。"""
+        print("\n".join(self.route_lines()))
+
 
 # --- 单元测试 ---
 if __name__ == '__main__':
@@ -136,4 +392,49 @@ if __name__ == '__main__':
     if not nav_system.plan_route():
         nav_system.display_route()
 
+    # 5. 比较不同搜索模式扩展的节点数
+    print("\n>>> 操作: 用三种搜索模式规划从'西操'到'东图'的路线")
+    nav_system.set_points(start="西操", end="东图")
+    for mode in Navigation.SEARCH_MODES:
+        nav_system.set_search_mode(mode)
+        nav_system.route_cache.clear()     # 清空缓存，确保每种模式都真正搜索一次
+        nav_system.plan_route()
+        print(f"  距离: {nav_system.total_distance} 米, 扩展节点数: {nav_system.last_expanded}")
+
+    # 6. 模拟喻园大道拥堵，观察缓存命中与淘汰
+    print("\n>>> 操作: 重复规划后将'喻园大道-华中'到'喻园大道-东五'的等效距离调为150米")
+    nav_system.set_search_mode("dijkstra")
+    nav_system.set_points(start="西操", end="启明楼")
+    nav_system.plan_route()
+    nav_system.plan_route()
+    nav_system.update_edge_weight("喻园大道-华中", "喻园大道-东五", 150)
+    nav_system.plan_route()
+    nav_system.display_route()
+    print(f"  缓存统计: {nav_system.cache_stats()}")
+
+    # 7. 增量模式下路况变化只修复最短路树中受影响的部分
+    print("\n>>> 操作: 增量模式下恢复'喻园大道-华中'到'喻园大道-东五'的距离")
+    nav_system.set_search_mode("incremental")
+    nav_system.route_cache.clear()
+    nav_system.plan_route()
+    nav_system.update_edge_weight("喻园大道-华中", "喻园大道-东五", 50)
+    nav_system.plan_route()
+    nav_system.display_route()
+
+    # 8. 批量规划：同一起点的查询共用一棵最短路树
+    print("\n>>> 操作: 批量规划多条路线")
+    batch = [("西操", "启明楼"), ("西操", "东图"), ("韵苑", "主图"), ("紫菘", "师生")]
+    for result in nav_system.plan_routes(batch, workers=2):
+        print(f"  {result.start} -> {result.end}: {result.distance} 米")
+
+    # 9. 前 k 条备选路线
+    print("\n>>> 操作: 规划从'西操'到'东九'的3条备选路线")
+    nav_system.set_points(start="西操", end="东九")
+    if nav_system.plan_alternatives(k=3):
+        nav_system.display_alternatives()
+
+    # 10. 输错地点名时给出建议
+    print("\n>>> 操作: 输入不完整的地点名 '喻园东九'")
+    nav_system.set_points(start="喻园东九", end="西操")
+
     print("\n--- 导航模块单元测试结束 ---")
\ No newline at end of file
@@ -0,0 +1,276 @@
+# core/telemetry.py
+
+import json
+import os
+import struct
+from array import array
+
+from core.utils import data_path
+
+# 默认采集的通道: (名称, array类型码, 取值函数)
+CHANNELS = [
+    ("speed", "f", lambda car: car.speed),
+    ("battery_capacity", "f", lambda car: car.battery.capacity),
+    ("ac_current_temp", "f", lambda car: car.ac.current_temp),
+    ("ac_current_humidity", "f", lambda car: car.ac.current_humidity),
+    ("window_front_left", "B", lambda car: car.door_window.windows_status["front_left"]),
+    ("window_front_right", "B", lambda car: car.door_window.windows_status["front_right"]),
+    ("window_rear_left", "B", lambda car: car.door_window.windows_status["rear_left"]),
+    ("window_rear_right", "B", lambda car: car.door_window.windows_status["rear_right"]),
+]
+
+# 降采样层级: (桶宽秒数, 保留的桶数) —— 1小时秒级、7天分钟级、1年小时级
+RESOLUTIONS = [(1.0, 3600), (60.0, 7 * 24 * 60), (3600.0, 365 * 24)]
+
+
+class RingTable:
+    """
+    固定容量的列式环形表：一列时间戳加若干定类型的数据列，每列是一个预分配的
+    array，写满后覆盖最旧的行，内存占用与运行时长无关。
+    """
+
+    def __init__(self, columns, capacity):
+        self.capacity = capacity
+        self.names = [name for name, _ in columns]
+        self.time = array('d', bytes(8 * capacity))
+        self.columns = {name: array(code, bytes(array(code).itemsize * capacity))
+                        for name, code in columns}
+        self._columns = [self.columns[name] for name in self.names]
+        self.written = 0            # 累计写入的行数
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def append(self, t, values):
+        i = self.written % self.capacity
+        self.time[i] = t
+        for column, value in zip(self._columns, values):
+            column[i] = value
+        self.written += 1
+
+    def segments(self, name=None):
+        """
+        按时间先后返回某列（默认时间列）的一到两个 memoryview 片段，不复制数据。
+        尚未写满时只有一段；写满后为 [最旧..末尾, 开头..最新]。
+        """
+        column = self.time if name is None else self.columns[name]
+        view = memoryview(column)
+        if self.written <= self.capacity:
+            return [view[:self.written]]
+        head = self.written % self.capacity
+        return [view[head:], view[:head]] if head else [view]
+
+    def to_numpy(self, name=None):
+        """导出为NumPy数组；只有一个片段时是共享内存的视图（零拷贝）。"""
+        import numpy as np
+        parts = [np.frombuffer(segment, dtype=segment.format) for segment in self.segments(name)]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+class _Rollup:
+    """一个降采样层级：每个桶记录各通道的最小值、最大值和平均值。"""
+
+    def __init__(self, names, width, capacity):
+        self.width = width
+        columns = []
+        for name in names:
+            columns += [(f"{name}.min", "f"), (f"{name}.max", "f"), (f"{name}.mean", "f")]
+        self.table = RingTable(columns, capacity)
+        self._bucket = None         # 正在累计的桶起点
+        self._count = 0
+        self._min = [0.0] * len(names)
+        self._max = [0.0] * len(names)
+        self._sum = [0.0] * len(names)
+
+    def add(self, t, values):
+        bucket = t - t % self.width
+        if bucket != self._bucket:
+            self.close()
+            self._bucket = bucket
+            self._count = 0
+            self._min = list(values)
+            self._max = list(values)
+            self._sum = [0.0] * len(values)
+        else:
+            self._min = [min(a, b) for a, b in zip(self._min, values)]
+            self._max = [max(a, b) for a, b in zip(self._max, values)]
+        self._sum = [a + b for a, b in zip(self._sum, values)]
+        self._count += 1
+
+    def pending(self):
+        """正在累计、尚未写入环形表的桶，返回 (桶起点, 行) 或 None；不改变累计状态。"""
+        if self._bucket is None or not self._count:
+            return None
+        row = []
+        for low, high, total in zip(self._min, self._max, self._sum):
+            row += [low, high, total / self._count]
+        return self._bucket, row
+
+    def close(self):
+        """把正在累计的桶写入环形表，并清空累计状态。"""
+        pending = self.pending()
+        if pending is not None:
+            self.table.append(*pending)
+        self._bucket = None
+        self._count = 0
+
+
+class TelemetryRecorder:
+    """
+    遥测记录器：作为仿真参与者按 interval 秒采样车辆状态，写入原始环形表，
+    同时按 RESOLUTIONS 逐级汇总为 min/max/mean 降采样表。
+    所有存储在创建时一次性分配，采样不会产生常驻的Python对象。
+    """
+
+    MAGIC = b'TLM1'
+
+    def __init__(self, vehicle, interval=0.1, capacity=6000, channels=None,
+                 resolutions=None):
+        self.vehicle = vehicle
+        self.interval = interval
+        channels = channels or CHANNELS
+        self.names = [name for name, _, _ in channels]
+        self._getters = [getter for _, _, getter in channels]
+        self.raw = RingTable([(name, code) for name, code, _ in channels], capacity)
+        self.rollups = [_Rollup(self.names, width, size)
+                        for width, size in (resolutions or RESOLUTIONS)]
+        self._next = 0.0
+
+    def attach(self, simulation):
+        simulation.register(self)
+        return self
+
+    def tick(self, dt, now=None):
+        if now is None or now + 1e-9 < self._next:
+            return
+        self._next = now + self.interval
+        self.sample(now)
+
+    def sample(self, t):
+        car = self.vehicle
+        values = [getter(car) for getter in self._getters]
+        self.raw.append(t, values)
+        for rollup in self.rollups:
+            rollup.add(t, values)
+
+    def level(self, width=None):
+        """返回原始表 (width=None) 或指定桶宽的降采样表。"""
+        if width is None:
+            return self.raw
+        for rollup in self.rollups:
+            if rollup.width == width:
+                return rollup.table
+        raise KeyError(f"没有 {width} 秒的降采样层级")
+
+    def memory_bytes(self):
+        tables = [self.raw] + [rollup.table for rollup in self.rollups]
+        return sum(table.time.itemsize * table.capacity
+                   + sum(c.itemsize * table.capacity for c in table.columns.values())
+                   for table in tables)
+
+    def dump(self, filename):
+        """
+        写出二进制快照：魔数 | JSON头长度 u32 | JSON头 | 各表各列的原始字节（按时间顺序）。
+        列数据直接从 array 的内存写出，不经过中间拷贝。
+        降采样表末尾附带正在累计的桶（部分数据），记录器本身的累计状态不受影响。
+        """
+        tables = {"raw": (self.raw, None)}
+        for rollup in self.rollups:
+            tables[f"{rollup.width:g}s"] = (rollup.table, rollup.pending())
+        header = {name: {"rows": len(table) + (pending is not None),
+                         "columns": [["time", "d"]] + [[n, table.columns[n].typecode]
+                                                      for n in table.names]}
+                  for name, (table, pending) in tables.items()}
+        encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        path = data_path(filename)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.MAGIC + struct.pack('<I', len(encoded)) + encoded)
+            for table, pending in tables.values():
+                for i, column in enumerate([None] + table.names):
+                    for segment in table.segments(column):
+                        f.write(segment)
+                    if pending is not None:
+                        values = table.time if column is None else table.columns[column]
+                        value = pending[0] if column is None else pending[1][i - 1]
+                        f.write(array(values.typecode, [value]).tobytes())
+        os.replace(path + '.tmp', path)
+        return path
+
+
+def load_telemetry(filename):
+    """读取 dump 写出的文件，返回 {表名: {列名: array}}。"""
+    with open(data_path(filename), 'rb') as f:
+        data = f.read()
+    if data[:4] != TelemetryRecorder.MAGIC:
+        raise ValueError("不是遥测数据文件")
+    (length,) = struct.unpack_from('<I', data, 4)
+    header = json.loads(data[8:8 + length])
+    pos = 8 + length
+    result = {}
+    for name, info in header.items():
+        rows = info["rows"]
+        result[name] = {}
+        for column, code in info["columns"]:
+            values = array(code)
+            size = values.itemsize * rows
+            values.frombytes(data[pos:pos + size])
+            result[name][column] = values
+            pos += size
+    return result
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import time
+    from core.simulation import Simulation
+    from core.vehicle import Vehicle
+
+    print("--- 开始遥测记录器单元测试 ---")
+    car = Vehicle()
+    simulation = Simulation(step=0.1)
+    car.attach(simulation)
+    recorder = TelemetryRecorder(car).attach(simulation)
+    print(f"\n  预分配内存: {recorder.memory_bytes() / 1024:.0f} KB")
+
+    saved_capacity = car.battery.capacity
+    car.battery.capacity = 20
+    car.battery.toggle_charging()
+    car.door_window.set_window_level("front_left", 60)
+    start = time.perf_counter()
+    simulation.run(duration=3 * 3600)
+    print(f"\n>>> 仿真3小时耗时 {time.perf_counter() - start:.1f} 秒，"
+          f"原始样本 {recorder.raw.written} 个（保留 {len(recorder.raw)} 个）")
+    minutes = recorder.level(60.0)
+    print(f"  分钟级 {len(minutes)} 个桶，前3分钟车内温度 (min/max/mean):")
+    for i in range(3):
+        print(f"    {minutes.time[i]:>6.0f}s  {minutes.columns['ac_current_temp.min'][i]:.2f} / "
+              f"{minutes.columns['ac_current_temp.max'][i]:.2f} / "
+              f"{minutes.columns['ac_current_temp.mean'][i]:.2f}")
+    print(f"  内存不随运行时长增长: {recorder.memory_bytes() / 1024:.0f} KB")
+
+    path = recorder.dump("telemetry.bin")
+    loaded = load_telemetry("telemetry.bin")
+    print(f"\n  已导出 {os.path.getsize(path)} 字节，秒级表 {len(loaded['1s']['time'])} 行")
+    os.remove(path)
+    # 还原演示改动的车辆状态，不把打开的车窗留在状态存储中
+    car.door_window.set_window_level("front_left", 0)
+    car.battery.capacity = saved_capacity
+    car.battery.save_state()
+    car.events.flush()
+
+    print("\n>>> 校验: 在桶中途导出不会重复写入或放大该桶")
+    constant = TelemetryRecorder(car, channels=[("speed", "f", lambda car: 10)],
+                                 resolutions=[(60.0, 10)])
+    for t in range(0, 30):
+        constant.sample(float(t))
+    constant.dump("telemetry.bin")
+    for t in range(30, 90):
+        constant.sample(float(t))
+    partial = load_telemetry("telemetry.bin")["60s"]
+    constant.rollups[0].close()
+    table = constant.level(60.0)
+    rows = [(table.time[i], table.columns["speed.mean"][i]) for i in range(len(table))]
+    print(f"  中途导出: {list(zip(partial['time'], partial['speed.mean']))}，最终: {rows}")
+    assert rows == [(0.0, 10.0), (60.0, 10.0)]
+    os.remove(data_path("telemetry.bin"))
+    print("--- 遥测记录器单元测试结束 ---")
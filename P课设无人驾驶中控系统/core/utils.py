@@ -1,19 +1,314 @@
 # core/utils.py
+import atexit
+import copy
+import hashlib
 import json
 import os
+import shutil
+import struct
+import threading
+import zlib
+
+from core import instrument
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 
+def data_path(filename):
+    """返回data文件夹中某个文件的完整路径"""
+    return os.path.join(DATA_DIR, filename)
+
+
+class WriteBehindStore:
+    """
+    合并写入的后台持久化层。
+    save_data 只记录每个文件最新的一份快照并标记为"脏"，后台线程在合并窗口
+    (interval 秒) 结束后把所有脏文件一次性写出：先写临时文件并fsync，再原子重命名。
+    同一窗口内对同一文件的多次保存只会落盘一次，控制路径不再等待磁盘。
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()           # 保护 _pending
+        self._flush_lock = threading.Lock()     # 保证同一时刻只有一个线程在写盘
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._flushables = []                   # 需要随后台线程一起刷盘的对象，如状态日志
+
+    def put(self, data, filename):
+        """记录一份待写入的快照（深拷贝，之后调用方可以继续修改原对象）。"""
+        snapshot = copy.deepcopy(data)
+        if self.interval <= 0:
+            write_atomic(snapshot, filename)
+            return
+        with self._lock:
+            self._pending[filename] = snapshot
+        self.mark_dirty()
+
+    def register(self, flushable):
+        """登记一个带 flush() 方法的对象，每次后台写出时一并调用。"""
+        self._flushables.append(flushable)
+
+    def mark_dirty(self):
+        """通知后台线程有数据需要写出。"""
+        if self.interval <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='state-writer',
+                                                 daemon=True)
+                self._thread.start()
+        self._dirty.set()
+
+    def get(self, filename):
+        """返回尚未落盘的最新快照，没有时返回 None。"""
+        with self._lock:
+            snapshot = self._pending.get(filename)
+        return copy.deepcopy(snapshot) if snapshot is not None else None
+
+    def flush(self):
+        """立即把所有脏文件写出。"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for filename, data in pending.items():
+                write_atomic(data, filename)
+            for flushable in self._flushables:
+                flushable.flush()
+
+    def close(self):
+        """停止后台线程并写出剩余数据，程序退出前调用。"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._dirty.set()
+            thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait()
+            # 合并窗口：等待期间的所有保存都会合并到下面这一次写出中
+            self._stop.wait(self.interval)
+            self._dirty.clear()
+            self.flush()
+
+
+_store = WriteBehindStore()
+atexit.register(_store.close)
+
+
+class StateJournal:
+    """
+    统一的车辆状态存储：追加写入的二进制增量日志 + 定期压缩的快照。
+    每条日志记录只包含某个子系统发生变化的字段，写入代价与变化量成正比；
+    记录数达到 snapshot_every 后，后台线程把完整状态写成快照并开始新日志，
+    因此启动时只需加载最新快照并重放不超过 snapshot_every 条记录。
+
+    日志记录格式（小端）: 负载长度 u32 | 负载CRC32 u32 | 序号 u64 | 负载
+    负载为紧凑JSON: [子系统名, {变化的字段: 新值}]。
+    """
+
+    RECORD = struct.Struct('<IIQ')
+
+    def __init__(self, journal_name='state.journal', snapshot_name='state.snapshot',
+                 snapshot_every=1000):
+        self.journal_name = journal_name
+        self.snapshot_name = snapshot_name
+        self.snapshot_every = snapshot_every
+        self.state = {}             # 子系统名 -> 当前完整状态
+        self.seq = 0                # 最后一条记录的序号
+        self.replayed = 0           # 启动时重放的记录数
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def open(self):
+        """加载最新快照，再按序号重放其后的日志记录（先旧日志后新日志）。"""
+        snapshot = load_data(self.snapshot_name)
+        if snapshot:
+            self.state = snapshot.get('state', {})
+            self.seq = snapshot.get('seq', 0)
+        path = data_path(self.journal_name)
+        for name in (self.journal_name + '.old', self.journal_name):
+            self._replay(data_path(name), truncate=(name == self.journal_name))
+        self._file = open(path, 'ab')
+        return self
+
+    def _replay(self, path, truncate):
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        pos = 0
+        while pos + self.RECORD.size <= len(data):
+            length, crc, seq = self.RECORD.unpack_from(data, pos)
+            payload = data[pos + self.RECORD.size:pos + self.RECORD.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break       # 断电时写了一半的尾部记录，丢弃
+            pos += self.RECORD.size + length
+            if seq <= self.seq:
+                continue    # 已包含在快照中
+            subsystem, delta = json.loads(payload)
+            self.state.setdefault(subsystem, {}).update(delta)
+            self.seq = seq
+            self.replayed += 1
+            self._since_snapshot += 1
+        if truncate and pos < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(pos)
+
+    def get(self, subsystem):
+        with self._lock:
+            state = self.state.get(subsystem)
+            return copy.deepcopy(state) if state is not None else None
+
+    def update(self, subsystem, state):
+        """记录子系统的新状态，只把变化的字段追加到日志缓冲区。"""
+        with self._lock:
+            current = self.state.setdefault(subsystem, {})
+            delta = {key: copy.deepcopy(value) for key, value in state.items()
+                     if key not in current or current[key] != value}
+            if not delta:
+                return
+            current.update(delta)
+            self.seq += 1
+            self._since_snapshot += 1
+            payload = json.dumps([subsystem, delta], ensure_ascii=False,
+                                 separators=(',', ':')).encode('utf-8')
+            self._file.write(self.RECORD.pack(len(payload), zlib.crc32(payload), self.seq))
+            self._file.write(payload)
+        if instrument.enabled:
+            instrument.add('io.bytes_written', self.RECORD.size + len(payload))
+        _store.mark_dirty()
+
+    def flush(self):
+        """把日志缓冲区写入磁盘；记录数达到阈值时压缩为快照。"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            compact = self._since_snapshot >= self.snapshot_every
+        if compact:
+            self.compact()
+
+    def compact(self):
+        """
+        写出完整快照并开始新日志。
+        持锁时只做日志轮换和状态拷贝，较慢的快照写盘在锁外进行；
+        若在快照写完前断电，启动时仍会重放轮换出去的旧日志。
+        上次轮换后没来得及写快照留下的旧日志不会被覆盖，当前日志接在它后面。
+        """
+        path = data_path(self.journal_name)
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            if os.path.exists(path + '.old'):
+                with open(path, 'rb') as src, open(path + '.old', 'ab') as dst:
+                    shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(path)
+            else:
+                os.replace(path, path + '.old')
+            self._file = open(path, 'ab')
+            snapshot = {'seq': self.seq, 'state': copy.deepcopy(self.state)}
+            self._since_snapshot = 0
+        write_atomic(snapshot, self.snapshot_name)
+        os.remove(path + '.old')
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def state_store():
+    """返回全局车辆状态存储，首次调用时加载快照并重放日志。"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = StateJournal().open()
+            _store.register(_journal)
+        return _journal
+
+@instrument.timed("io.load_state")
+def load_state(subsystem):
+    """
+    读取某个子系统的状态。
+    状态存储中还没有该子系统时，从旧版的单独JSON文件 (如 battery.json) 迁移。
+    """
+    state = state_store().get(subsystem)
+    if state is None:
+        state = load_data(f'{subsystem}.json')
+    return state
+
+@instrument.timed("io.record_state")
+def record_state(subsystem, state):
+    """把子系统的最新状态以增量形式追加到状态日志。"""
+    state_store().update(subsystem, state)
+
+def set_flush_interval(seconds):
+    """设置合并写入的时间窗口（秒），0 表示每次保存都同步写盘。"""
+    _store.flush()
+    _store.interval = seconds
+
+def flush_data():
+    """把所有尚未落盘的状态立即写出。"""
+    _store.flush()
+
+def shutdown_data():
+    """停止后台写入线程并写出全部状态。"""
+    _store.close()
+
+@instrument.timed("io.write_atomic")
+def write_atomic(data, filename):
+    """先写临时文件并fsync，再原子替换目标文件，避免断电时留下写了一半的JSON"""
+    path = data_path(filename)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+        if instrument.enabled:
+            instrument.add('io.bytes_written', f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+@instrument.timed("io.load_data")
 def load_data(filename):
     """从data文件夹加载一个JSON文件"""
-    path = os.path.join(DATA_DIR, filename)
+    pending = _store.get(filename)
+    if pending is not None:
+        return pending
+    path = data_path(filename)
     if not os.path.exists(path):
         return None
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+@instrument.timed("io.save_data")
 def save_data(data, filename):
-    """将数据保存为一个JSON文件到data文件夹"""
-    path = os.path.join(DATA_DIR, filename)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
\ No newline at end of file
+    """将数据保存为一个JSON文件到data文件夹（由后台线程合并写入）"""
+    _store.put(data, filename)
+
+def file_digest(filename):
+    """计算data文件夹中某个文件的SHA-256摘要，用于判断派生缓存是否过期"""
+    path = data_path(filename)
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
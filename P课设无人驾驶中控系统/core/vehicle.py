@@ -1,30 +1,163 @@
 # core/vehicle.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from core.subsystems.air_conditioner import AirConditioner
 from core.subsystems.battery import Battery
 from core.subsystems.door_window import DoorWindow
 from core.subsystems.light import Light  # <--- 确认这一行存在且没有错误
 from core.subsystems.navigation import Navigation
+from core.events import EventBus
+from core.utils import record_state, state_store
 # from core.subsystems.battery import Battery # 将来添加
 # from core.subsystems.navigation import Navigation # 将来添加
 
+
+class LazySubsystem:
+    """
+    懒加载的子系统：首次访问 vehicle.<名字> 时才构造（读取状态文件、加载地图），
+    构造结果存入实例字典，之后的访问直接命中实例属性，不再经过本描述符。
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, vehicle, owner=None):
+        if vehicle is None:
+            return self
+        return vehicle._build(self.name, self.factory)
+
+
 class Vehicle:
 
-    def __init__(self, make="HUST", model="AutopilotSystem"):
+    # 驾驶模式，模仿你的枚举类型
+    DRIVING_MODES = ["手动模式", "辅助模式", "自动模式"]
+    CRUISE_SPEED = 30   # 自动模式下沿导航路线行驶的巡航速度 (km/h)
+    PERSISTED_TOPICS = ("ac", "battery", "door_window", "light")
+    events = None       # 车内事件总线；车队视图没有自己的总线
+    SUBSYSTEMS = ("ac", "battery", "door_window", "light", "navigation")
+
+    # 各子系统在首次访问时才构造；导航要解析整张地图，没有规划路线时可能一直不加载
+    ac = LazySubsystem(AirConditioner)
+    battery = LazySubsystem(Battery)
+    door_window = LazySubsystem(DoorWindow)
+    light = LazySubsystem(Light)
+    navigation = LazySubsystem(Navigation)
+
+    def __init__(self, make="HUST", model="AutopilotSystem", preload=False):
+        """preload=True 时在线程池中并行构造全部子系统，否则按需懒加载。"""
         self.make = make
         self.model = model
         self.speed = 0
         self.engine_on = False
         
-        # 驾驶模式，模仿你的枚举类型
-        self.DRIVING_MODES = ["手动模式", "辅助模式", "自动模式"]
         self.current_driving_mode = self.DRIVING_MODES[0]
+        self.startup_times = {}         # 启动阶段 -> 耗时（秒），见 startup_report
+        self._simulation = None
+        self._build_locks = {name: threading.Lock() for name in self.SUBSYSTEMS}
+
+        # 加载最新状态快照并重放其后的日志，各子系统从中读取自己的状态
+        start = time.perf_counter()
+        state_store()
+        self.startup_times["state"] = time.perf_counter() - start
+
+        # 子系统的状态变化统一发布到事件总线，持久化只是其中一个消费者
+        self.events = EventBus()
+        self.events.subscribe(self._persist, topics=self.PERSISTED_TOPICS)
+        if preload:
+            self.preload()
+
+    def _build(self, name, factory):
+        """构造并“装配”一个子系统；并行预加载时每个子系统只会被构造一次。"""
+        with self._build_locks[name]:
+            subsystem = self.__dict__.get(name)
+            if subsystem is not None:
+                return subsystem
+            start = time.perf_counter()
+            subsystem = factory()
+            subsystem.events = self.events
+            if name == "battery" and self._simulation is not None:
+                subsystem.simulation = self._simulation
+            self.startup_times[name] = time.perf_counter() - start
+            self.__dict__[name] = subsystem
+            return subsystem
+
+    def loaded(self, name):
+        """返回已构造的子系统；尚未构造（懒加载）时返回 None，不会触发加载。"""
+        if isinstance(getattr(type(self), name, None), LazySubsystem):
+            return self.__dict__.get(name)
+        return getattr(self, name)
+
+    def preload(self, names=None, workers=None):
+        """
+        在线程池中并行构造尚未加载的子系统，返回本次预加载的墙钟耗时（秒）。
+        子系统的初始化以文件读取和mmap为主，线程在等待I/O时会释放GIL。
+        """
+        names = [name for name in (names or self.SUBSYSTEMS) if self.loaded(name) is None]
+        start = time.perf_counter()
+        if names:
+            with ThreadPoolExecutor(max_workers=workers or len(names),
+                                    thread_name_prefix="subsystem-init") as pool:
+                # list() 让构造中抛出的异常在这里重新抛出
+                list(pool.map(lambda name: getattr(self, name), names))
+        elapsed = time.perf_counter() - start
+        self.startup_times["preload"] = elapsed
+        return elapsed
+
+    def startup_report(self):
+        """启动耗时分解：状态日志加载和各子系统的构造时间，未加载的子系统标注出来。"""
+        lines = ["--- 启动耗时 ---"]
+        for name in ("state",) + self.SUBSYSTEMS + ("preload",):
+            if name in self.startup_times:
+                lines.append(f"  {name:<12}{self.startup_times[name] * 1000:>9.2f} ms")
+            elif name in self.SUBSYSTEMS and self.loaded(name) is None:
+                lines.append(f"  {name:<12}{'未加载':>8}")
+        return lines
+
+    def _persist(self, events):
+        for event in events:
+            record_state(event.topic, event.changes)
+
+    def _publish(self, changes):
+        if self.events is not None:
+            self.events.publish('vehicle', changes)
+
+    def attach(self, simulation):
+        """
+        接入仿真引擎：此后充电、车内温度和导航行驶都随虚拟时钟逐步推进，
+        不再阻塞主菜单。
+        """
+        self._simulation = simulation
+        battery = self.loaded("battery")
+        if battery is not None:
+            battery.simulation = simulation
+        if self.events is not None:
+            self.events.deferred = True     # 同一 tick 内的状态变化合并后在 tick 末尾投递
+        simulation.register(self)
+
+    def tick(self, dt, now=None):
+        """仿真时钟推进 dt 秒时调用，依次推进各子系统。"""
+        self.battery.tick(dt, now)
+        self.ac.tick(dt, now, self.door_window.windows_status)
+        # 导航尚未加载时不可能有路线，不为行驶检查而加载地图
+        navigation = self.loaded("navigation")
+        speed = self.speed
+        if self.engine_on and navigation is not None and navigation.route \
+                and not navigation.arrived:
+            if self.current_driving_mode == self.DRIVING_MODES[2]:
+                self.speed = self.CRUISE_SPEED
+            if self.speed > 0 and navigation.advance(self.speed / 3.6 * dt):
+                self.speed = 0
+                print(f"\n已到达目的地: {navigation.end_point}")
+        if self.speed != speed:
+            self._publish({"speed": self.speed})
+        if self.events is not None:
+            self.events.flush()
 
-        # 初始化并“装配”各个子系统
-        self.ac = AirConditioner()
-        self.battery = Battery()
-        self.door_window = DoorWindow()
-        self.light = Light()
-        self.navigation = Navigation()
     def toggle_engine(self):  # <--- 确保这个方法的名字是 toggle_engine
         """启动或关闭引擎。"""
         self.engine_on = not self.engine_on
@@ -33,29 +166,57 @@ class Vehicle:
         else:
             self.speed = 0
             print("引擎已关闭，车速归零。")
+        self._publish({"engine_on": self.engine_on, "speed": self.speed})
 
     def set_driving_mode(self, mode_index):
-        """设置驾驶模式"""
+        """设置驾驶模式，返回设置是否有效。"""
         if 0 <= mode_index < len(self.DRIVING_MODES):
             self.current_driving_mode = self.DRIVING_MODES[mode_index]
+            self._publish({"driving_mode": self.current_driving_mode})
             print(f"驾驶模式已切换为: {self.current_driving_mode}")
-        else:
-            print("无效的驾驶模式。")
+            return True
+        print("无效的驾驶模式。")
+        return False
     
+    def dashboard_lines(self):
+        """把主仪表盘和各子系统状态拼成一帧文本（行列表），供渲染器按行比较重绘。"""
+        engine_status = "运行中" if self.engine_on else "已关闭"
+        lines = [
+            "",
+            "======== 无人驾驶中控仪表系统 ========",
+            f" 车辆: {self.make} {self.model}",
+            f" 引擎状态: {engine_status}",
+            f" 当前车速: {self.speed} km/h",
+            f" 当前驾驶模式: {self.current_driving_mode}",
+            "========================================",
+        ]
+        # --- 统一收集各子系统的状态显示 ---
+        lines += self.battery.status_lines(show_header=True)
+        lines += self.ac.status_lines(show_header=True)
+        lines += self.light.status_lines(show_header=True)
+        lines += self.door_window.status_lines(show_header=True)
+        navigation = self.loaded("navigation")
+        lines += navigation.route_lines() if navigation is not None else Navigation.idle_route_lines()
+        return lines
+
     def display_main_dashboard(self):
         """显示主仪表盘信息 (代替C的主界面)"""
-        engine_status = "运行中" if self.engine_on else "已关闭"
-        print("\n======== 无人驾驶中控仪表系统 ========")
-        print(f" 车辆: {self.make} {self.model}")
-        print(f" 引擎状态: {engine_status}")
-        print(f" 当前车速: {self.speed} km/h")
-        print(f" 当前驾驶模式: {self.current_driving_mode}")
-        print("========================================")
-        
-        # --- 统一调用各子系统的状态显示 ---
-        # 把这些子系统的状态显示也加回来
-        self.battery.display_status(show_header=True)
-        self.ac.display_status(show_header=True)
-        self.light.display_status(show_header=True)
-        self.door_window.display_status(show_header=True)
-        self.navigation.display_route()
\ No newline at end of file
+        print("\n".join(self.dashboard_lines()))
+
+
+# --- 单元测试 ---
+if __name__ == '__main__':
+    import contextlib
+    import io
+
+    print("--- 开始车辆启动单元测试 ---")
+    for preload in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            car = Vehicle(preload=preload)
+            car.dashboard_lines()
+            ready = time.perf_counter() - start
+        print(f"\n>>> {'并行预加载' if preload else '懒加载'}: 到首帧仪表盘 {ready * 1000:.1f} ms")
+        for line in car.startup_report():
+            print(line)
+    print("--- 车辆启动单元测试结束 ---")
@@ -1,29 +1,70 @@
 # main.py
 
 import os
+import threading
+import time
+from core import instrument
 from core.vehicle import Vehicle
+from core.simulation import Simulation
+from core.dashboard import DashboardRenderer, LiveDashboard
+from core.utils import data_path, shutdown_data
 
-def clear_screen():
-    """清空终端屏幕，以获得更好的显示效果。"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+MENU_LINES = [
+    "",
+    "---【主菜单】---",
+    "1. 启动/关闭引擎",
+    "2. 切换驾驶模式",
+    "3. 空调控制",
+    "4. 灯光控制",
+    "5. 门窗控制",
+    "6. 电池与充电",
+    "7. 导航",
+    "p. 性能统计",
+    "q. 退出程序",
+    "",
+]
+PROMPT = "请选择要操作的模块: "
 
-def main_menu(car):
+def main_menu(car, simulation=None):
     """显示主菜单并处理用户输入。"""
+    renderer = DashboardRenderer(fps=5)
+    lock = threading.RLock()
+    last_tick = time.perf_counter()
+
+    def advance():
+        # 把流逝的墙钟时间补给仿真时钟（充电、温度、行驶都在后台推进）
+        nonlocal last_tick
+        if simulation is not None:
+            now = time.perf_counter()
+            simulation.run(duration=now - last_tick)
+            last_tick = now
+
+    def frame():
+        if not renderer.ansi:
+            return car.dashboard_lines() + MENU_LINES
+        # 终端中输入提示也是帧的一部分，差量刷新以它的末尾为光标基准
+        notice = [f" 消息: {live.notice}"] if live.notice else []
+        return car.dashboard_lines() + notice + MENU_LINES + [PROMPT]
+
+    # 终端中等待输入时，仪表盘由后台线程按帧率差量刷新
+    live = None
+    if renderer.ansi:
+        live = LiveDashboard(frame, renderer, lock, on_tick=advance,
+                             events=car.events).start()
+
     while True:
-        clear_screen()
-        car.display_main_dashboard()
-        
-        print("\n---【主菜单】---")
-        print("1. 启动/关闭引擎")
-        print("2. 切换驾驶模式")
-        print("3. 空调控制")
-        print("4. 灯光控制")
-        print("5. 门窗控制")
-        print("6. 电池与充电")
-        print("7. 导航")
-        print("q. 退出程序")
-        
-        choice = input("\n请选择要操作的模块: ")
+        with lock:
+            advance()
+            renderer.invalidate()
+            renderer.render(frame(), force=True)
+            if live is not None:
+                live.resume()
+
+        choice = input("" if renderer.ansi else PROMPT)
+        if live is not None:
+            live.pause()
+        # 命令的输出会打乱屏幕，下一轮整体重绘
+        renderer.invalidate()
 
         if choice == '1':
             car.toggle_engine()
@@ -50,12 +91,21 @@ def main_menu(car):
             car.battery.toggle_charging() # 开始充电模拟
         elif choice == '7':
             print("--- 导航菜单 ---")
-            print("可选地点:", ", ".join(car.navigation.locations))
+            if len(car.navigation.locations) <= 50:
+                print("可选地点:", ", ".join(car.navigation.locations))
+            else:
+                print(f"地图共有 {len(car.navigation.locations)} 个地点，输错时会给出相近地点名。")
             start = input("请输入起点: ")
             end = input("请输入终点: ")
             if car.navigation.set_points(start, end):
                 car.navigation.plan_route()
+        elif choice.lower() == 'p':
+            show_instrumentation(car)
         elif choice.lower() == 'q':
+            if live is not None:
+                live.stop()
+            car.events.flush()  # 投递最后一个 tick 内尚未合并写入的状态变化
+            shutdown_data()     # 写出所有尚未落盘的子系统状态
             print("感谢使用，程序已退出。")
             break
         else:
@@ -63,11 +113,88 @@ def main_menu(car):
         
         input("\n按回车键继续...")
 
+def show_instrumentation(car):
+    """打印启动耗时和性能统计，并导出为 data/instrument.json；未开启时先开启插桩。"""
+    for line in car.startup_report():
+        print(line)
+    if not instrument.enabled:
+        instrument.enable()
+        print("已开启性能统计，执行一些操作后再次选择 p 查看结果。")
+        return
+    for line in instrument.report_lines():
+        print(line)
+    print(f"已导出: {instrument.export(data_path('instrument.json'))}")
+
+def run_headless(argv):
+    """
+    无界面批处理模式：python main.py --script 命令文件|- [--output 结果文件] [--fleet N]
+    逐行执行命令（见 core/headless.py），结果以JSON Lines写到标准输出或结果文件，
+    吞吐量统计写到标准错误。--fleet N 时对 N 辆车队车辆执行，状态只保存在内存中。
+    --instrument 文件 开启性能插桩，结束时导出调用次数、延迟直方图和计数器。
+    """
+    import argparse
+    import contextlib
+    import json
+    import sys
+    from core.headless import run_script
+
+    parser = argparse.ArgumentParser(description="无人驾驶中控系统")
+    parser.add_argument("--script", required=True, help="命令文件，- 表示标准输入")
+    parser.add_argument("--output", help="结果文件，默认写到标准输出")
+    parser.add_argument("--no-results", action="store_true", help="只输出统计摘要")
+    parser.add_argument("--fleet", type=int, default=0, help="对 N 辆车队车辆执行命令")
+    parser.add_argument("--instrument", metavar="FILE", help="开启性能插桩，结束时把指标导出为JSON")
+    options = parser.parse_args(argv)
+    if options.instrument:
+        instrument.enable()
+
+    simulation = Simulation(step=0.1)
+    # 初始化提示写到标准错误，标准输出只有结果
+    with contextlib.redirect_stdout(sys.stderr):
+        if options.fleet:
+            from core.fleet import Fleet
+            fleet = Fleet(options.fleet)
+            simulation.register(fleet)
+            vehicles = [fleet[i] for i in range(options.fleet)]
+        else:
+            # 批处理不在乎首帧时间，预先并行加载全部子系统，初始化提示不会混进结果
+            car = Vehicle(preload=True)
+            car.attach(simulation)
+            vehicles = [car]
+
+    source = sys.stdin if options.script == "-" else open(options.script, encoding="utf-8")
+    output = None
+    if not options.no_results:
+        output = open(options.output, "w", encoding="utf-8") if options.output else sys.stdout
+    try:
+        summary = run_script(source, vehicles, output, simulation)
+    finally:
+        for vehicle in vehicles:
+            if vehicle.events is not None:
+                vehicle.events.flush()
+        if source is not sys.stdin:
+            source.close()
+        if output not in (None, sys.stdout):
+            output.close()
+        shutdown_data()
+        if options.instrument:
+            instrument.export(options.instrument)
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
 def main():
     """程序主入口。"""
-    my_car = Vehicle()
+    import sys
+    if len(sys.argv) > 1:
+        run_headless(sys.argv[1:])
+        return
+    if os.environ.get("CAR_INSTRUMENT"):
+        instrument.enable()
+    # 子系统默认懒加载；CAR_PRELOAD=1 时启动阶段在线程池中并行加载全部子系统
+    my_car = Vehicle(preload=bool(os.environ.get("CAR_PRELOAD")))
+    simulation = Simulation(step=0.1)
+    my_car.attach(simulation)
     input("车辆初始化完成，按回车进入主菜单...")
-    main_menu(my_car)
+    main_menu(my_car, simulation)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()